@@ -0,0 +1,132 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.cache import LRUCache, data_versions
+from app.config import STRATEGY_STATE_CACHE_SIZE
+from app.crud import KEYSET_ORDER, ticker_where
+from app.executor import backtest_executor
+from app.store import SeriesStore, series_store
+from app.strategy import MovingAverageCrossoverStrategy, StrategyState, crossover_scan
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint:
+    """A strategy state and the position in the data it was computed up to"""
+
+    def __init__(self, state: StrategyState, epoch: int, last_row: Optional[Tuple]):
+        self.state = state
+        self.epoch = epoch
+        self.last_row = last_row  # (datetime, id) of the last processed row
+
+
+checkpoints = LRUCache(STRATEGY_STATE_CACHE_SIZE)
+
+
+def ticker_bars(records) -> List[Dict]:
+    """Convert ticker rows into strategy input"""
+    return [
+        {
+            'datetime': record.datetime,
+            'close': float(record.close)
+        }
+        for record in records
+    ]
+
+
+async def evaluate_strategy(
+    client,
+    symbol: str,
+    short_window: int,
+    long_window: int,
+    store: Optional[SeriesStore] = series_store
+) -> StrategyState:
+    """
+    Run the strategy over all ticker data of a symbol, resuming where possible.
+
+    The last evaluation for each symbol and window pair is kept as a checkpoint. While
+    the data epoch is unchanged, bars are only appended, so just the rows
+    after the checkpoint are fetched and processed. A delete or historical
+    insert bumps the epoch and forces a full recomputation.
+
+    Bars are read from `store` when it holds the symbol, and from the
+    database otherwise.
+
+    The moving averages and crossovers are computed on backtest_executor,
+    so long series do not block the event loop.
+
+    Raises:
+        ExecutorBusy: if the backtest queue is full
+    """
+    strategy = MovingAverageCrossoverStrategy(short_window, long_window)
+    key = (symbol, short_window, long_window)
+    version = data_versions[symbol]
+    # Read before querying: a concurrent rewrite then leaves this checkpoint stale
+    epoch = version.epoch
+    checkpoint = checkpoints.get(key)
+    resume = checkpoint is not None and checkpoint.epoch == epoch
+
+    if resume:
+        state = checkpoint.state
+        last_row = checkpoint.last_row
+    else:
+        logger.info(f"Full strategy evaluation for {key}")
+        state = StrategyState()
+        last_row = None
+
+    series = await store.get(client, symbol) if store is not None else None
+    if series is not None:
+        lo, _ = series.search(after=last_row)
+        bars = series.bars(lo)
+        if len(bars):
+            last_row = series.last_row
+    else:
+        records = await client.tickerdata.find_many(
+            where=ticker_where(after=last_row, symbol=symbol),
+            order=KEYSET_ORDER
+        )
+        bars = ticker_bars(records)
+        if records:
+            last = records[-1]
+            last_row = (last.datetime, last.id)
+            version.observe(last.datetime)
+
+    if len(bars):
+        closes = strategy.extend_closes(state, bars)
+        scan = await backtest_executor.run(crossover_scan, closes, *strategy.scan_args(state))
+        state = strategy.apply_scan(state, bars, closes, scan)
+    checkpoints.put(key, Checkpoint(state, epoch, last_row))
+    return state
+
+
+async def count_bars(
+    client,
+    symbol: str,
+    store: Optional[SeriesStore] = series_store
+) -> int:
+    """Number of stored bars of a symbol, from `store` when it holds the symbol"""
+    series = await store.get(client, symbol) if store is not None else None
+    if series is not None:
+        return len(series)
+    return await client.tickerdata.count(where=ticker_where(symbol=symbol))
+
+
+async def load_closes(
+    client,
+    symbol: str,
+    store: Optional[SeriesStore] = series_store
+) -> np.ndarray:
+    """Fetch every close price of a symbol, oldest first"""
+    series = await store.get(client, symbol) if store is not None else None
+    if series is not None:
+        return series.prices('close')
+
+    records = await client.tickerdata.find_many(
+        where=ticker_where(symbol=symbol),
+        order=KEYSET_ORDER
+    )
+    if records:
+        data_versions[symbol].observe(records[-1].datetime)
+    return np.array([float(record.close) for record in records])
@@ -0,0 +1,214 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from app.config import PERFORMANCE_CACHE_SIZE
+
+
+def as_utc(dt: datetime) -> datetime:
+    """Normalize a datetime to aware UTC; naive values are taken as UTC"""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class DataVersion:
+    """
+    Counters bumped by every write to ticker data.
+
+    `value` changes on any write. Cached results are keyed on the version
+    they were computed from, so a bump makes them unreachable without
+    scanning the cache.
+
+    `epoch` only changes when history is rewritten: a delete, or an insert
+    of bars older than the newest bar known. Within one epoch bars are only
+    appended, which is what incremental strategy evaluation relies on.
+
+    `modified` is when the version was last bumped, or created: no write
+    this process knows of is newer.
+
+    The counters are per process. Writes made elsewhere (another worker,
+    load_data.py) are noticed by comparing `source`, the symbol's
+    (version, epoch) change counters in the database, against a fresh probe
+    (see app.freshness); a mismatch bumps the version. `synced` is the
+    `value` the local state had when `source` was last confirmed, so
+    `source` describes the data exactly while the two are equal.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self.epoch = 0
+        self.latest: Optional[datetime] = None
+        self.modified = datetime.now(timezone.utc)
+        self.source: Optional[Tuple[int, int]] = None
+        self.synced: Optional[int] = None
+        self.probed: Optional[float] = None  # event-loop time of the last probe
+
+    def bump(self, inserted: Optional[Iterable[datetime]] = None) -> int:
+        """
+        Record a write.
+
+        Args:
+            inserted: Datetimes of the bars inserted; omit for writes that
+                are not inserts, such as deletes
+        """
+        self.value += 1
+        self.modified = datetime.now(timezone.utc)
+        datetimes = [as_utc(dt) for dt in inserted] if inserted is not None else []
+        if not datetimes:
+            self.epoch += 1
+            self.latest = None
+            return self.value
+
+        if self.latest is None or min(datetimes) < self.latest:
+            self.epoch += 1
+        self.observe(max(datetimes))
+        return self.value
+
+    def sync(self, source: Optional[Tuple[int, int]]) -> None:
+        """Record that the local state matches the database counters `source`"""
+        self.source = source
+        self.synced = self.value
+
+    def committed(self, source: Tuple[int, int]) -> None:
+        """
+        Record the database counters a write by this process left, after
+        its `bump`. They are only taken over if nothing else was written
+        since the last sync; otherwise the next probe sorts it out.
+        """
+        if self.source is not None and self.synced == self.value - 1 and source[0] == self.source[0] + 1:
+            self.sync(source)
+
+    @property
+    def shared(self) -> bool:
+        """Whether `source` identifies the data, the same way in every process"""
+        return self.source is not None and self.synced == self.value
+
+    def observe(self, latest: datetime) -> None:
+        """Record the newest bar seen in the database"""
+        latest = as_utc(latest)
+        if self.latest is None or latest > self.latest:
+            self.latest = latest
+
+
+class DataVersions:
+    """
+    One DataVersion per symbol, created on first use.
+
+    Writes to one symbol leave the cached results of all others valid.
+    Versions are never dropped, so a cache key built from one can not be
+    reused by a later, reset counter.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, DataVersion] = {}
+
+    def __getitem__(self, symbol: str) -> DataVersion:
+        version = self._versions.get(symbol)
+        if version is None:
+            version = self._versions[symbol] = DataVersion()
+        return version
+
+    def bump_all(self) -> None:
+        """Record a write that may have touched every symbol, e.g. a delete"""
+        for version in self._versions.values():
+            version.bump()
+
+    def stats(self) -> Dict:
+        return {
+            "symbols": len(self._versions),
+            "writes": sum(version.value for version in self._versions.values())
+        }
+
+
+class LRUCache:
+    """Size-bounded least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one.
+
+    The first caller starts the call as a task; callers arriving while it
+    is in flight await the same task and share its result or exception.
+    Keys should include the data version, so a call that started before a
+    write is not shared with requests made after it.
+
+    Callers await the task through asyncio.shield: a cancelled request
+    leaves the call running for the others.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved: the callers, if any, have it
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._tasks),
+            "calls": self.calls,
+            "coalesced": self.coalesced
+        }
+
+
+data_versions = DataVersions()
+performance_cache = LRUCache(PERFORMANCE_CACHE_SIZE)
+strategy_flights = SingleFlight()
@@ -0,0 +1,146 @@
+import time
+import zlib
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from app.config import COMPRESS_LEVEL, COMPRESS_MIN_BYTES
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Content codings this server produces, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header.
+
+    Returns:
+        The preferred supported coding the client accepts, or None to send
+        the body as is (including when COMPRESS_LEVEL is 0)
+    """
+    if COMPRESS_LEVEL <= 0 or not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    for coding in supported_encodings():
+        if weights.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+class CompressionStats:
+    """Bytes in and out and CPU time spent compressing responses"""
+
+    def __init__(self):
+        self.responses = 0
+        self.precompressed_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.cpu_seconds += cpu_seconds
+
+    def stats(self) -> Dict:
+        return {
+            "responses": self.responses,
+            "precompressed_hits": self.precompressed_hits,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else 0.0,
+            "cpu_seconds": round(self.cpu_seconds, 4)
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a whole body with `encoding` ('gzip' or 'br')"""
+    start = time.thread_time()
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=min(COMPRESS_LEVEL, 11))
+    else:
+        compressor = zlib.compressobj(min(COMPRESS_LEVEL, 9), zlib.DEFLATED, 31)  # 31: gzip container
+        compressed = compressor.compress(body) + compressor.flush()
+    compression_stats.record(len(body), len(compressed), time.thread_time() - start)
+    compression_stats.responses += 1
+    return compressed
+
+
+class EncodedBody:
+    """
+    A response body and its compressed forms.
+
+    Each coding is compressed on first use and kept, so a cached
+    EncodedBody serves repeated hits without compressing again. Bodies
+    under COMPRESS_MIN_BYTES are always sent as is.
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+
+    def encode(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Returns:
+            (body, coding applied or None)
+        """
+        if encoding is None or len(self.body) < COMPRESS_MIN_BYTES:
+            return self.body, None
+        compressed = self._encoded.get(encoding)
+        if compressed is None:
+            compressed = self._encoded[encoding] = compress(self.body, encoding)
+        else:
+            compression_stats.precompressed_hits += 1
+        return compressed, encoding
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    """
+    Compress a streamed body as it is produced.
+
+    Every chunk is flushed, so the client can decode each one as soon as
+    it arrives.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(COMPRESS_LEVEL, 11))
+
+        def process(chunk: bytes) -> bytes:
+            return compressor.process(chunk) + compressor.flush()
+        finish = compressor.finish
+    else:
+        compressor = zlib.compressobj(min(COMPRESS_LEVEL, 9), zlib.DEFLATED, 31)
+
+        def process(chunk: bytes) -> bytes:
+            return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+
+    async for chunk in chunks:
+        start = time.thread_time()
+        compressed = process(chunk)
+        compression_stats.record(len(chunk), len(compressed), time.thread_time() - start)
+        if compressed:
+            yield compressed
+    start = time.thread_time()
+    tail = finish()
+    compression_stats.record(0, len(tail), time.thread_time() - start)
+    compression_stats.responses += 1
+    yield tail
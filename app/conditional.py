@@ -0,0 +1,77 @@
+import hashlib
+import secrets
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict
+
+from fastapi import Request, Response, status
+
+from app.cache import data_versions
+
+# Differs on every start, so a tag built from per-process counters is never repeated
+BOOT_ID = secrets.token_hex(8)
+
+
+def validators(symbol: str, *variant) -> Dict[str, str]:
+    """
+    ETag, Last-Modified and Cache-Control headers for a response derived
+    from the data of `symbol`.
+
+    The ETag hashes the symbol's change counters in the database and its
+    newest bar, as the last probe saw them (see app.freshness), so every
+    worker and every restart issues the same tag for the same data.
+    `variant` holds whatever else selects the response, such as query
+    parameters and the media type. While the counters are not known to
+    match the local data, e.g. the probe failed or another write landed
+    next to this process's own, the per-process DataVersion is hashed
+    instead, with BOOT_ID since those counters restart with the process.
+    """
+    version = data_versions[symbol]
+    if version.shared:
+        key = repr((symbol, version.source, version.latest, variant))
+    else:
+        key = repr((BOOT_ID, symbol, version.epoch, version.value, variant))
+    digest = hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+    return {
+        "ETag": f'W/"{digest}"',
+        "Last-Modified": format_datetime(version.modified.replace(microsecond=0), usegmt=True),
+        # Caches may store the response but must check it is current before reuse
+        "Cache-Control": "no-cache"
+    }
+
+
+def _opaque(tag: str) -> str:
+    """Entity tag without its weak marker, for weak comparison"""
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """
+    Whether a GET with these `validators` should be answered with 304.
+
+    If-None-Match takes precedence; If-Modified-Since is only used without
+    it, and has one-second resolution.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = _opaque(headers["ETag"])
+        return any(_opaque(tag) == current for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False  # unparseable dates are ignored
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """304 response carrying the current validators"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,62 @@
+import os
+
+# Symbols
+DEFAULT_SYMBOL = os.getenv("DEFAULT_SYMBOL", "DEFAULT")  # used when a row or request names no symbol
+
+# Bulk ingest
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))  # rows per multi-row INSERT
+BULK_TX_TIMEOUT = float(os.getenv("BULK_TX_TIMEOUT", "60"))  # seconds per bulk transaction
+
+# Streaming NDJSON ingest
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", str(BULK_CHUNK_SIZE)))  # rows per flush
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))  # longest accepted line
+STREAM_MAX_ERRORS = int(os.getenv("STREAM_MAX_ERRORS", "100"))  # line errors echoed back
+
+# PostgreSQL COPY fast path (requires asyncpg)
+COPY_THRESHOLD = int(os.getenv("COPY_THRESHOLD", "10000"))  # rows; 0 disables COPY
+
+# GET /data paging
+DATA_PAGE_SIZE = int(os.getenv("DATA_PAGE_SIZE", "1000"))  # default rows per page
+DATA_PAGE_MAX = int(os.getenv("DATA_PAGE_MAX", "10000"))  # largest allowed limit
+DATA_STREAM_BATCH_SIZE = int(os.getenv("DATA_STREAM_BATCH_SIZE", "5000"))  # rows per DB fetch when streaming
+
+# Strategy result cache
+PERFORMANCE_CACHE_SIZE = int(os.getenv("PERFORMANCE_CACHE_SIZE", "128"))  # cached results
+STRATEGY_STATE_CACHE_SIZE = int(os.getenv("STRATEGY_STATE_CACHE_SIZE", "32"))  # resumable evaluations kept
+
+# Strategy windows
+STRATEGY_MAX_WINDOW = int(os.getenv("STRATEGY_MAX_WINDOW", "100000"))  # longest moving average, in bars
+
+# POST /strategy/sweep
+SWEEP_MAX_PAIRS = int(os.getenv("SWEEP_MAX_PAIRS", "2000"))  # window pairs per request
+
+# Backtest process pool
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", "2"))  # worker processes; 0 runs backtests inline
+BACKTEST_QUEUE_LIMIT = int(os.getenv("BACKTEST_QUEUE_LIMIT", "8"))  # jobs running or waiting before 503
+BACKTEST_OFFLOAD_BARS = int(os.getenv("BACKTEST_OFFLOAD_BARS", "50000"))  # jobs processing fewer bars run inline
+
+# GET /data/resample
+RESAMPLE_BATCH_BUCKETS = int(os.getenv("RESAMPLE_BATCH_BUCKETS", "5000"))  # output bars per DB query
+ROLLUP_INTERVALS = os.getenv("ROLLUP_INTERVALS", "5m,1h,1d")  # bar sizes kept precomputed; empty disables rollups
+
+# In-memory series store
+SERIES_STORE_MB = int(os.getenv("SERIES_STORE_MB", "256"))  # memory cap for cached ticker columns; 0 disables
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")  # directory of memory-mapped series snapshots; empty disables
+DATA_PROBE_MS = int(os.getenv("DATA_PROBE_MS", "1000"))  # least time between database checks for outside writes per symbol; 0 checks every read
+
+# Response compression
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))  # smaller response bodies are sent as is
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))  # gzip level / brotli quality; 0 disables compression
+
+# Write-behind ingest (POST /data?write=async)
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "10000"))  # bars queued before 503; 0 disables async writes
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", str(BULK_CHUNK_SIZE)))  # most bars per flush
+WRITE_FLUSH_MS = int(os.getenv("WRITE_FLUSH_MS", "50"))  # longest a bar waits for its batch to fill
+
+# Database connection pool (Prisma query engine; per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "0"))  # connection_limit; 0 keeps Prisma's default of 2 * CPUs + 1
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds a query waits for a free connection
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))  # seconds to open a database connection
+DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", "0"))  # seconds per query-engine request; 0 keeps the client default
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # prepared statements per connection; 0 behind pgbouncer
+DB_ENGINE_CONNECTIONS = int(os.getenv("DB_ENGINE_CONNECTIONS", "0"))  # concurrent HTTP requests to the engine; 0 keeps the default
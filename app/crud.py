@@ -0,0 +1,477 @@
+import base64
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import BULK_CHUNK_SIZE, BULK_TX_TIMEOUT, DATA_PAGE_SIZE, DATA_STREAM_BATCH_SIZE
+from app.models import TickerDataCreate
+from app.pgcopy import (
+    copy_upsert_records,
+    upsert_sql,
+    use_copy,
+    utc_naive
+)
+from app.rollup import lock_statements, lock_symbols, refresh_rollups, refresh_statements
+
+# Stable row order for keyset pagination
+KEYSET_ORDER = [{'datetime': 'asc'}, {'id': 'asc'}]
+
+# Placeholder casts for upsert VALUES, in COPY_COLUMNS order
+UPSERT_CASTS = ('timestamp', 'numeric', 'numeric', 'numeric', 'numeric', 'integer', 'text')
+
+
+def ticker_record(data: TickerDataCreate) -> Dict:
+    """Convert validated ticker data into a Prisma create payload"""
+    return {
+        'symbol': data.symbol,
+        'datetime': data.datetime,
+        'open': data.open,
+        'high': data.high,
+        'low': data.low,
+        'close': data.close,
+        'volume': data.volume
+    }
+
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    """Yield consecutive slices of at most `size` items"""
+    if size < 1:
+        raise ValueError("chunk size must be positive")
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def create_many_records(
+    client,
+    records: List[Dict],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """
+    Insert ticker payloads with one multi-row INSERT per chunk.
+
+    All chunks run inside a single transaction, so either every row is
+    written or none are.
+
+    Returns:
+        Number of rows inserted
+    """
+    if not records:
+        return 0
+
+    created = 0
+    async with client.tx(timeout=timedelta(seconds=BULK_TX_TIMEOUT)) as transaction:
+        for chunk in chunked(records, chunk_size):
+            created += await transaction.tickerdata.create_many(data=list(chunk))
+    return created
+
+
+def group_by_symbol(rows: List[TickerDataCreate]) -> Dict[str, List[TickerDataCreate]]:
+    """Split rows by symbol, keeping their order within each symbol"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.symbol, []).append(row)
+    return groups
+
+
+def dedupe_records(records: List[Dict]) -> List[Dict]:
+    """
+    Keep the last payload for each (symbol, datetime) key.
+
+    One INSERT ... ON CONFLICT statement may only touch a row once, and a
+    later copy of a bar in the same payload supersedes the earlier one.
+    """
+    latest = {}
+    for record in records:
+        latest[(record['symbol'], utc_naive(record['datetime']))] = record
+    return list(latest.values())
+
+
+def upsert_values(records: List[Dict]) -> Tuple[str, List]:
+    """Render records as a parameterized VALUES list for `upsert_sql`"""
+    rows = []
+    params = []
+    for record in records:
+        first = len(params)
+        rows.append("(" + ", ".join(
+            f"${first + i + 1}::{cast}" for i, cast in enumerate(UPSERT_CASTS)
+        ) + ")")
+        params.extend([
+            utc_naive(record['datetime']).isoformat(),
+            str(record['open']),
+            str(record['high']),
+            str(record['low']),
+            str(record['close']),
+            record['volume'],
+            record['symbol']
+        ])
+    return "VALUES " + ", ".join(rows), params
+
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def tally_upsert(records: List[Dict], written: List[Dict]) -> Dict[str, Dict]:
+    """
+    Combine per-symbol statement results into totals per symbol.
+
+    Every submitted record not reported as inserted or updated was
+    skipped: identical to the stored bar, kept by 'ignore', or superseded
+    by a later copy in the same payload.
+    """
+    results = {}
+    for record in records:
+        counts = results.setdefault(record['symbol'], {
+            'inserted': 0, 'updated': 0, 'skipped': 0, 'first': None, 'last': None
+        })
+        counts['skipped'] += 1
+    for row in written:
+        counts = results[row['symbol']]
+        counts['inserted'] += row['inserted']
+        counts['updated'] += row['updated']
+        counts['skipped'] -= row['inserted'] + row['updated']
+        first, last = _as_datetime(row['first']), _as_datetime(row['last'])
+        counts['first'] = first if counts['first'] is None else min(counts['first'], first)
+        counts['last'] = last if counts['last'] is None else max(counts['last'], last)
+    return results
+
+
+async def upsert_records(
+    client,
+    records: List[Dict],
+    on_conflict: str = 'update',
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> Dict[str, Dict]:
+    """
+    Insert ticker payloads, resolving (symbol, datetime) conflicts.
+
+    With on_conflict='update' stored bars are overwritten by differing
+    ones; with 'ignore' they are kept. Bars identical to stored ones are
+    never written, so replaying a load is free.
+
+    Loads of at least COPY_THRESHOLD rows are COPYed into a staging table
+    and upserted from there when asyncpg is installed. Smaller loads run
+    one multi-row upsert per chunk, all in a single transaction. Either
+    way the rollup buckets covering the written range are recomputed and
+    the change counters of the symbols written are bumped (see
+    `version_statements`) in the same transaction, which holds the ingest
+    lock of every symbol it writes (see `rollup.lock_statements`).
+
+    Returns:
+        Per symbol: `inserted`, `updated` and `skipped` counts, the
+        `first` and `last` datetime written (None if nothing was), and
+        for symbols written, `version`: their (version, epoch) after the
+        write
+    """
+    unique = dedupe_records(records)
+    if not unique:
+        return {}
+
+    symbols = {record['symbol'] for record in unique}
+    if use_copy(len(unique)):
+        versions = {}
+
+        async def lock(conn):
+            for sql, params in lock_statements(symbols):
+                await conn.execute(sql, *params)
+
+        async def refresh(conn, rows):
+            totals = tally_upsert(unique, rows)
+            for sql, params in refresh_statements(totals):
+                await conn.execute(sql, *params)
+            for sql, params in version_statements(totals):
+                row = await conn.fetchrow(sql, *params)
+                versions[row['symbol']] = (row['version'], row['epoch'])
+
+        written = await copy_upsert_records(unique, on_conflict, after=refresh, before=lock)
+    else:
+        written = []
+        async with client.tx(timeout=timedelta(seconds=BULK_TX_TIMEOUT)) as transaction:
+            await lock_symbols(transaction, symbols)
+            for chunk in chunked(unique, chunk_size):
+                source, params = upsert_values(chunk)
+                written += await transaction.query_raw(upsert_sql(source, on_conflict), *params)
+            totals = tally_upsert(unique, written)
+            await refresh_rollups(transaction, totals)
+            versions = await record_versions(transaction, totals)
+    return _with_versions(tally_upsert(records, written), versions)
+
+
+async def upsert_ticker_data(
+    client,
+    rows: List[TickerDataCreate],
+    on_conflict: str = 'update'
+) -> Dict[str, Dict]:
+    """
+    Upsert validated ticker rows, see `upsert_records`.
+
+    Rows are written grouped by symbol, so each chunk touches one
+    contiguous range of the (symbol, datetime) index.
+    """
+    return await upsert_records(client, [
+        ticker_record(row)
+        for group in group_by_symbol(rows).values()
+        for row in group
+    ], on_conflict)
+
+
+async def insert_ticker_data(
+    client,
+    rows: List[TickerDataCreate]
+) -> Tuple[Dict[str, Dict], List[int]]:
+    """
+    Insert validated rows, leaving bars already stored untouched.
+
+    Treats each row like a POST /data: a row whose (symbol, datetime) is
+    already stored, or repeats an earlier row of `rows`, is not written.
+    All rows go in one transaction with their rollup refresh.
+
+    Returns:
+        (per-symbol counts as from `upsert_records`, positions in `rows`
+        of the rows not written because of such a conflict)
+    """
+    records = [ticker_record(row) for row in rows]
+    first = {}
+    for position, record in enumerate(records):
+        first.setdefault((record['symbol'], utc_naive(record['datetime'])), position)
+    unique = [records[position] for position in first.values()]
+    if not unique:
+        return {}, []
+
+    written = []
+    async with client.tx(timeout=timedelta(seconds=BULK_TX_TIMEOUT)) as transaction:
+        await lock_symbols(transaction, {record['symbol'] for record in unique})
+        for chunk in chunked(unique, BULK_CHUNK_SIZE):
+            source, params = upsert_values(chunk)
+            written += await transaction.query_raw(upsert_sql(source, 'ignore', keys=True), *params)
+        totals = tally_upsert(unique, written)
+        await refresh_rollups(transaction, totals)
+        versions = await record_versions(transaction, totals)
+
+    inserted = {
+        (row['symbol'], utc_naive(_as_datetime(dt)))
+        for row in written
+        for dt in row['inserted_at'] or []
+    }
+    conflicts = []
+    for position, record in enumerate(records):
+        key = (record['symbol'], utc_naive(record['datetime']))
+        if first[key] != position or key not in inserted:
+            conflicts.append(position)
+    return _with_versions(tally_upsert(records, written), versions), conflicts
+
+
+# Bumps the change counters of symbol $1 after a write; see `version_statements`
+VERSION_SQL = """
+INSERT INTO "ticker_version" AS v ("symbol", "version", "epoch", "latest")
+VALUES ($1, 1, 0, (SELECT max("datetime") FROM "ticker_data" WHERE "symbol" = $1))
+ON CONFLICT ("symbol") DO UPDATE SET
+    "version" = v."version" + 1,
+    "epoch" = v."epoch" + CASE WHEN $2::boolean OR $3::timestamp < v."latest" THEN 1 ELSE 0 END,
+    "latest" = EXCLUDED."latest"
+RETURNING "symbol", "version", "epoch"
+"""
+
+# Bumps every symbol's counters after deleting all rows
+VERSION_ALL_SQL = """
+UPDATE "ticker_version" SET "version" = "version" + 1, "epoch" = "epoch" + 1, "latest" = NULL
+"""
+
+# Change counters and newest bar of symbol $1: a primary key and an index lookup
+PROBE_SQL = """
+SELECT v."version", v."epoch",
+       (SELECT max("datetime") FROM "ticker_data" WHERE "symbol" = $1) AS "latest"
+FROM (SELECT 1) AS one
+LEFT JOIN "ticker_version" v ON v."symbol" = $1
+"""
+
+
+def version_statements(written: Dict[str, Dict]) -> List[Tuple[str, List]]:
+    """
+    Statements bumping the change counters of each symbol written.
+
+    `version` grows with every write to the symbol and `epoch` with every
+    write that rewrote history: an update, an insert older than the newest
+    bar stored, or a delete. Other processes compare the pair with what
+    their cached data was read at (see app.freshness). They run in the
+    writing transaction, after the ingest lock, so versions follow commit
+    order.
+
+    `written` maps symbols to `updated` counts and the `first` datetime
+    written, as returned by `upsert_records`; symbols nothing was written
+    for are left alone.
+
+    Returns:
+        (sql, [symbol, rewrote, first]) triples to run in order
+    """
+    return [
+        (VERSION_SQL, [symbol, counts['updated'] > 0, utc_naive(counts['first'])])
+        for symbol, counts in sorted(written.items())
+        if counts.get('first') is not None
+    ]
+
+
+async def record_versions(client, written: Dict[str, Dict]) -> Dict[str, Tuple[int, int]]:
+    """
+    Bump the change counters of the symbols written, see `version_statements`.
+
+    Returns:
+        The (version, epoch) each symbol was left at
+    """
+    versions = {}
+    for sql, (symbol, rewrote, first) in version_statements(written):
+        row, = await client.query_raw(sql, symbol, rewrote, first.isoformat())
+        versions[symbol] = (int(row['version']), int(row['epoch']))
+    return versions
+
+
+async def record_delete(client, symbol: Optional[str] = None) -> Optional[Tuple[int, int]]:
+    """
+    Bump the change counters after deleting the rows of `symbol`, or of all symbols.
+
+    Returns:
+        The symbol's (version, epoch), or None for all symbols
+    """
+    if symbol is None:
+        await client.execute_raw(VERSION_ALL_SQL)
+        return None
+    row, = await client.query_raw(VERSION_SQL, symbol, True, None)
+    return int(row['version']), int(row['epoch'])
+
+
+def _with_versions(results: Dict[str, Dict], versions: Dict[str, Tuple[int, int]]) -> Dict[str, Dict]:
+    for symbol, version in versions.items():
+        results[symbol]['version'] = version
+    return results
+
+
+async def probe_ticker_data(client, symbol: str) -> Tuple[Optional[Tuple[int, int]], Optional[datetime]]:
+    """
+    The change counters and newest bar of `symbol`.
+
+    Returns:
+        ((version, epoch) or None if the symbol was never written through
+        `version_statements`, newest datetime or None without rows)
+    """
+    row, = await client.query_raw(PROBE_SQL, symbol)
+    marker = None if row['version'] is None else (int(row['version']), int(row['epoch']))
+    latest = row['latest']
+    return marker, None if latest is None else _as_datetime(latest)
+
+
+SYMBOLS_SQL = 'SELECT DISTINCT "symbol" FROM "ticker_data" ORDER BY "symbol"'
+
+
+async def stored_symbols(client) -> List[str]:
+    """Every symbol with stored rows, in alphabetical order"""
+    rows = await client.query_raw(SYMBOLS_SQL)
+    return [row['symbol'] for row in rows]
+
+
+def encode_cursor(dt: datetime, record_id: int) -> str:
+    """Encode the (datetime, id) keyset position of a row as an opaque token"""
+    raw = f"{dt.isoformat()}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by `encode_cursor`, raising ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        dt, record_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(dt), int(record_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def ticker_where(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    symbol: Optional[str] = None
+) -> Dict:
+    """
+    Build a Prisma filter for rows of `symbol` in [start, end) that sort after `after`.
+
+    Rows are ordered by (datetime, id), so the keyset condition is
+    datetime > d OR (datetime = d AND id > i). With a symbol, the whole
+    filter is a range of the unique (symbol, datetime) index.
+    """
+    conditions = []
+    if symbol is not None:
+        conditions.append({'symbol': symbol})
+    if start is not None:
+        conditions.append({'datetime': {'gte': start}})
+    if end is not None:
+        conditions.append({'datetime': {'lt': end}})
+    if after is not None:
+        dt, record_id = after
+        conditions.append({
+            'OR': [
+                {'datetime': {'gt': dt}},
+                {'datetime': dt, 'id': {'gt': record_id}}
+            ]
+        })
+    return {'AND': conditions} if conditions else {}
+
+
+async def find_ticker_page(
+    client,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: int = DATA_PAGE_SIZE,
+    symbol: Optional[str] = None
+) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page of ticker rows in (datetime, id) order.
+
+    One extra row is requested to tell whether another page follows, so
+    each page costs a single index range scan regardless of its offset.
+
+    Returns:
+        (rows, next_cursor) where next_cursor is None on the last page
+    """
+    records = await client.tickerdata.find_many(
+        where=ticker_where(start, end, after, symbol),
+        order=KEYSET_ORDER,
+        take=limit + 1
+    )
+
+    if len(records) <= limit:
+        return records, None
+    last = records[limit - 1]
+    return records[:limit], encode_cursor(last.datetime, last.id)
+
+
+async def iter_ticker_batches(
+    client,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None,
+    batch_size: int = DATA_STREAM_BATCH_SIZE,
+    symbol: Optional[str] = None
+) -> AsyncIterator[List]:
+    """
+    Yield ticker rows in (datetime, id) order, one keyset page at a time.
+
+    Only one batch is held in memory at once. Stops after `limit` rows if
+    given, otherwise at the end of the range.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        take = batch_size if remaining is None else min(batch_size, remaining)
+        records = await client.tickerdata.find_many(
+            where=ticker_where(start, end, after, symbol),
+            order=KEYSET_ORDER,
+            take=take
+        )
+        if not records:
+            return
+        yield records
+        if len(records) < take:
+            return
+        if remaining is not None:
+            remaining -= len(records)
+        last = records[-1]
+        after = (last.datetime, last.id)
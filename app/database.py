@@ -1,9 +1,85 @@
 from prisma import Prisma
 from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import logging
 import os
 
+import httpx
+
+from app.config import (
+    DB_CONNECT_TIMEOUT,
+    DB_ENGINE_CONNECTIONS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_QUERY_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# Query-engine metrics reported by pool_stats (needs the "metrics" preview feature)
+POOL_METRICS = (
+    'prisma_pool_connections_open',
+    'prisma_pool_connections_busy',
+    'prisma_pool_connections_idle',
+    'prisma_client_queries_active',
+    'prisma_client_queries_wait',
+    'prisma_pool_connections_opened_total',
+    'prisma_client_queries_total'
+)
+
+def pool_params(pool_size: int = DB_POOL_SIZE) -> Dict[str, str]:
+    """Connection-string options for the query engine's pool"""
+    params = {
+        'pool_timeout': f"{DB_POOL_TIMEOUT:g}",
+        'connect_timeout': f"{DB_CONNECT_TIMEOUT:g}",
+        'statement_cache_size': str(DB_STATEMENT_CACHE_SIZE)
+    }
+    if pool_size > 0:
+        params['connection_limit'] = str(pool_size)
+    return params
+
+def pool_url(url: Optional[str] = None, pool_size: int = DB_POOL_SIZE) -> Optional[str]:
+    """
+    Add the pool settings to a DATABASE_URL.
+
+    Options already present in the URL are kept as they are.
+
+    Returns:
+        The tuned URL, or None when no DATABASE_URL is set
+    """
+    url = url or os.getenv("DATABASE_URL")
+    if not url:
+        return None
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    present = {key for key, _ in params}
+    params += [(key, value) for key, value in pool_params(pool_size).items() if key not in present]
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+def http_config() -> Dict:
+    """HTTP client settings for requests to the query engine"""
+    config = {}
+    if DB_QUERY_TIMEOUT > 0:
+        config['timeout'] = DB_QUERY_TIMEOUT
+    if DB_ENGINE_CONNECTIONS > 0:
+        config['limits'] = httpx.Limits(
+            max_connections=DB_ENGINE_CONNECTIONS,
+            max_keepalive_connections=DB_ENGINE_CONNECTIONS
+        )
+    return config
+
+def create_client(pool_size: int = DB_POOL_SIZE) -> Prisma:
+    """Prisma client using the configured pool and engine settings"""
+    url = pool_url(pool_size=pool_size)
+    return Prisma(
+        datasource={'url': url} if url else None,
+        http=http_config() or None
+    )
+
 # Database instance
-db = Prisma()
+db = create_client()
 
 async def connect_db():
     """Connect to the database"""
@@ -16,6 +92,36 @@ async def disconnect_db():
     if db.is_connected():
         await db.disconnect()
 
+async def pool_stats(client: Prisma = db) -> Dict:
+    """
+    Report the pool settings and, when connected, the engine's pool gauges.
+
+    Returns:
+        Configured pool size and timeouts, plus open/busy/idle connections,
+        active and waiting queries and their totals when the query engine
+        exposes metrics
+    """
+    stats = {
+        "pool_size": DB_POOL_SIZE or None,  # None: the engine's default
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "connect_timeout": DB_CONNECT_TIMEOUT,
+        "query_timeout": DB_QUERY_TIMEOUT or None,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "engine_connections": DB_ENGINE_CONNECTIONS or None
+    }
+    if not client.is_connected():
+        return stats
+    try:
+        metrics = await client.get_metrics()
+    except Exception as e:
+        logger.debug(f"Query engine metrics unavailable: {str(e)}")
+        return stats
+    values = {metric.key: metric.value for metric in metrics.counters + metrics.gauges}
+    for key in POOL_METRICS:
+        if key in values:
+            stats[key[len('prisma_'):]] = values[key]
+    return stats
+
 @asynccontextmanager
 async def get_db():
     """Get database session"""
@@ -23,4 +129,4 @@ async def get_db():
     try:
         yield db
     finally:
-        pass  # Keep connection alive for app lifecycle
\ No newline at end of file
+        pass  # Keep connection alive for app lifecycle
@@ -0,0 +1,122 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from app.config import BACKTEST_WORKERS, BACKTEST_QUEUE_LIMIT, BACKTEST_OFFLOAD_BARS
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised when the backtest queue is full"""
+
+
+def _run_shared(func: Callable, name: str, size: int, args: tuple):
+    """Worker side: run func on the close series in shared memory `name`"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        closes = np.ndarray((size,), dtype=np.float64, buffer=shm.buf)
+        try:
+            return func(closes, *args)
+        finally:
+            del closes  # release the buffer so the segment can be closed
+    finally:
+        shm.close()
+
+
+class BacktestExecutor:
+    """
+    Runs CPU-heavy strategy work in a process pool, off the event loop.
+    
+    Jobs are module-level functions taking a float64 close series first.
+    The series is copied once into a shared-memory segment and workers map
+    it directly, so no per-bar Python objects are pickled. Jobs costing
+    less than `offload_bars` (or all jobs with `workers=0`) run inline,
+    where process overhead would outweigh the work; a job's cost is the
+    bars it processes, the length of the series unless the caller says
+    otherwise. At most `queue_limit` jobs may be running or waiting; more
+    raise ExecutorBusy.
+    """
+    
+    def __init__(self, workers: int, queue_limit: int, offload_bars: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.offload_bars = offload_bars
+        self.pending = 0
+        self.offloaded = 0
+        self.inline = 0
+        self.rejected = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking the server process would copy its threads' locks
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+    
+    async def run(self, func: Callable, closes: np.ndarray, *args, cost: Optional[int] = None):
+        """
+        Run func(closes, *args), in a worker process when worthwhile.
+        
+        Args:
+            cost: Bars the job processes, e.g. bars times window pairs for
+                a sweep (default: len(closes))
+        
+        Raises:
+            ExecutorBusy: if queue_limit jobs are already pending
+        """
+        closes = np.ascontiguousarray(closes, dtype=np.float64)
+        cost = len(closes) if cost is None else cost
+        if self.workers <= 0 or cost < self.offload_bars:
+            self.inline += 1
+            return func(closes, *args)
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            raise ExecutorBusy(f"{self.pending} backtests already pending")
+        
+        self.pending += 1
+        shm = shared_memory.SharedMemory(create=True, size=max(closes.nbytes, 1))
+        try:
+            shared = np.ndarray(closes.shape, dtype=np.float64, buffer=shm.buf)
+            shared[:] = closes
+            del shared
+            
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._get_pool(), _run_shared, func, shm.name, len(closes), args
+            )
+            self.offloaded += 1
+            return result
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next job
+            self._pool = None
+            raise
+        finally:
+            self.pending -= 1
+            shm.close()
+            shm.unlink()
+    
+    def shutdown(self):
+        """Stop the worker processes, if started"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+    
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'queue_limit': self.queue_limit,
+            'pending': self.pending,
+            'offloaded': self.offloaded,
+            'inline': self.inline,
+            'rejected': self.rejected
+        }
+
+
+backtest_executor = BacktestExecutor(BACKTEST_WORKERS, BACKTEST_QUEUE_LIMIT, BACKTEST_OFFLOAD_BARS)
@@ -0,0 +1,114 @@
+from typing import AsyncIterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # columnar export is optional
+    pa = None
+    pq = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/x-parquet"
+
+
+def export_available() -> bool:
+    """Whether Arrow / Parquet responses can be produced"""
+    return pa is not None
+
+
+def ticker_schema():
+    """Arrow schema of exported ticker data"""
+    return pa.schema([
+        ('id', pa.int64()),
+        ('symbol', pa.string()),
+        ('datetime', pa.timestamp('ms', tz='UTC')),
+        ('open', pa.float64()),
+        ('high', pa.float64()),
+        ('low', pa.float64()),
+        ('close', pa.float64()),
+        ('volume', pa.int64())
+    ])
+
+
+def ticker_batch(records: List):
+    """Build one Arrow record batch, column by column, from ticker rows"""
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array([r.id for r in records], pa.int64()),
+            pa.array([r.symbol for r in records], pa.string()),
+            pa.array([r.datetime for r in records], pa.timestamp('ms', tz='UTC')),
+            pa.array([float(r.open) for r in records], pa.float64()),
+            pa.array([float(r.high) for r in records], pa.float64()),
+            pa.array([float(r.low) for r in records], pa.float64()),
+            pa.array([float(r.close) for r in records], pa.float64()),
+            pa.array([r.volume for r in records], pa.int64())
+        ],
+        schema=ticker_schema()
+    )
+
+
+class _DrainableSink:
+    """Write-only file object whose buffered bytes can be taken as they are written"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+async def arrow_stream(batches: AsyncIterator[List], first: Optional[List] = None) -> AsyncIterator[bytes]:
+    """
+    Encode batches of ticker rows as an Arrow IPC stream.
+
+    Each database batch becomes one record batch and is sent as soon as it
+    is encoded.
+    """
+    sink = _DrainableSink()
+    writer = pa.ipc.new_stream(sink, ticker_schema())
+    if first:
+        writer.write_batch(ticker_batch(first))
+    yield sink.drain()
+    async for records in batches:
+        writer.write_batch(ticker_batch(records))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+async def parquet_stream(batches: AsyncIterator[List], first: Optional[List] = None) -> AsyncIterator[bytes]:
+    """
+    Encode batches of ticker rows as a Parquet file.
+
+    Each database batch becomes one row group; row groups are sent as they
+    are written and the footer follows the last one.
+    """
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, ticker_schema())
+    if first:
+        writer.write_batch(ticker_batch(first))
+        yield sink.drain()
+    async for records in batches:
+        writer.write_batch(ticker_batch(records))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
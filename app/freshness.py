@@ -0,0 +1,52 @@
+import asyncio
+import logging
+
+from app.cache import DataVersion, as_utc, data_versions
+from app.config import DATA_PROBE_MS
+from app.crud import probe_ticker_data
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_version(client, symbol: str, probe_interval: float = DATA_PROBE_MS / 1000) -> DataVersion:
+    """
+    Bump the DataVersion of `symbol` if its rows changed outside this process.
+
+    The database is probed for the symbol's change counters and newest
+    datetime, at most once per `probe_interval` seconds; both are index
+    lookups. When the counters differ from the version's `source`, the
+    change counts as an append if the epoch is unchanged, and as a rewrite
+    of history otherwise. Bars appended by plain SQL, which leaves the
+    counters alone, are noticed by the newest datetime. Readers such as
+    the series store and the strategy caches then catch up as after a
+    local write.
+
+    A failed probe is only logged: the read that follows hits the
+    database anyway.
+    """
+    version = data_versions[symbol]
+    now = asyncio.get_running_loop().time()
+    if version.probed is not None and now - version.probed < probe_interval:
+        return version
+    try:
+        source, latest = await probe_ticker_data(client, symbol)
+    except Exception as e:
+        logger.warning(f"Error probing {symbol} for outside writes: {str(e)}")
+        return version
+    version.probed = now
+
+    if version.synced is None:
+        # Nothing was checked yet; data read before now may be stale
+        changed, appended = version.value > 0, False
+    elif source != version.source:
+        changed = True
+        appended = source is not None and version.source is not None and source[1] == version.source[1]
+    else:
+        changed = appended = latest is not None and (version.latest is None or as_utc(latest) > version.latest)
+    if changed:
+        logger.info(f"Rows of {symbol} changed outside this process; refreshing")
+        version.bump([latest] if appended and latest is not None else None)
+    if latest is not None:
+        version.observe(latest)
+    version.sync(source)
+    return version
@@ -0,0 +1,116 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+from pydantic import ValidationError
+
+from app.config import STREAM_BATCH_SIZE, STREAM_MAX_LINE_BYTES, STREAM_MAX_ERRORS
+from app.models import TickerDataCreate
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class LineTooLong(ValueError):
+    """Raised for an NDJSON line longer than the configured limit"""
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = STREAM_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a byte stream into NDJSON lines without buffering the whole body.
+
+    Yields (line_number, line) pairs with 1-based line numbers. Blank lines
+    are skipped. A line longer than `max_line_bytes` is yielded as a
+    LineTooLong instance and its remaining bytes are discarded, so memory
+    stays bounded by the line limit rather than the payload size.
+    """
+    buffer = bytearray()
+    line_number = 0
+    discarding = False
+
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline == -1:
+                break
+            line = bytes(buffer[:newline]).strip()
+            del buffer[:newline + 1]
+            line_number += 1
+            if discarding:
+                discarding = False
+                continue
+            if len(line) > max_line_bytes:
+                yield line_number, LineTooLong(f"line exceeds {max_line_bytes} bytes")
+            elif line:
+                yield line_number, line
+
+        if len(buffer) > max_line_bytes and not discarding:
+            # Report the oversized line now and drop the rest of it as it arrives
+            yield line_number + 1, LineTooLong(f"line exceeds {max_line_bytes} bytes")
+            discarding = True
+        if discarding:
+            buffer.clear()
+
+    line = bytes(buffer).strip()
+    if line and not discarding:
+        yield line_number + 1, line
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic error into a single readable message"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'body'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+async def ingest_ndjson(
+    chunks: AsyncIterator[bytes],
+    flush: Callable[[List[TickerDataCreate]], Awaitable[int]],
+    batch_size: int = STREAM_BATCH_SIZE,
+    max_errors: int = STREAM_MAX_ERRORS
+) -> Dict:
+    """
+    Validate NDJSON rows one line at a time and write them in batches.
+
+    Each line is validated with the TickerDataCreate rules. Valid rows are
+    handed to `flush` every `batch_size` rows; invalid lines are counted and
+    the first `max_errors` of them are reported back.
+
+    Returns:
+        Dict with the number of rows written and the line errors
+    """
+    batch: List[TickerDataCreate] = []
+    count = 0
+    error_count = 0
+    errors: List[Dict] = []
+
+    def record_error(line_number: int, message: str) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < max_errors:
+            errors.append({"line": line_number, "error": message})
+
+    async for line_number, line in iter_ndjson_lines(chunks):
+        if isinstance(line, LineTooLong):
+            record_error(line_number, str(line))
+            continue
+        try:
+            batch.append(TickerDataCreate.model_validate_json(line))
+        except ValidationError as e:
+            record_error(line_number, format_validation_error(e))
+            continue
+
+        if len(batch) >= batch_size:
+            count += await flush(batch)
+            batch = []
+
+    if batch:
+        count += await flush(batch)
+
+    return {
+        "count": count,
+        "error_count": error_count,
+        "errors": errors
+    }
@@ -1,17 +1,63 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from typing import List
+from typing import Dict, List, Literal, Optional
+from datetime import datetime
 import logging
 
-from app.database import db, connect_db, disconnect_db
+from prisma.errors import UniqueViolationError
+
+from app.database import db, connect_db, disconnect_db, pool_stats
+from app.config import DATA_PAGE_SIZE, DATA_PAGE_MAX, DEFAULT_SYMBOL, STRATEGY_MAX_WINDOW, SWEEP_MAX_PAIRS
+from app.crud import (
+    ticker_record,
+    decode_cursor,
+    find_ticker_page,
+    iter_ticker_batches,
+    insert_ticker_data,
+    record_delete,
+    record_versions,
+    upsert_ticker_data
+)
+from app.ingest import NDJSON_MEDIA_TYPE, ingest_ndjson
+from app.resample import INTERVALS, iter_resampled
+from app.rollup import lock_symbols, refresh_rollups
+from app.responses import (
+    FastJSONResponse,
+    dumps,
+    encoded_response,
+    json_response,
+    ndjson_lines,
+    streaming_response,
+    ticker_rows
+)
+from app.compression import EncodedBody, compression_stats
+from app.conditional import is_not_modified, not_modified, validators
+from app.export import (
+    ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    arrow_stream,
+    parquet_stream,
+    export_available
+)
 from app.models import (
+    SYMBOL_PATTERN,
     TickerDataCreate, 
     TickerDataResponse, 
+    TickerDataPage,
+    ResampledBar,
     BulkDataCreate,
-    StrategyPerformance
+    StrategyPerformance,
+    StrategySweepRequest,
+    StrategySweepResponse
 )
-from app.strategy import MovingAverageCrossoverStrategy
+from app.strategy import MovingAverageCrossoverStrategy, sweep_performance
+from app.cache import data_versions, performance_cache, strategy_flights
+from app.backtest import count_bars, evaluate_strategy, load_closes
+from app.store import find_series_page, iter_series_batches, series_store
+from app.freshness import refresh_version
+from app.executor import ExecutorBusy, backtest_executor
+from app.writebehind import WriteQueueFull, write_queue
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,11 +70,23 @@ async def lifespan(app: FastAPI):
     logger.info("Connecting to database...")
     await connect_db()
     logger.info("Database connected successfully")
+    try:
+        loaded = await series_store.load_all(db)
+        logger.info(f"Series store loaded {loaded} symbols ({series_store.nbytes} bytes)")
+    except Exception as e:
+        # Reads fall back to the database and load symbols on demand
+        logger.error(f"Error loading series store: {str(e)}")
+    write_queue.start(_flush_writes)
     yield
     # Shutdown
+    await write_queue.close()
+    written = series_store.save_snapshots()
+    if written:
+        logger.info(f"Saved {written} series snapshots")
     logger.info("Disconnecting from database...")
     await disconnect_db()
     logger.info("Database disconnected")
+    backtest_executor.shutdown()
 
 app = FastAPI(
     title="Trading API",
@@ -43,26 +101,191 @@ async def root():
     return {
         "message": "Trading API",
         "endpoints": {
-            "GET /data": "Fetch all ticker records",
+            "GET /data": "Fetch ticker records a page at a time",
+            "GET /data/resample": "Stream OHLCV bars aggregated to a larger interval",
             "POST /data": "Add new ticker record",
+            "GET /data/writes/{ticket}": "Status of a record added with write=async",
             "POST /data/bulk": "Add multiple ticker records",
-            "GET /strategy/performance": "Get trading strategy performance"
+            "POST /data/stream": "Stream ticker records as NDJSON",
+            "GET /strategy/performance": "Get trading strategy performance",
+            "POST /strategy/sweep": "Rank strategy performance over window ranges",
+            "GET /metrics": "Cache statistics"
         }
     }
 
-@app.get("/data", response_model=List[TickerDataResponse])
-async def get_all_data():
+# How ingest treats bars already stored for the same (symbol, datetime)
+OnConflict = Literal['update', 'ignore']
+
+# Whether POST /data writes before answering or queues the bar
+WriteMode = Literal['sync', 'async']
+
+def _record_upserts(written: Dict[str, Dict]):
+    """Bump the data version of every symbol an upsert changed"""
+    for symbol, counts in written.items():
+        if counts['updated']:
+            # Stored bars changed: history was rewritten
+            data_versions[symbol].bump()
+            series_store.invalidate(symbol)
+        elif counts['inserted']:
+            data_versions[symbol].bump([counts['first'], counts['last']])
+        else:
+            continue
+        data_versions[symbol].committed(counts['version'])
+
+async def _flush_writes(rows: List[TickerDataCreate]) -> List[int]:
+    """
+    Write one batch of the write-behind queue.
+
+    Bars already stored are kept, as a synchronous POST /data would.
+
+    Returns:
+        Positions in `rows` of the bars not written because of that
+    """
+    written, conflicts = await insert_ticker_data(db, rows)
+    _record_upserts(written)
+    await series_store.sync(db, written)
+    return conflicts
+
+def _upsert_totals(written: Dict[str, Dict]) -> Dict[str, int]:
+    """Sum per-symbol upsert counts"""
+    return {
+        key: sum(counts[key] for counts in written.values())
+        for key in ('inserted', 'updated', 'skipped')
+    }
+
+def _ndjson_chunk(records) -> bytes:
+    """Encode ticker rows as NDJSON lines"""
+    return ndjson_lines(ticker_rows(records))
+
+async def _ndjson_stream(batches, first=None):
+    """Encode batches of ticker rows as NDJSON, one chunk per batch"""
+    if first:
+        yield _ndjson_chunk(first)
+    async for records in batches:
+        yield _ndjson_chunk(records)
+
+# Streaming encoders for GET /data, in order of preference
+STREAM_ENCODERS = {
+    ARROW_STREAM_MEDIA_TYPE: arrow_stream,
+    PARQUET_MEDIA_TYPE: parquet_stream,
+    NDJSON_MEDIA_TYPE: _ndjson_stream
+}
+
+def _stream_media_type(accept: str) -> Optional[str]:
+    """Pick the streaming format requested by an Accept header, if any"""
+    for media_type in STREAM_ENCODERS:
+        if media_type in accept:
+            return media_type
+    return None
+
+async def _log_stream_errors(chunks):
+    """Log failures that happen after the response has started"""
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        # Headers are already sent, so the client sees a truncated stream
+        logger.error(f"Error streaming data: {str(e)}")
+        raise
+
+@app.get("/data", response_model=TickerDataPage, response_class=FastJSONResponse)
+async def get_all_data(
+    request: Request,
+    symbol: str = Query(DEFAULT_SYMBOL, pattern=SYMBOL_PATTERN),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None
+):
     """
-    Fetch all ticker data from the database.
+    Fetch ticker data of one symbol, oldest first, one page at a time.
+    
+    Rows are served from the in-memory series store when it holds the
+    symbol (see app.store), and from the database otherwise. The database
+    is probed first, so rows written outside this process are picked up
+    (see app.freshness). They are encoded straight to JSON (see
+    app.responses), without re-validation.
+    Responses carry an ETag and Last-Modified from the symbol's data
+    version; a request whose If-None-Match or If-Modified-Since still
+    matches gets 304 Not Modified (see app.conditional).
     
+    With `Accept: application/x-ndjson`, `application/vnd.apache.arrow.stream`
+    or `application/x-parquet` the whole range is streamed in that format
+    instead, fetched from the database in batches of DATA_STREAM_BATCH_SIZE
+    rows, so memory use is independent of the result size. Arrow and
+    Parquet are columnar with float64 prices.
+    
+    Args:
+        symbol: Ticker symbol (default: DEFAULT_SYMBOL)
+        start: Only records at or after this time
+        end: Only records before this time
+        limit: Maximum number of records in the page (or stream)
+        cursor: `next_cursor` from the previous page
+        
     Returns:
-        List of all ticker records
+        Page of ticker records and the cursor for the next page, if any
     """
     try:
-        records = await db.tickerdata.find_many(
-            order={'datetime': 'asc'}
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    media_type = _stream_media_type(request.headers.get("accept", ""))
+    if media_type in (ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE) and not export_available():
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="Columnar export requires pyarrow"
         )
-        return records
+    
+    if not media_type and limit is not None and limit > DATA_PAGE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"limit must be at most {DATA_PAGE_MAX}"
+        )
+    
+    # Taken before reading: a concurrent write then changes the ETag again
+    await refresh_version(db, symbol)
+    headers = validators(symbol, str(request.url.query), media_type)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    
+    if media_type:
+        try:
+            series = await series_store.get(db, symbol)
+            if series is not None:
+                batches = iter_series_batches(series, start, end, after, limit)
+            else:
+                batches = iter_ticker_batches(db, start, end, after, limit, symbol=symbol)
+            # Fetch the first batch up front so a failing query is still a 500
+            first = await anext(batches, [])
+        except Exception as e:
+            logger.error(f"Error fetching data: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error fetching data: {str(e)}"
+            )
+        encode = STREAM_ENCODERS[media_type]
+        return streaming_response(
+            request,
+            _log_stream_errors(encode(batches, first)),
+            media_type,
+            headers,
+            # Parquet pages are already compressed
+            compressible=media_type != PARQUET_MEDIA_TYPE
+        )
+    
+    try:
+        series = await series_store.get(db, symbol)
+        if series is not None:
+            records, next_cursor = find_series_page(series, start, end, after, limit or DATA_PAGE_SIZE)
+        else:
+            records, next_cursor = await find_ticker_page(
+                db, start, end, after, limit or DATA_PAGE_SIZE, symbol=symbol
+            )
+        return json_response(request, {
+            "data": ticker_rows(records),
+            "next_cursor": next_cursor
+        }, headers)
     except Exception as e:
         logger.error(f"Error fetching data: {str(e)}")
         raise HTTPException(
@@ -70,29 +293,154 @@ async def get_all_data():
             detail=f"Error fetching data: {str(e)}"
         )
 
+def _bar_json(bar) -> str:
+    return ResampledBar.model_validate(bar).model_dump_json()
+
+async def _resampled_ndjson(batches, first=None):
+    """Encode batches of resampled bars as NDJSON, one chunk per batch"""
+    async for bars in _prepend(first, batches):
+        yield "".join(_bar_json(bar) + "\n" for bar in bars).encode()
+
+async def _resampled_json(batches, first, symbol: str, interval: str):
+    """Encode batches of resampled bars as one JSON document"""
+    yield f'{{"symbol":"{symbol}","interval":"{interval}","data":['.encode()
+    separator = ""
+    async for bars in _prepend(first, batches):
+        yield (separator + ",".join(_bar_json(bar) for bar in bars)).encode()
+        separator = ","
+    yield b"]}"
+
+async def _prepend(first, batches):
+    """Yield `first` if non-empty, then every batch"""
+    if first:
+        yield first
+    async for batch in batches:
+        yield batch
+
+@app.get("/data/resample")
+async def resample_data(
+    request: Request,
+    interval: str,
+    symbol: str = Query(DEFAULT_SYMBOL, pattern=SYMBOL_PATTERN),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """
+    Stream OHLCV bars of one symbol aggregated to a larger interval.
+    
+    Aggregation runs in the database: first open, highest high, lowest
+    low, last close and total volume per bucket, with buckets aligned to
+    the Unix epoch in UTC. Intervals built from a ROLLUP_INTERVALS rollup
+    read the precomputed bars instead of the raw records, unless `start`
+    or `end` splits a rollup bucket. Bars are fetched
+    RESAMPLE_BATCH_BUCKETS at a time and streamed as they arrive, as one
+    JSON document or, with `Accept: application/x-ndjson`, one bar per
+    line. Conditional requests are answered like those of GET /data.
+    
+    Args:
+        interval: Bar size, one of 1m, 5m, 15m, 30m, 1h, 4h, 1d
+        symbol: Ticker symbol (default: DEFAULT_SYMBOL)
+        start: Only records at or after this time
+        end: Only records before this time
+        
+    Returns:
+        `{"symbol", "interval", "data": [bars]}`; each bar also reports how
+        many source records it aggregates in `bars`
+    """
+    if interval not in INTERVALS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"interval must be one of {', '.join(INTERVALS)}"
+        )
+    
+    ndjson = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    await refresh_version(db, symbol)
+    headers = validators(symbol, str(request.url.query), ndjson)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    
+    batches = iter_resampled(db, symbol, interval, start, end)
+    try:
+        # Fetch the first batch up front so a failing query is still a 500
+        first = await anext(batches, [])
+    except Exception as e:
+        logger.error(f"Error resampling data: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error resampling data: {str(e)}"
+        )
+    
+    if ndjson:
+        return streaming_response(
+            request,
+            _log_stream_errors(_resampled_ndjson(batches, first)),
+            NDJSON_MEDIA_TYPE,
+            headers
+        )
+    return streaming_response(
+        request,
+        _log_stream_errors(_resampled_json(batches, first, symbol, interval)),
+        "application/json",
+        headers
+    )
+
 @app.post("/data", response_model=TickerDataResponse, status_code=status.HTTP_201_CREATED)
-async def create_data(data: TickerDataCreate):
+async def create_data(data: TickerDataCreate, write: WriteMode = 'sync'):
     """
     Add a new ticker record to the database.
     
+    The rollup buckets containing the record are updated in the same
+    transaction.
+    
+    With write=async the record is only queued and the response is 202
+    with a ticket for it. A background task inserts queued records in
+    batches of up to WRITE_BATCH_SIZE, or every WRITE_FLUSH_MS, keeping
+    bars already stored; GET /data/writes/{ticket} reports when the
+    record is durable, or a conflict where a sync write would get 409.
+    When WRITE_QUEUE_SIZE records are already queued the request fails
+    with 503.
+    
     Args:
         data: Ticker data to be added
+        write: `sync` (default) or `async`
         
     Returns:
-        Created ticker record
+        Created ticker record, or 409 if the symbol already has a bar at
+        that datetime; with write=async, the ticket and where to check on
+        it
     """
-    try:
-        record = await db.tickerdata.create(
-            data={
-                'datetime': data.datetime,
-                'open': data.open,
-                'high': data.high,
-                'low': data.low,
-                'close': data.close,
-                'volume': data.volume
-            }
+    if write == 'async':
+        try:
+            ticket = write_queue.submit(data)
+        except WriteQueueFull as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Write queue is full: {str(e)}",
+                headers={"Retry-After": "1"}
+            )
+        location = f"/data/writes/{ticket}"
+        return JSONResponse(
+            {"ticket": ticket, "status": "pending", "status_url": location},
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": location}
         )
+    
+    try:
+        async with db.tx() as transaction:
+            await lock_symbols(transaction, [data.symbol])
+            record = await transaction.tickerdata.create(data=ticker_record(data))
+            written = {data.symbol: {'updated': 0, 'first': data.datetime, 'last': data.datetime}}
+            await refresh_rollups(transaction, written)
+            versions = await record_versions(transaction, written)
+        data_versions[data.symbol].bump([data.datetime])
+        data_versions[data.symbol].committed(versions[data.symbol])
+        await series_store.sync(db, [data.symbol])
         return record
+    except UniqueViolationError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{data.symbol} already has a bar at {data.datetime.isoformat()}"
+        )
     except Exception as e:
         logger.error(f"Error creating data: {str(e)}")
         raise HTTPException(
@@ -100,35 +448,68 @@ async def create_data(data: TickerDataCreate):
             detail=f"Error creating data: {str(e)}"
         )
 
+@app.get("/data/writes/{ticket}")
+async def get_write_status(ticket: str, wait: float = Query(0, ge=0, le=30)):
+    """
+    Report whether a record added with write=async has been written.
+    
+    Records are written in the order they were queued, so a durable
+    record also means every earlier one was written, conflicted or failed.
+    Tickets are only known to the worker process that issued them, until
+    it restarts.
+    
+    Args:
+        ticket: Ticket returned by POST /data?write=async
+        wait: Seconds to wait for the record to be written, at most 30
+        
+    Returns:
+        `{"ticket", "status"}` with status `pending`, `durable`,
+        `conflict` or `failed` (the last two with `error`), or 404 for a
+        ticket from another process or an earlier start
+    """
+    result = await write_queue.wait(ticket, wait) if wait else write_queue.status(ticket)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown write ticket {ticket}"
+        )
+    return result
+
 @app.post("/data/bulk", status_code=status.HTTP_201_CREATED)
-async def create_bulk_data(bulk_data: BulkDataCreate):
+async def create_bulk_data(bulk_data: BulkDataCreate, on_conflict: OnConflict = 'update'):
     """
-    Add multiple ticker records to the database.
+    Add multiple ticker records to the database, idempotently.
+    
+    Bars are unique per (symbol, datetime). A bar that is already stored
+    is overwritten if it differs (on_conflict=update) or kept
+    (on_conflict=ignore); identical bars are skipped, so retrying a
+    request writes nothing.
+    
+    Rows are written in chunks of BULK_CHUNK_SIZE with one multi-row
+    upsert per chunk, all inside a single transaction. Payloads of at least
+    COPY_THRESHOLD rows are COPYed into a staging table and upserted from
+    there when asyncpg is installed. Rows may mix symbols; they are written
+    grouped by symbol.
     
     Args:
         bulk_data: List of ticker data to be added
+        on_conflict: `update` (default) or `ignore` bars already stored
         
     Returns:
-        Success message with count
+        Success message with the number of rows written, and how many were
+        inserted, updated and skipped
     """
     try:
-        created_records = []
-        for data in bulk_data.data:
-            record = await db.tickerdata.create(
-                data={
-                    'datetime': data.datetime,
-                    'open': data.open,
-                    'high': data.high,
-                    'low': data.low,
-                    'close': data.close,
-                    'volume': data.volume
-                }
-            )
-            created_records.append(record)
+        written = await upsert_ticker_data(db, bulk_data.data, on_conflict)
+        _record_upserts(written)
+        await series_store.sync(db, written)
+        totals = _upsert_totals(written)
+        count = totals['inserted'] + totals['updated']
         
         return {
-            "message": f"Successfully created {len(created_records)} records",
-            "count": len(created_records)
+            "message": f"Successfully stored {count} records",
+            "count": count,
+            **totals
         }
     except Exception as e:
         logger.error(f"Error creating bulk data: {str(e)}")
@@ -137,55 +518,132 @@ async def create_bulk_data(bulk_data: BulkDataCreate):
             detail=f"Error creating bulk data: {str(e)}"
         )
 
-@app.get("/strategy/performance", response_model=StrategyPerformance)
-async def get_strategy_performance(short_window: int = 10, long_window: int = 20):
+@app.post("/data/stream", status_code=status.HTTP_201_CREATED)
+async def create_stream_data(request: Request, on_conflict: OnConflict = 'update'):
     """
-    Calculate and return Moving Average Crossover Strategy performance.
+    Ingest ticker records streamed as newline-delimited JSON.
+    
+    The body is read incrementally; each line is validated on its own and
+    valid rows are upserted in batches of STREAM_BATCH_SIZE, so memory use
+    does not grow with the payload. Each batch commits independently, and
+    re-sending a stream skips the bars already stored.
     
     Args:
-        short_window: Period for short moving average (default: 10)
-        long_window: Period for long moving average (default: 20)
+        on_conflict: `update` (default) or `ignore` bars already stored
         
     Returns:
-        Strategy performance metrics and signals
+        Success message with the number of rows written, how many were
+        inserted, updated and skipped, and per-line validation errors
     """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith(NDJSON_MEDIA_TYPE):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be {NDJSON_MEDIA_TYPE}"
+        )
+    
+    totals = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    
+    async def flush(batch):
+        written = await upsert_ticker_data(db, batch, on_conflict)
+        # Each batch commits on its own, so record it right away
+        _record_upserts(written)
+        await series_store.sync(db, written)
+        for key, value in _upsert_totals(written).items():
+            totals[key] += value
+        return sum(counts['inserted'] + counts['updated'] for counts in written.values())
+    
     try:
-        # Fetch all data
-        records = await db.tickerdata.find_many(
-            order={'datetime': 'asc'}
+        result = await ingest_ndjson(request.stream(), flush)
+        
+        return {
+            "message": f"Successfully stored {result['count']} records",
+            **result,
+            **totals
+        }
+    except Exception as e:
+        logger.error(f"Error streaming data: {str(e)}")
+        written = totals['inserted'] + totals['updated']
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error streaming data after {written} records: {str(e)}"
         )
+
+
+@app.get("/strategy/performance", response_model=StrategyPerformance, response_class=FastJSONResponse)
+async def get_strategy_performance(
+    request: Request,
+    symbol: str = Query(DEFAULT_SYMBOL, pattern=SYMBOL_PATTERN),
+    short_window: int = Query(10, ge=1, le=STRATEGY_MAX_WINDOW),
+    long_window: int = Query(20, ge=1, le=STRATEGY_MAX_WINDOW)
+):
+    """
+    Calculate and return Moving Average Crossover Strategy performance.
+    
+    Results are cached per (symbol, short_window, long_window, data
+    version), so repeated calls return instantly until the next write to
+    that symbol's data. The ETag is derived from the same version, so a
+    poller's If-None-Match is answered with 304 without any work.
+    Identical requests arriving while a result is being computed wait for
+    that computation instead of starting their own.
+    After appends, only the new bars are processed (see evaluate_strategy).
+    Long series are evaluated in the backtest process pool; when its queue
+    is full the request fails with 503.
+    
+    Args:
+        symbol: Ticker symbol (default: DEFAULT_SYMBOL)
+        short_window: Period for short moving average (default: 10, at most STRATEGY_MAX_WINDOW)
+        long_window: Period for long moving average (default: 20, at most STRATEGY_MAX_WINDOW)
         
-        if len(records) < long_window:
+    Returns:
+        Strategy performance metrics and signals
+    """
+    await refresh_version(db, symbol)
+    headers = validators(symbol, short_window, long_window)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    
+    cache_key = (symbol, short_window, long_window, data_versions[symbol].value)
+    cached = performance_cache.get(cache_key)
+    if cached is not None:
+        return encoded_response(request, cached, headers)
+    
+    async def evaluate() -> EncodedBody:
+        # Checked first: the strategy's buffers are sized by the windows
+        if await count_bars(db, symbol) < long_window:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient data. Need at least {long_window} records."
             )
         
-        # Convert to list of dicts
-        data = [
-            {
-                'datetime': record.datetime,
-                'close': float(record.close)
-            }
-            for record in records
-        ]
-        
-        # Initialize strategy
-        strategy = MovingAverageCrossoverStrategy(short_window, long_window)
-        
-        # Generate signals
-        signals = strategy.generate_signals(data)
+        state = await evaluate_strategy(db, symbol, short_window, long_window)
+        signals = state.signals
         
         # Calculate performance
+        strategy = MovingAverageCrossoverStrategy(short_window, long_window)
         performance = strategy.calculate_performance(signals)
         
-        return {
+        result = {
             **performance,
             'signals': signals
         }
+        # Cached encoded, so hits neither re-serialize nor recompress
+        body = EncodedBody(dumps(result))
+        performance_cache.put(cache_key, body)
+        return body
+    
+    try:
+        body = await strategy_flights.run(cache_key, evaluate)
+        return encoded_response(request, body, headers)
         
     except HTTPException:
         raise
+    except ExecutorBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Backtest queue is full: {str(e)}",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Error calculating strategy performance: {str(e)}")
         raise HTTPException(
@@ -193,16 +651,137 @@ async def get_strategy_performance(short_window: int = 10, long_window: int = 20
             detail=f"Error calculating strategy: {str(e)}"
         )
 
+@app.post("/strategy/sweep", response_model=StrategySweepResponse, response_class=FastJSONResponse)
+async def sweep_strategy(request: Request, sweep: StrategySweepRequest):
+    """
+    Evaluate the strategy for every window pair in the requested ranges.
+    
+    The close series is loaded once and the moving averages for all pairs
+    are derived from shared prefix sums, so a sweep costs little more than
+    a single /strategy/performance call. Pairs with short_window >=
+    long_window are skipped. Results are cached, and concurrent
+    identical sweeps coalesced, like single evaluations.
+    
+    Args:
+        sweep: Symbol, short and long window ranges (inclusive), the metric
+            to rank by and optionally how many of the best pairs to return
+        
+    Returns:
+        Metrics per window pair, best first
+    """
+    # Counted before the ranges are expanded, so oversized sweeps cost nothing
+    count = sweep.pair_count()
+    if not count:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="No window pairs with short_window < long_window"
+        )
+    if count > SWEEP_MAX_PAIRS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Sweep covers {count} window pairs, at most {SWEEP_MAX_PAIRS} allowed"
+        )
+    pairs = sweep.pairs()
+    
+    version = (await refresh_version(db, sweep.symbol)).value
+    cache_key = ('sweep', sweep.symbol, tuple(pairs), sweep.rank_by, sweep.top, version)
+    cached = performance_cache.get(cache_key)
+    if cached is not None:
+        return encoded_response(request, cached)
+    
+    async def evaluate() -> EncodedBody:
+        closes = await load_closes(db, sweep.symbol)
+        
+        shortest = min(long for _, long in pairs)
+        if len(closes) < shortest:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient data. Need at least {shortest} records."
+            )
+        
+        results = await backtest_executor.run(sweep_performance, closes, pairs, cost=len(closes) * len(pairs))
+        results.sort(key=lambda r: (-r[sweep.rank_by], r['short_window'], r['long_window']))
+        
+        result = {
+            'bars': len(closes),
+            'pairs': len(pairs),
+            'results': results[:sweep.top]
+        }
+        body = EncodedBody(dumps(result))
+        performance_cache.put(cache_key, body)
+        return body
+    
+    try:
+        body = await strategy_flights.run(cache_key, evaluate)
+        return encoded_response(request, body)
+        
+    except HTTPException:
+        raise
+    except ExecutorBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Backtest queue is full: {str(e)}",
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error(f"Error running strategy sweep: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error running strategy sweep: {str(e)}"
+        )
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Report cache statistics.
+    
+    Returns:
+        Hit/miss counters and sizes per cache, coalesced strategy
+        requests, backtest executor counters,
+        series store size and counters, write-behind queue depth and
+        counters, database pool settings and connections, response
+        compression bytes, ratio and CPU time, and the number of symbols
+        and writes tracked by data versions
+    """
+    return {
+        "data_versions": data_versions.stats(),
+        "strategy_cache": performance_cache.stats(),
+        "strategy_flights": strategy_flights.stats(),
+        "backtest_executor": backtest_executor.stats(),
+        "series_store": series_store.stats(),
+        "write_queue": write_queue.stats(),
+        "database_pool": await pool_stats(db),
+        "compression": compression_stats.stats()
+    }
+
 @app.delete("/data", status_code=status.HTTP_200_OK)
-async def delete_all_data():
+async def delete_all_data(symbol: Optional[str] = Query(None, pattern=SYMBOL_PATTERN)):
     """
-    Delete all ticker data (useful for testing).
+    Delete all ticker data, or all of one symbol (useful for testing).
     
+    Args:
+        symbol: Only delete this symbol's records
+        
     Returns:
         Success message with count
     """
     try:
-        result = await db.tickerdata.delete_many()
+        if symbol is None:
+            async with db.tx() as transaction:
+                result = await transaction.tickerdata.delete_many()
+                await transaction.tickerrollup.delete_many()
+                await record_delete(transaction)
+            data_versions.bump_all()
+            series_store.drop()
+        else:
+            async with db.tx() as transaction:
+                await lock_symbols(transaction, [symbol])
+                result = await transaction.tickerdata.delete_many(where={'symbol': symbol})
+                await transaction.tickerrollup.delete_many(where={'symbol': symbol})
+                source = await record_delete(transaction, symbol)
+            data_versions[symbol].bump()
+            data_versions[symbol].committed(source)
+            series_store.drop(symbol)
         return {
             "message": f"Successfully deleted {result} records",
             "count": result
@@ -1,9 +1,15 @@
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from decimal import Decimal
-from typing import List
+from typing import List, Literal, Optional, Tuple
+
+from app.config import DEFAULT_SYMBOL, STRATEGY_MAX_WINDOW
+
+# Ticker symbols: letters, digits, '.', '_' and '-', as stored in VarChar(16)
+SYMBOL_PATTERN = r'^[A-Za-z0-9._-]{1,16}$'
 
 class TickerDataCreate(BaseModel):
+    symbol: str = Field(default=DEFAULT_SYMBOL, pattern=SYMBOL_PATTERN)
     datetime: datetime
     open: Decimal = Field(gt=0, decimal_places=2)
     high: Decimal = Field(gt=0, decimal_places=2)
@@ -28,6 +34,7 @@ class TickerDataCreate(BaseModel):
     class Config:
         json_schema_extra = {
             "example": {
+                "symbol": "AAPL",
                 "datetime": "2024-01-01T09:30:00",
                 "open": 150.25,
                 "high": 152.50,
@@ -39,6 +46,7 @@ class TickerDataCreate(BaseModel):
 
 class TickerDataResponse(BaseModel):
     id: int
+    symbol: str
     datetime: datetime
     open: Decimal
     high: Decimal
@@ -49,13 +57,106 @@ class TickerDataResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class TickerDataPage(BaseModel):
+    data: List[TickerDataResponse]
+    next_cursor: Optional[str] = None
+
+class ResampledBar(BaseModel):
+    datetime: datetime
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    volume: int
+    bars: int
+
 class BulkDataCreate(BaseModel):
     data: List[TickerDataCreate]
 
-class StrategyPerformance(BaseModel):
+class StrategyMetrics(BaseModel):
     total_trades: int
     winning_trades: int
     losing_trades: int
     win_rate: float
     total_return: float
-    signals: List[dict]
\ No newline at end of file
+
+class StrategyPerformance(StrategyMetrics):
+    signals: List[dict]
+
+def _floor_sum(n: int, m: int, a: int, b: int) -> int:
+    """sum(floor((a * i + b) / m) for i in range(n)) in O(log) steps, for a, b >= 0"""
+    total = 0
+    while n:
+        total += (a // m) * n * (n - 1) // 2 + (b // m) * n
+        a, b = a % m, b % m
+        last = a * n + b
+        if last < m:
+            break
+        n, b, m, a = last // m, last % m, a, m
+    return total
+
+class WindowRange(BaseModel):
+    start: int = Field(ge=1, le=STRATEGY_MAX_WINDOW)
+    stop: int = Field(ge=1, le=STRATEGY_MAX_WINDOW)  # inclusive
+    step: int = Field(default=1, ge=1)
+
+    @field_validator('stop')
+    @classmethod
+    def stop_not_before_start(cls, v, info):
+        if 'start' in info.data and v < info.data['start']:
+            raise ValueError('stop must be >= start')
+        return v
+
+    def windows(self) -> List[int]:
+        return list(range(self.start, self.stop + 1, self.step))
+
+    def __len__(self) -> int:
+        return (self.stop - self.start) // self.step + 1
+
+class StrategySweepRequest(BaseModel):
+    symbol: str = Field(default=DEFAULT_SYMBOL, pattern=SYMBOL_PATTERN)
+    short_window: WindowRange
+    long_window: WindowRange
+    rank_by: Literal['total_return', 'win_rate', 'winning_trades', 'total_trades'] = 'total_return'
+    top: Optional[int] = Field(default=None, ge=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "symbol": "AAPL",
+                "short_window": {"start": 5, "stop": 20, "step": 5},
+                "long_window": {"start": 20, "stop": 100, "step": 10},
+                "rank_by": "total_return",
+                "top": 10
+            }
+        }
+
+    def pair_count(self) -> int:
+        """Number of pairs with short < long, computed without expanding the ranges"""
+        shorts, longs = self.short_window, self.long_window
+        a, p, n = shorts.start, shorts.step, len(shorts)
+        b, q, m = longs.start, longs.step, len(longs)
+        # Longs from index `lo` on exceed the first short, from `hi` on every short
+        lo = min(max(0, (a - b) // q + 1), m)
+        hi = min(max(0, (a + (n - 1) * p - b) // q + 1), m)
+        # In between, long b + q*j is above floor((b + q*j - a - 1) / p) + 1 shorts
+        below = _floor_sum(hi - lo, p, q, b + q * lo - a - 1) + (hi - lo) if hi > lo else 0
+        return below + n * (m - hi)
+
+    def pairs(self) -> List[Tuple[int, int]]:
+        """The (short, long) pairs with short < long, short window first"""
+        longs = self.long_window
+        pairs = []
+        for short in self.short_window.windows():
+            first = longs.start + max(0, (short - longs.start) // longs.step + 1) * longs.step
+            pairs.extend((short, long) for long in range(first, longs.stop + 1, longs.step))
+        return pairs
+
+class SweepResult(StrategyMetrics):
+    short_window: int
+    long_window: int
+
+class StrategySweepResponse(BaseModel):
+    bars: int
+    pairs: int
+    results: List[SweepResult]
\ No newline at end of file
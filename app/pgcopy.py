@@ -0,0 +1,199 @@
+import os
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.config import COPY_THRESHOLD
+
+try:
+    import asyncpg
+except ImportError:  # COPY fast path is optional
+    asyncpg = None
+
+TABLE_NAME = "ticker_data"
+COPY_COLUMNS = ('datetime', 'open', 'high', 'low', 'close', 'volume', 'symbol')
+KEY_COLUMNS = ('symbol', 'datetime')  # @@unique in schema.prisma
+VALUE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+ON_CONFLICT_MODES = ('update', 'ignore')
+
+# Session-local table COPY loads into before upserting
+STAGE_TABLE = "ticker_data_stage"
+STAGE_TABLE_SQL = f"""
+CREATE TEMP TABLE {STAGE_TABLE} (
+    "datetime" timestamp(3), "open" numeric(10, 2), "high" numeric(10, 2),
+    "low" numeric(10, 2), "close" numeric(10, 2), "volume" integer, "symbol" varchar(16)
+) ON COMMIT DROP
+"""
+
+# Connection-string options understood by Prisma but not by asyncpg
+PRISMA_ONLY_PARAMS = {
+    'schema', 'connection_limit', 'pool_timeout', 'pgbouncer',
+    'socket_timeout', 'connect_timeout', 'statement_cache_size'
+}
+
+
+def copy_available() -> bool:
+    """Whether the COPY fast path can be used"""
+    return asyncpg is not None and COPY_THRESHOLD > 0
+
+
+def use_copy(row_count: int) -> bool:
+    """Whether a load of `row_count` rows should go through COPY"""
+    return copy_available() and row_count >= COPY_THRESHOLD
+
+
+def asyncpg_dsn(url: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    Translate the Prisma DATABASE_URL into an asyncpg DSN.
+
+    Returns:
+        (dsn, schema) where schema is the Prisma `schema` option, if any
+    """
+    url = url or os.environ["DATABASE_URL"]
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    schema = dict(params).get('schema')
+    query = urlencode([(k, v) for k, v in params if k not in PRISMA_ONLY_PARAMS])
+    return urlunsplit(parts._replace(query=query)), schema
+
+
+def utc_naive(dt: datetime) -> datetime:
+    """Prisma stores DateTime as UTC `timestamp(3)` without a zone"""
+    if dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def upsert_sql(source: str, on_conflict: str = 'update', keys: bool = False) -> str:
+    """
+    INSERT rows from `source` into ticker_data, resolving key conflicts.
+
+    `source` is a VALUES list or SELECT yielding COPY_COLUMNS in order.
+    With 'update', conflicting rows are overwritten only when a value
+    differs; with 'ignore' they are left alone. Either way, rows identical
+    to stored ones are not written at all.
+
+    The statement returns one row per symbol with the `inserted` and
+    `updated` counts and the `first` and `last` datetime written; with
+    `keys`, also `inserted_at`, the datetimes of the inserted rows.
+    """
+    if on_conflict not in ON_CONFLICT_MODES:
+        raise ValueError(f"on_conflict must be one of {ON_CONFLICT_MODES}")
+
+    columns = ", ".join(f'"{c}"' for c in COPY_COLUMNS)
+    key = ", ".join(f'"{c}"' for c in KEY_COLUMNS)
+    if on_conflict == 'ignore':
+        action = "DO NOTHING"
+    else:
+        assignments = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in VALUE_COLUMNS)
+        current = ", ".join(f't."{c}"' for c in VALUE_COLUMNS)
+        incoming = ", ".join(f'EXCLUDED."{c}"' for c in VALUE_COLUMNS)
+        action = f"DO UPDATE SET {assignments} WHERE ({current}) IS DISTINCT FROM ({incoming})"
+
+    inserted_at = ',\n       array_agg("datetime") FILTER (WHERE inserted) AS inserted_at' if keys else ''
+    # xmax is 0 only for freshly inserted row versions
+    return f"""
+WITH written AS (
+    INSERT INTO "{TABLE_NAME}" AS t ({columns})
+    {source}
+    ON CONFLICT ({key}) {action}
+    RETURNING t."symbol", t."datetime", (t.xmax = 0) AS inserted
+)
+SELECT "symbol",
+       (count(*) FILTER (WHERE inserted))::int AS inserted,
+       (count(*) FILTER (WHERE NOT inserted))::int AS updated,
+       min("datetime") AS first,
+       max("datetime") AS last{inserted_at}
+FROM written
+GROUP BY "symbol"
+"""
+
+
+def copy_row(record: Dict) -> tuple:
+    """Convert a Prisma create payload into a COPY tuple"""
+    return (
+        utc_naive(record['datetime']),
+        record['open'],
+        record['high'],
+        record['low'],
+        record['close'],
+        record['volume'],
+        record['symbol']
+    )
+
+
+async def copy_ticker_records(records: List[Dict], url: Optional[str] = None) -> int:
+    """
+    Load ticker records with binary COPY FROM STDIN over asyncpg.
+
+    This bypasses the Prisma query engine entirely. The whole load runs in a
+    single transaction on a dedicated connection.
+
+    Returns:
+        Number of rows copied
+    """
+    if asyncpg is None:
+        raise RuntimeError("asyncpg is not installed; COPY fast path unavailable")
+    if not records:
+        return 0
+
+    dsn, schema = asyncpg_dsn(url)
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                TABLE_NAME,
+                records=(copy_row(record) for record in records),
+                columns=COPY_COLUMNS,
+                schema_name=schema
+            )
+    finally:
+        await conn.close()
+    return len(records)
+
+
+async def copy_upsert_records(
+    records: List[Dict],
+    on_conflict: str = 'update',
+    url: Optional[str] = None,
+    after: Optional[Callable[..., Awaitable]] = None,
+    before: Optional[Callable[..., Awaitable]] = None
+) -> List[Dict]:
+    """
+    Upsert ticker records: binary COPY into a temporary table, then one
+    INSERT ... SELECT ... ON CONFLICT into ticker_data (see `upsert_sql`).
+
+    Records must not repeat a (symbol, datetime) key. `before(conn)` and
+    `after(conn, rows)`, if given, run on the asyncpg connection inside
+    the same transaction before anything is written and once the upsert
+    is done.
+
+    Returns:
+        The per-symbol rows of `upsert_sql`
+    """
+    if asyncpg is None:
+        raise RuntimeError("asyncpg is not installed; COPY fast path unavailable")
+    if not records:
+        return []
+
+    dsn, schema = asyncpg_dsn(url)
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction():
+            if schema:
+                await conn.execute(f'SET LOCAL search_path TO "{schema}"')
+            if before is not None:
+                await before(conn)
+            await conn.execute(STAGE_TABLE_SQL)
+            await conn.copy_records_to_table(
+                STAGE_TABLE,
+                records=(copy_row(record) for record in records),
+                columns=COPY_COLUMNS
+            )
+            columns = ", ".join(f'"{c}"' for c in COPY_COLUMNS)
+            rows = await conn.fetch(upsert_sql(f"SELECT {columns} FROM {STAGE_TABLE}", on_conflict))
+            if after is not None:
+                await after(conn, rows)
+    finally:
+        await conn.close()
+    return [dict(row) for row in rows]
@@ -0,0 +1,62 @@
+from decimal import Decimal
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Prices are Decimal(10, 2) in the database: whole cents, at most 8 digits
+PRICE_PLACES = 2
+PRICE_SCALE = 10 ** PRICE_PLACES
+
+
+def to_cents(value) -> int:
+    """
+    Exact integer cents of a price.
+
+    Raises:
+        ValueError: if the price has fractions of a cent
+    """
+    scaled = Decimal(value).scaleb(PRICE_PLACES)
+    cents = int(scaled)
+    if cents != scaled:
+        raise ValueError(f"{value} is not a whole number of cents")
+    return cents
+
+
+def from_cents(cents: int) -> Decimal:
+    """The Decimal price of integer cents, with two places like the database returns it"""
+    return Decimal(int(cents)).scaleb(-PRICE_PLACES)
+
+
+def cents_array(prices: Iterable) -> np.ndarray:
+    """
+    Integer cents of many prices as an int64 array.
+
+    Goes through float64 and rounds: a Decimal(10, 2) price is within
+    half an ulp of its float, far below half a cent, so the result is
+    exact and costs one float() per price rather than Decimal arithmetic.
+    """
+    floats = np.array([float(p) for p in prices], dtype=np.float64)
+    return np.rint(floats * PRICE_SCALE).astype(np.int64)
+
+
+def decimal_lists(columns: Dict[str, List[int]]) -> Dict[str, List[Decimal]]:
+    """
+    Decimal prices of lists of cents, e.g. the OHLC columns of a page.
+
+    Neighbouring bars share most of their prices, so each distinct price
+    is converted once and the Decimal objects, which are immutable, are
+    shared.
+    """
+    distinct = set().union(*columns.values())
+    decimals = {cents: from_cents(cents) for cents in distinct}
+    return {name: [decimals[cents] for cents in values] for name, values in columns.items()}
+
+
+def cents_to_float(cents: np.ndarray) -> np.ndarray:
+    """
+    Float prices of integer cents.
+
+    The division is correctly rounded, so each value is the same float
+    that float(Decimal) gives for the price.
+    """
+    return cents / PRICE_SCALE
@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.config import RESAMPLE_BATCH_BUCKETS, ROLLUP_INTERVALS
+from app.pgcopy import TABLE_NAME, utc_naive
+
+# Supported bar sizes, in seconds
+INTERVALS = {
+    '1m': 60,
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '30m': 30 * 60,
+    '1h': 60 * 60,
+    '4h': 4 * 60 * 60,
+    '1d': 24 * 60 * 60
+}
+
+# Buckets are aligned to the Unix epoch, like date_trunc for whole units
+EPOCH = datetime(1970, 1, 1)
+
+# Precomputed bars, one row per (symbol, interval, bucket); see app/rollup.py
+ROLLUP_TABLE = "ticker_rollup"
+
+
+def bar_aggregates(time_column: str, width: str, bars: str) -> str:
+    """
+    SELECT list folding rows into one OHLCV bar per `width` bucket.
+
+    Works on ticker_data (`time_column` "datetime", `bars` count(*)) and on
+    rollups (`time_column` "bucket", `bars` sum("bars")) alike, so coarser
+    bars built from rollups equal those built from the raw records.
+    """
+    return f'''date_bin({width}, "{time_column}", TIMESTAMP '1970-01-01') AS "datetime",
+       (array_agg("open" ORDER BY "{time_column}"))[1] AS "open",
+       max("high") AS "high",
+       min("low") AS "low",
+       (array_agg("close" ORDER BY "{time_column}" DESC))[1] AS "close",
+       sum("volume")::bigint AS "volume",
+       {bars}::int AS "bars"'''
+
+
+# One output bar per bucket of the symbol's rows in [$3, $4)
+RESAMPLE_SQL = f"""
+SELECT {bar_aggregates("datetime", "make_interval(secs => $2::int)", "count(*)")}
+FROM "{TABLE_NAME}"
+WHERE "symbol" = $1 AND "datetime" >= $3::timestamp AND "datetime" < $4::timestamp
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+def rollup_resample_sql(source: int) -> str:
+    """RESAMPLE_SQL reading the `source`-second rollup instead of ticker_data"""
+    return f"""
+SELECT {bar_aggregates("bucket", "make_interval(secs => $2::int)", 'sum("bars")')}
+FROM "{ROLLUP_TABLE}"
+WHERE "symbol" = $1 AND "interval" = {source}
+  AND "bucket" >= $3::timestamp AND "bucket" < $4::timestamp
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+def parse_rollups(names: str) -> List[int]:
+    """
+    Bucket sizes, in seconds, of the rollups named in a comma-separated list.
+
+    Each rollup is built from the next finer one, so every size must be a
+    multiple of the previous.
+
+    Raises:
+        ValueError: for an unknown interval or sizes that do not nest
+    """
+    sizes = []
+    for name in filter(None, (n.strip() for n in names.split(','))):
+        if name not in INTERVALS:
+            raise ValueError(f"Unknown rollup interval {name!r}")
+        sizes.append(INTERVALS[name])
+    sizes.sort()
+    for finer, coarser in zip(sizes, sizes[1:]):
+        if coarser % finer:
+            raise ValueError(f"Rollup of {coarser}s cannot be built from {finer}s buckets")
+    return sizes
+
+
+# Materialized rollup bucket sizes, finest first
+ROLLUPS = parse_rollups(ROLLUP_INTERVALS)
+
+
+def rollup_source(
+    seconds: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    rollups: List[int] = ROLLUPS
+) -> Optional[int]:
+    """
+    The coarsest rollup that `seconds` buckets can be built from exactly.
+
+    Rollup buckets cannot be split, so `start` and `end` must fall on
+    rollup bucket boundaries. Returns None when resampling has to read
+    ticker_data.
+    """
+    for size in reversed(rollups):
+        if seconds % size:
+            continue
+        if all(bound is None or bucket_start(bound, size) == utc_naive(bound) for bound in (start, end)):
+            return size
+    return None
+
+
+def bucket_start(dt: datetime, seconds: int) -> datetime:
+    """Start of the bucket of `seconds` containing `dt`, as naive UTC"""
+    offset = (utc_naive(dt) - EPOCH) // timedelta(seconds=seconds)
+    return EPOCH + offset * timedelta(seconds=seconds)
+
+
+async def iter_resampled(
+    client,
+    symbol: str,
+    interval: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_buckets: int = RESAMPLE_BATCH_BUCKETS,
+    rollups: List[int] = ROLLUPS
+) -> AsyncIterator[List[Dict]]:
+    """
+    Yield OHLCV bars of `interval` aggregated in the database, oldest first.
+
+    Each query covers a window of `batch_buckets` buckets, so the database
+    only ever aggregates one window's rows at a time and the result is
+    streamed in bounded batches. Empty windows (gaps in the data) are
+    skipped by jumping to the next stored row. Output bars carry the number
+    of source rows in `bars`.
+
+    Bars are aggregated from the coarsest rollup that divides `interval`
+    when `start` and `end` allow it (see `rollup_source`), and from the
+    raw records otherwise.
+
+    Raises:
+        ValueError: for an unknown interval
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+    seconds = INTERVALS[interval]
+    window = timedelta(seconds=seconds * batch_buckets)
+    source = rollup_source(seconds, start, end, rollups)
+    query = RESAMPLE_SQL if source is None else rollup_resample_sql(source)
+
+    async def next_row(after: Optional[datetime]):
+        conditions = [{'symbol': symbol}]
+        if after is not None:
+            conditions.append({'datetime': {'gte': after}})
+        if end is not None:
+            conditions.append({'datetime': {'lt': end}})
+        return await client.tickerdata.find_first(
+            where={'AND': conditions},
+            order={'datetime': 'asc'}
+        )
+
+    stop = utc_naive(end) if end is not None else None
+    lower = utc_naive(start) if start is not None else None
+
+    while True:
+        first = await next_row(lower)
+        if first is None:
+            return
+        # Rows of the first bucket before `start` stay out of the range
+        first_bucket = bucket_start(first.datetime, seconds)
+        lower = max(lower, first_bucket) if lower is not None else first_bucket
+
+        while True:
+            upper = bucket_start(lower, seconds) + window
+            if stop is not None:
+                upper = min(upper, stop)
+            bars = await client.query_raw(
+                query,
+                symbol,
+                seconds,
+                lower.isoformat(),
+                upper.isoformat()
+            )
+            if bars:
+                yield bars
+            lower = upper
+            if stop is not None and lower >= stop:
+                return
+            if not bars:
+                break  # a gap in the data: jump to the next stored row
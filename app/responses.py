@@ -0,0 +1,113 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.compression import EncodedBody, compress_stream, negotiate
+
+try:
+    import orjson
+except ImportError:  # the fast encoder is optional
+    orjson = None
+
+
+def _default(value):
+    """Types orjson leaves to Python, encoded like the response models do"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if hasattr(value, 'item'):  # NumPy scalar
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode `content` as compact JSON.
+
+    Decimals become strings and UTC datetimes end in "Z", as with the
+    Pydantic response models. Uses orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with `dumps`.
+
+    An endpoint returning one directly skips FastAPI's response_model
+    validation and jsonable_encoder pass, so it must only be given content
+    already shaped like the response model, e.g. from `ticker_rows`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def ticker_rows(records) -> List[Dict]:
+    """TickerDataResponse fields of trusted ticker rows, without validating them"""
+    return [
+        {
+            'id': r.id,
+            'symbol': r.symbol,
+            'datetime': r.datetime,
+            'open': r.open,
+            'high': r.high,
+            'low': r.low,
+            'close': r.close,
+            'volume': r.volume
+        }
+        for r in records
+    ]
+
+
+def ndjson_lines(rows: List[Dict]) -> bytes:
+    """Encode rows as NDJSON lines"""
+    return b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def encoded_response(
+    request: Request,
+    body: EncodedBody,
+    headers: Optional[Dict[str, str]] = None,
+    media_type: str = "application/json"
+) -> Response:
+    """A response with `body` compressed as the request's Accept-Encoding allows"""
+    content, encoding = body.encode(negotiate(request.headers.get("accept-encoding", "")))
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content, media_type=media_type, headers=headers)
+
+
+def json_response(request: Request, content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """`encoded_response` of trusted content encoded with `dumps`"""
+    return encoded_response(request, EncodedBody(dumps(content)), headers)
+
+
+def streaming_response(
+    request: Request,
+    chunks: AsyncIterator[bytes],
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None,
+    compressible: bool = True
+) -> StreamingResponse:
+    """
+    A streamed response, compressed chunk by chunk if `compressible` and
+    the client accepts it. Its length is not known up front, so
+    COMPRESS_MIN_BYTES does not apply.
+    """
+    headers = dict(headers or {})
+    encoding = negotiate(request.headers.get("accept-encoding", "")) if compressible else None
+    if encoding:
+        chunks = compress_stream(chunks, encoding)
+        headers["Content-Encoding"] = encoding
+    if compressible:
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
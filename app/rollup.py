@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.pgcopy import TABLE_NAME
+from app.resample import ROLLUP_TABLE, ROLLUPS, bar_aggregates, bucket_start
+
+ROLLUP_COLUMNS = ('bucket', 'open', 'high', 'low', 'close', 'volume', 'bars', 'symbol', 'interval')
+
+# Rebuilds commit this much history at a time
+REBUILD_WINDOW = timedelta(days=30)
+
+# Transaction-scoped lock serializing writers of one symbol, see `lock_symbols`
+LOCK_SQL = 'SELECT pg_advisory_xact_lock(hashtext($1))'
+
+
+def refresh_sql(size: int, source: Optional[int]) -> str:
+    """
+    Recompute the `size`-second rollup buckets of symbol $1 in [$2, $3).
+
+    Buckets are aggregated from the `source`-second rollup, or from
+    ticker_data when `source` is None, and upserted. The range must be
+    aligned to `size` buckets so no bucket is rebuilt from partial data.
+    """
+    if source is None:
+        select = bar_aggregates("datetime", f"'{size} seconds'::interval", "count(*)")
+        where = f'FROM "{TABLE_NAME}" WHERE "symbol" = $1 AND "datetime" >= $2::timestamp AND "datetime" < $3::timestamp'
+    else:
+        select = bar_aggregates("bucket", f"'{size} seconds'::interval", 'sum("bars")')
+        where = (
+            f'FROM "{ROLLUP_TABLE}" WHERE "symbol" = $1 AND "interval" = {source} '
+            f'AND "bucket" >= $2::timestamp AND "bucket" < $3::timestamp'
+        )
+    columns = ", ".join(f'"{c}"' for c in ROLLUP_COLUMNS)
+    assignments = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in ROLLUP_COLUMNS[1:7])
+    return f"""
+INSERT INTO "{ROLLUP_TABLE}" ({columns})
+SELECT {select},
+       $1::text, {size}
+{where}
+GROUP BY 1
+ON CONFLICT ("symbol", "interval", "bucket") DO UPDATE SET {assignments}
+"""
+
+
+def refresh_statements(
+    written: Dict[str, Dict],
+    rollups: List[int] = ROLLUPS
+) -> List[Tuple[str, List]]:
+    """
+    Statements bringing every rollup up to date after an ingest.
+
+    `written` maps symbols to the `first` and `last` datetime written, as
+    returned by `upsert_records`. Only the buckets covering that range are
+    recomputed, finest rollup first so each coarser one reads fresh data.
+
+    Returns:
+        (sql, [symbol, lower, upper]) pairs to run in order
+    """
+    statements = []
+    for symbol, counts in written.items():
+        if counts.get('first') is None:
+            continue  # nothing written for this symbol
+        source = None
+        for size in rollups:
+            lower = bucket_start(counts['first'], size)
+            upper = bucket_start(counts['last'], size) + timedelta(seconds=size)
+            statements.append((refresh_sql(size, source), [symbol, lower, upper]))
+            source = size
+    return statements
+
+
+def lock_statements(symbols: Iterable[str]) -> List[Tuple[str, List]]:
+    """
+    Statements taking the ingest lock of each symbol, in sorted order.
+
+    Every transaction that writes ticker_data and refreshes rollups must
+    run them before its first write. A refresh rebuilds whole buckets from
+    the rows it can see; under READ COMMITTED a concurrent writer's rows
+    are invisible until it commits, so without the lock the later refresh
+    would overwrite the bucket with aggregates missing them. Locking in a
+    fixed order keeps multi-symbol writers from deadlocking.
+    """
+    return [(LOCK_SQL, [symbol]) for symbol in sorted(set(symbols))]
+
+
+async def lock_symbols(client, symbols: Iterable[str]) -> None:
+    """Take the ingest lock of `symbols` until the transaction ends, see `lock_statements`"""
+    for sql, params in lock_statements(symbols):
+        await client.execute_raw(sql, *params)
+
+
+def _raw_params(params: List) -> List:
+    return [p.isoformat() if isinstance(p, datetime) else p for p in params]
+
+
+async def refresh_rollups(client, written: Dict[str, Dict], rollups: List[int] = ROLLUPS) -> None:
+    """
+    Recompute the rollup buckets an ingest touched, see `refresh_statements`.
+
+    Pass the transaction the ingest ran in so rollups commit with the data.
+    """
+    for sql, params in refresh_statements(written, rollups):
+        await client.execute_raw(sql, *_raw_params(params))
+
+
+async def rebuild_rollups(client, symbol: str, rollups: List[int] = ROLLUPS) -> int:
+    """
+    Rebuild every rollup of `symbol` from ticker_data.
+
+    Existing rollup rows of the symbol are dropped first, then history is
+    aggregated REBUILD_WINDOW at a time, each window in its own
+    transaction, so rebuilding years of bars never holds one long
+    transaction open.
+
+    Returns:
+        Number of windows processed
+    """
+    await client.tickerrollup.delete_many(where={'symbol': symbol})
+    if not rollups:
+        return 0
+
+    first = await client.tickerdata.find_first(where={'symbol': symbol}, order={'datetime': 'asc'})
+    if first is None:
+        return 0
+    last = await client.tickerdata.find_first(where={'symbol': symbol}, order={'datetime': 'desc'})
+
+    # Windows align to the coarsest bucket so each one rebuilds whole buckets
+    coarsest = timedelta(seconds=rollups[-1])
+    step = max(REBUILD_WINDOW // coarsest, 1) * coarsest
+    lower = bucket_start(first.datetime, rollups[-1])
+    end = bucket_start(last.datetime, rollups[-1]) + coarsest
+
+    windows = 0
+    while lower < end:
+        upper = min(lower + step, end)
+        async with client.tx() as transaction:
+            await lock_symbols(transaction, [symbol])
+            await refresh_rollups(
+                transaction,
+                {symbol: {'first': lower, 'last': upper - timedelta(microseconds=1)}},
+                rollups
+            )
+        lower = upper
+        windows += 1
+    return windows
@@ -0,0 +1,142 @@
+import logging
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TICKSNAP"
+FORMAT_VERSION = 3  # 2: prices as integer cents, 3: change counters
+
+# magic, format version, bytes per row, symbol, row count, last id, last timestamp (µs),
+# ticker_version counters (version, epoch) of the rows, -1 if unknown
+HEADER = struct.Struct("<8sII16sqqqqq")
+HEADER_SIZE = 128  # HEADER padded so the columns start 8-byte aligned
+SUFFIX = ".snap"
+
+
+class Snapshot:
+    """
+    A mapped snapshot file: read-only columns backed by the page cache.
+
+    The columns are np.memmap views, so every process mapping the same
+    file shares one copy of the data. `source` is the symbol's change
+    counters (version, epoch) the rows are current with, None if unknown.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        rows: int,
+        last_id: int,
+        last_ts: int,
+        columns: Dict[str, np.ndarray],
+        source: Optional[Tuple[int, int]] = None
+    ):
+        self.symbol = symbol
+        self.rows = rows
+        self.last_id = last_id
+        self.last_ts = last_ts
+        self.columns = columns
+        self.source = source
+
+
+def snapshot_path(directory: str, symbol: str) -> str:
+    return os.path.join(directory, symbol + SUFFIX)
+
+
+def write_snapshot(
+    directory: str,
+    symbol: str,
+    columns: Dict[str, np.ndarray],
+    source: Optional[Tuple[int, int]] = None
+) -> str:
+    """
+    Write one symbol's columns, in the order given, as a snapshot file,
+    recording the change counters `source` they are current with.
+
+    The file is written next to its final name and renamed into place, so
+    readers, including processes that have the old file mapped, never see
+    a partial file.
+
+    Returns:
+        Path of the snapshot
+    """
+    rows = len(columns['ts'])
+    if rows == 0:
+        raise ValueError("Cannot snapshot an empty series")
+    row_bytes = sum(column.dtype.itemsize for column in columns.values())
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, row_bytes, symbol.encode(),
+        rows, int(columns['id'][-1]), int(columns['ts'][-1]),
+        *(source if source is not None else (-1, -1))
+    )
+
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(directory, symbol)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            for column in columns.values():
+                f.write(np.ascontiguousarray(column).tobytes())
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return path
+
+
+def read_snapshot(directory: str, symbol: str, dtypes: Dict[str, type]) -> Optional[Snapshot]:
+    """
+    Map the snapshot of `symbol`, whose columns have `dtypes` in order.
+
+    Returns:
+        None if there is no snapshot, or it was written for another
+        symbol, format version or column layout
+    """
+    path = snapshot_path(directory, symbol)
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+
+    magic, version, row_bytes, name, rows, last_id, last_ts, *source = HEADER.unpack(header[:HEADER.size])
+    expected_row_bytes = sum(np.dtype(dtype).itemsize for dtype in dtypes.values())
+    if (
+        magic != MAGIC
+        or version != FORMAT_VERSION
+        or row_bytes != expected_row_bytes
+        or name.rstrip(b"\0").decode(errors='replace') != symbol
+        or size != HEADER_SIZE + rows * row_bytes
+    ):
+        logger.warning(f"Ignoring incompatible snapshot {path}")
+        return None
+
+    columns = {}
+    offset = HEADER_SIZE
+    for column, dtype in dtypes.items():
+        columns[column] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(rows,))
+        offset += rows * np.dtype(dtype).itemsize
+    return Snapshot(symbol, rows, last_id, last_ts, columns, None if source[0] < 0 else tuple(source))
+
+
+def remove_snapshot(directory: str, symbol: Optional[str] = None) -> None:
+    """Delete the snapshot of `symbol`, or every snapshot in `directory`"""
+    if symbol is not None:
+        names = [symbol + SUFFIX]
+    elif os.path.isdir(directory):
+        names = [name for name in os.listdir(directory) if name.endswith(SUFFIX)]
+    else:
+        names = []
+    for name in names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
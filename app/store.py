@@ -0,0 +1,536 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.cache import as_utc, data_versions
+from app.config import DATA_PAGE_SIZE, DATA_STREAM_BATCH_SIZE, SERIES_STORE_MB, SNAPSHOT_DIR
+from app.crud import encode_cursor, iter_ticker_batches, probe_ticker_data, stored_symbols
+from app.freshness import refresh_version
+from app.prices import cents_array, cents_to_float, decimal_lists
+from app.snapshot import Snapshot, read_snapshot, remove_snapshot, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Column name -> dtype; timestamps are microseconds since the Unix epoch (UTC)
+# and prices are integer cents (see app.prices)
+COLUMNS = {
+    'id': np.int64,
+    'ts': np.int64,
+    'open': np.int64,
+    'high': np.int64,
+    'low': np.int64,
+    'close': np.int64,
+    'volume': np.int64
+}
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+ROW_BYTES = sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values())
+
+
+def to_micros(dt: datetime) -> int:
+    return (as_utc(dt) - EPOCH) // MICROSECOND
+
+
+def from_micros(ts: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(ts))
+
+
+class StoredRow:
+    """A ticker row read back from a Series, shaped like a Prisma record"""
+
+    __slots__ = ('id', 'symbol', 'datetime', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, symbol: str, record_id, ts, open_, high, low, close, volume):
+        self.id = int(record_id)
+        self.symbol = symbol
+        self.datetime = from_micros(ts)
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = int(volume)
+
+
+class SeriesBars:
+    """
+    Strategy input over a slice of a Series: a sequence of
+    {'datetime', 'close'} bars whose closes are also available as one
+    float64 array, so they never pass through per-bar Python objects.
+    """
+
+    def __init__(self, ts: np.ndarray, closes: np.ndarray):
+        self.ts = ts
+        self.closes = closes
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __getitem__(self, index: int) -> Dict:
+        return {'datetime': from_micros(self.ts[index]), 'close': float(self.closes[index])}
+
+
+class Series:
+    """
+    Ticker history of one symbol as contiguous NumPy columns, oldest first.
+
+    Columns grow geometrically, so appending bars is amortized O(1) per
+    bar. `epoch` and `version` are the symbol's DataVersion counters the
+    series is current with, and `source` the shared change counters
+    (version, epoch) behind them, None if not confirmed.
+
+    A series built from a snapshot starts out on its read-only mapped
+    columns (`snapshot_rows` of them); the first append copies the
+    columns into private memory.
+    """
+
+    def __init__(self, symbol: str, epoch: int, version: int, source: Optional[Tuple[int, int]] = None):
+        self.symbol = symbol
+        self.epoch = epoch
+        self.version = version
+        self.source = source
+        self.length = 0
+        self.snapshot_rows = 0
+        self._columns = {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot: Snapshot,
+        epoch: int,
+        version: int,
+        source: Optional[Tuple[int, int]] = None
+    ) -> 'Series':
+        series = cls(snapshot.symbol, epoch, version, source)
+        series._columns = dict(snapshot.columns)
+        series.length = series.snapshot_rows = snapshot.rows
+        return series
+
+    @property
+    def mapped(self) -> bool:
+        """Whether the columns are still those of the snapshot file"""
+        return isinstance(self._columns['ts'], np.memmap)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns.values())
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name][:self.length]
+
+    @property
+    def last_row(self) -> Optional[Tuple[datetime, int]]:
+        """(datetime, id) keyset position of the newest row"""
+        if not self.length:
+            return None
+        return from_micros(self._columns['ts'][self.length - 1]), int(self._columns['id'][self.length - 1])
+
+    def append(self, records: List) -> None:
+        """
+        Append ticker rows, which must follow the stored ones in (datetime, id) order.
+
+        Raises:
+            ValueError: if the rows would break the order
+        """
+        if not records:
+            return
+        new = {
+            'id': [r.id for r in records],
+            'ts': [to_micros(r.datetime) for r in records],
+            'open': cents_array([r.open for r in records]),
+            'high': cents_array([r.high for r in records]),
+            'low': cents_array([r.low for r in records]),
+            'close': cents_array([r.close for r in records]),
+            'volume': [r.volume for r in records]
+        }
+        ts = np.array(new['ts'], dtype=np.int64)
+        last = self.last_row
+        if np.any(np.diff(ts) <= 0) or (last is not None and ts[0] <= to_micros(last[0])):
+            raise ValueError("Appended rows must be newer than the stored ones")
+
+        end = self.length + len(records)
+        capacity = len(self._columns['ts'])
+        if end > capacity:
+            capacity = max(end, capacity * 2)
+            for name, column in self._columns.items():
+                grown = np.empty(capacity, column.dtype)
+                grown[:self.length] = column[:self.length]
+                self._columns[name] = grown
+        for name, values in new.items():
+            self._columns[name][self.length:end] = values
+        self.length = end
+
+    def compact(self) -> None:
+        """Release the spare capacity left by appends"""
+        for name, column in self._columns.items():
+            if len(column) > self.length:
+                self._columns[name] = column[:self.length].copy()
+
+    def search(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> Tuple[int, int]:
+        """Index range of the rows in [start, end) that sort after `after`"""
+        ts = self.column('ts')
+        lo = 0 if start is None else int(np.searchsorted(ts, to_micros(start), 'left'))
+        hi = self.length if end is None else int(np.searchsorted(ts, to_micros(end), 'left'))
+        if after is not None:
+            dt, record_id = after
+            position = int(np.searchsorted(ts, to_micros(dt), 'left'))
+            # datetimes are unique per symbol; the id only breaks a tie with the cursor row
+            if position < self.length and ts[position] == to_micros(dt) and self._columns['id'][position] <= record_id:
+                position += 1
+            lo = max(lo, position)
+        return lo, max(lo, hi)
+
+    def rows(self, lo: int, hi: int) -> List[StoredRow]:
+        """Rows lo..hi as record objects, for responses"""
+        columns = {name: self._columns[name][lo:hi].tolist() for name in COLUMNS}
+        columns.update(decimal_lists({name: columns[name] for name in PRICE_COLUMNS}))
+        return [StoredRow(self.symbol, *values) for values in zip(*columns.values())]
+
+    def prices(self, name: str, lo: int = 0) -> np.ndarray:
+        """Float prices of one price column from row `lo` on"""
+        return cents_to_float(self.column(name)[lo:])
+
+    def bars(self, lo: int = 0) -> SeriesBars:
+        """Strategy input for the rows from `lo` on"""
+        return SeriesBars(self.column('ts')[lo:], self.prices('close', lo))
+
+
+def find_series_page(
+    series: Series,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: int = DATA_PAGE_SIZE
+) -> Tuple[List[StoredRow], Optional[str]]:
+    """`find_ticker_page` served from a Series"""
+    lo, hi = series.search(start, end, after)
+    if hi - lo <= limit:
+        return series.rows(lo, hi), None
+    rows = series.rows(lo, lo + limit)
+    return rows, encode_cursor(rows[-1].datetime, rows[-1].id)
+
+
+async def iter_series_batches(
+    series: Series,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None,
+    batch_size: int = DATA_STREAM_BATCH_SIZE
+) -> AsyncIterator[List[StoredRow]]:
+    """`iter_ticker_batches` served from a Series, as of when it starts"""
+    lo, hi = series.search(start, end, after)
+    if limit is not None:
+        hi = min(hi, lo + limit)
+    for position in range(lo, hi, batch_size):
+        yield series.rows(position, min(position + batch_size, hi))
+
+
+class SeriesStore:
+    """
+    In-process columnar copy of the ticker history, one Series per symbol.
+
+    Reads go through `get`, which brings a symbol's series up to date
+    with its DataVersion first: appended bars are fetched after the
+    newest stored row, while a rewrite of history (a new epoch) reloads
+    the symbol. Symbols are evicted least recently used first to stay
+    under `max_bytes`; a symbol that does not fit at all is served from
+    the database. With `max_bytes` 0 the store is disabled.
+
+    With a `snapshot_dir`, each loaded series is saved there as a snapshot
+    file (see app.snapshot) and used through a read-only memory map, so
+    worker processes share one copy in the page cache. A symbol that is
+    not in memory is mapped from its snapshot if the snapshot still
+    matches the database, then topped up with the newer rows only, so a
+    restart does not rescan the table.
+
+    The store follows the DataVersion, so writes made outside this process
+    reach it once app.freshness has noticed them and bumped the version;
+    readers probe before `get`, so a series never predates the version's
+    `source`.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        batch_size: int = DATA_STREAM_BATCH_SIZE,
+        snapshot_dir: Optional[str] = None
+    ):
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.snapshot_dir = snapshot_dir or None
+        self._series: 'OrderedDict[str, Series]' = OrderedDict()
+        self._oversized: Dict[str, int] = {}  # symbol -> DataVersion value it was too big at
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.appends = 0
+        self.evictions = 0
+        self.fallbacks = 0
+        self.snapshot_loads = 0
+        self.snapshots_written = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._series
+
+    async def get(self, client, symbol: str) -> Optional[Series]:
+        """
+        The up-to-date series of `symbol`, loading it if needed.
+
+        Returns:
+            None if the store is disabled or the symbol does not fit
+        """
+        if self.max_bytes <= 0:
+            return None
+        lock = self._locks.setdefault(symbol, asyncio.Lock())
+        async with lock:
+            version = data_versions[symbol]
+            # Read before querying: a concurrent write then triggers another catch-up
+            epoch, value = version.epoch, version.value
+            source = version.source if version.shared else None
+            series = self._series.get(symbol)
+
+            if series is not None and series.version == value:
+                self.hits += 1
+            elif series is not None and series.epoch == epoch and await self._extend(client, series):
+                series.version, series.source = value, source
+                self.appends += 1
+            elif self._oversized.get(symbol) == value:
+                series = None
+            else:
+                # A series that fell behind means history was rewritten: its snapshot is stale too
+                stale = self._series.pop(symbol, None) is not None
+                if stale:
+                    self.invalidate(symbol)
+                series = await self._load(client, symbol, epoch, value, source, use_snapshot=not stale)
+
+            if series is None:
+                self.fallbacks += 1
+                return None
+            self._series[symbol] = series
+            self._series.move_to_end(symbol)
+            self._evict(keep=symbol)
+            return series
+
+    async def _extend(self, client, series: Series) -> bool:
+        """Append the rows after the newest stored one; False if they do not follow it"""
+        async for records in iter_ticker_batches(
+            client, after=series.last_row, batch_size=self.batch_size, symbol=series.symbol
+        ):
+            try:
+                series.append(records)
+            except ValueError:
+                logger.info(f"Series of {series.symbol} is out of date; reloading")
+                return False
+            data_versions[series.symbol].observe(records[-1].datetime)
+        return True
+
+    async def _load(
+        self,
+        client,
+        symbol: str,
+        epoch: int,
+        value: int,
+        source: Optional[Tuple[int, int]] = None,
+        use_snapshot: bool = True
+    ) -> Optional[Series]:
+        series = None
+        if self.snapshot_dir and use_snapshot:
+            series = await self._map(client, symbol, epoch, value, source)
+        if series is None:
+            series = await self._fetch(client, symbol, epoch, value, source)
+            if series is None:
+                return None
+        self._oversized.pop(symbol, None)
+        self.loads += 1
+        return self._persist(series)
+
+    async def _fetch(
+        self,
+        client,
+        symbol: str,
+        epoch: int,
+        value: int,
+        source: Optional[Tuple[int, int]] = None
+    ) -> Optional[Series]:
+        """Read the whole series from the database"""
+        series = Series(symbol, epoch, value, source)
+        async for records in iter_ticker_batches(client, batch_size=self.batch_size, symbol=symbol):
+            if (series.length + len(records)) * ROW_BYTES > self.max_bytes:
+                logger.warning(f"Series of {symbol} exceeds SERIES_STORE_MB; reading it from the database")
+                self._oversized[symbol] = value
+                return None
+            series.append(records)
+            data_versions[symbol].observe(records[-1].datetime)
+        series.compact()
+        return series
+
+    async def _map(
+        self,
+        client,
+        symbol: str,
+        epoch: int,
+        value: int,
+        source: Optional[Tuple[int, int]] = None
+    ) -> Optional[Series]:
+        """The series from its snapshot plus newer rows, if the snapshot is still valid"""
+        snapshot = read_snapshot(self.snapshot_dir, symbol, COLUMNS)
+        if snapshot is None or snapshot.rows * ROW_BYTES > self.max_bytes:
+            return None
+        if not await self._snapshot_current(client, snapshot):
+            logger.info(f"Snapshot of {symbol} no longer matches the database; reloading")
+            return None
+        series = Series.from_snapshot(snapshot, epoch, value, source)
+        data_versions[symbol].observe(from_micros(snapshot.last_ts))
+        if not await self._extend(client, series):
+            return None
+        self.snapshot_loads += 1
+        return series
+
+    async def _snapshot_current(self, client, snapshot: Snapshot) -> bool:
+        """
+        Whether the database still holds exactly the snapshot's rows up to
+        its last one. Writes since the snapshot must all have been appends:
+        the symbol's change counters are still in the snapshot's epoch (see
+        app.crud.VERSION_SQL), and its last row is unchanged. Both checks
+        are index lookups, not a table scan.
+        """
+        if snapshot.source is None:
+            return False
+        marker, _ = await probe_ticker_data(client, snapshot.symbol)
+        if marker is None or marker[1] != snapshot.source[1] or marker[0] < snapshot.source[0]:
+            return False
+        last = await client.tickerdata.find_unique(where={'id': snapshot.last_id})
+        return last is not None and last.symbol == snapshot.symbol and to_micros(last.datetime) == snapshot.last_ts
+
+    def _persist(self, series: Series) -> Series:
+        """Save rows the snapshot lacks and switch the series to the mapped file"""
+        if not self.snapshot_dir or not len(series) or len(series) == series.snapshot_rows:
+            return series
+        try:
+            self._write(series)
+            snapshot = read_snapshot(self.snapshot_dir, series.symbol, COLUMNS)
+        except OSError as e:
+            logger.warning(f"Error writing snapshot of {series.symbol}: {str(e)}")
+            return series
+        if snapshot is None:
+            return series
+        return Series.from_snapshot(snapshot, series.epoch, series.version, series.source)
+
+    def _write(self, series: Series) -> None:
+        write_snapshot(
+            self.snapshot_dir, series.symbol, {name: series.column(name) for name in COLUMNS}, series.source
+        )
+        series.snapshot_rows = len(series)
+        self.snapshots_written += 1
+
+    def _evict(self, keep: str) -> None:
+        while self.nbytes > self.max_bytes and len(self._series) > 1:
+            symbol = next(iter(self._series))
+            if symbol == keep:
+                self._series.move_to_end(symbol)
+                continue
+            del self._series[symbol]
+            self.evictions += 1
+
+    async def load_all(self, client) -> int:
+        """
+        Load every stored symbol, as many as fit, e.g. at startup.
+
+        Returns:
+            Number of symbols loaded
+        """
+        if self.max_bytes <= 0:
+            return 0
+        for symbol in await stored_symbols(client):
+            await refresh_version(client, symbol, probe_interval=0)
+            await self.get(client, symbol)
+            if self.nbytes >= self.max_bytes:
+                break
+        return len(self._series)
+
+    async def sync(self, client, symbols: Iterable[str]) -> None:
+        """
+        Bring the loaded series of `symbols` up to date after a write.
+
+        Failures are only logged: the next read catches up again.
+        """
+        for symbol in symbols:
+            if symbol not in self._series:
+                continue
+            try:
+                await self.get(client, symbol)
+            except Exception as e:
+                logger.error(f"Error updating series store for {symbol}: {str(e)}")
+
+    def invalidate(self, symbol: str) -> None:
+        """Delete the snapshot of `symbol` after its history was rewritten"""
+        if self.snapshot_dir:
+            remove_snapshot(self.snapshot_dir, symbol)
+
+    def drop(self, symbol: Optional[str] = None) -> None:
+        """Forget one symbol's series and snapshot, or all of them"""
+        if symbol is None:
+            self._series.clear()
+            self._oversized.clear()
+            if self.snapshot_dir:
+                remove_snapshot(self.snapshot_dir)
+        else:
+            self._series.pop(symbol, None)
+            self._oversized.pop(symbol, None)
+            self.invalidate(symbol)
+
+    def save_snapshots(self) -> int:
+        """
+        Snapshot every series holding rows its snapshot lacks, e.g. at shutdown.
+
+        Returns:
+            Number of snapshots written
+        """
+        if not self.snapshot_dir:
+            return 0
+        written = 0
+        for series in list(self._series.values()):
+            if len(series) > series.snapshot_rows:
+                try:
+                    self._write(series)
+                    written += 1
+                except OSError as e:
+                    logger.warning(f"Error writing snapshot of {series.symbol}: {str(e)}")
+        return written
+
+    def stats(self) -> Dict:
+        return {
+            "symbols": len(self._series),
+            "rows": sum(len(series) for series in self._series.values()),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "loads": self.loads,
+            "appends": self.appends,
+            "evictions": self.evictions,
+            "fallbacks": self.fallbacks,
+            "mapped_symbols": sum(series.mapped for series in self._series.values()),
+            "snapshot_loads": self.snapshot_loads,
+            "snapshots_written": self.snapshots_written
+        }
+
+
+series_store = SeriesStore(SERIES_STORE_MB * 1024 * 1024, snapshot_dir=SNAPSHOT_DIR)
@@ -1,7 +1,297 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from decimal import Decimal
+import numpy as np
 import pandas as pd
 
+from app.prices import PRICE_SCALE
+
+# Bars per cumulative-sum block in PrefixSums
+CUMSUM_BLOCK = 4096
+
+
+class PrefixSums:
+    """
+    Block-anchored prefix sums for O(n) rolling window sums.
+    
+    A single running cumsum loses precision as the running total grows, so
+    the cumsum restarts every `block` bars and each block is centered on its
+    own first price. Any window of at most `block` bars spans at most two
+    blocks, so its sum only ever combines small partial sums.
+    
+    Every window sum depends only on the blocks it touches, so a series that
+    starts on a block boundary gives bit-identical results for any later
+    window, however much earlier history is left out.
+    
+    When every price is a whole number of cents, as stored in the database,
+    exact integer-cent prefix sums are kept as well, so `ma_order` decides
+    which moving average is higher, and ties, without rounding error.
+    """
+    
+    def __init__(self, values, block: int = CUMSUM_BLOCK):
+        prices = np.asarray(values, dtype=float)
+        self.size = len(prices)
+        self.block = block
+        
+        cents = np.rint(prices * PRICE_SCALE)
+        if np.array_equal(cents / PRICE_SCALE, prices):
+            self._cents = np.zeros(self.size + 1, dtype=np.int64)
+            # int64 wraparound cancels out in differences of window length
+            np.cumsum(cents.astype(np.int64), out=self._cents[1:])
+            self._max_cents = int(np.abs(cents).max()) if self.size else 0
+        else:
+            self._cents = None
+        
+        padded = np.zeros(-(-self.size // block) * block)
+        padded[:self.size] = prices
+        blocks = padded.reshape(-1, block)
+        anchor = blocks[:, :1]
+        centered = blocks - anchor
+        centered.ravel()[self.size:] = 0.0
+        sums = np.cumsum(centered, axis=1)
+        # Per bar: its block's anchor, the inclusive prefix within the block,
+        # and what remains of the block after it
+        self._anchors = np.broadcast_to(anchor, blocks.shape).ravel()[:self.size]
+        self._prefix = sums.ravel()[:self.size]
+        self._suffix = (sums[:, -1:] - sums).ravel()[:self.size]
+    
+    def window_sums(self, window: int) -> np.ndarray:
+        """Sums of every full window, ending at bars window-1 .. n-1"""
+        if window < 1 or window > self.block:
+            raise ValueError(f"window must be between 1 and {self.block}")
+        if self.size < window:
+            return np.empty(0)
+        
+        prefix, suffix, anchors = self._prefix, self._suffix, self._anchors
+        sums = prefix[window - 1:] + window * anchors[window - 1:]
+        sums[1:] -= prefix[:self.size - window]
+        
+        # Windows whose preceding bar is in the previous block: the tail of
+        # that block plus the head of their own, each with its own anchor
+        end = (np.arange(self.block, self.size, self.block)[:, None] + np.arange(window)).ravel()
+        end = end[end < self.size]
+        before = end - window
+        head = end % self.block + 1
+        sums[end - (window - 1)] = (
+            prefix[end] + head * anchors[end]
+            + suffix[before] + (window - head) * anchors[before]
+        )
+        return sums
+    
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """Simple moving average, NaN until the first full window"""
+        ma = np.full(self.size, np.nan)
+        if self.size >= window:
+            ma[window - 1:] = self.window_sums(window) / window
+        return ma
+    
+    def cent_sums(self, window: int) -> np.ndarray:
+        """
+        Exact integer-cent sums of every full window, ending at bars
+        window-1 .. n-1; only for whole-cent prices.
+        """
+        return self._cents[window:] - self._cents[:self.size + 1 - window]
+    
+    def ma_order(
+        self,
+        short_window: int,
+        long_window: int,
+        cache: Optional[Dict[int, np.ndarray]] = None
+    ) -> np.ndarray:
+        """
+        Sign of short MA minus long MA per bar: 1, 0 on a tie, -1, and NaN
+        until both windows are full.
+        
+        With whole-cent prices the averages are compared as
+        sum_short * long_window against sum_long * short_window in exact
+        integers; otherwise the rolling means are compared. `cache` keeps
+        per-window sums or means for reuse across calls.
+        """
+        order = np.full(self.size, np.nan)
+        first = max(short_window, long_window) - 1
+        if self.size <= first:
+            return order
+        cache = {} if cache is None else cache
+        
+        def values(window: int) -> np.ndarray:
+            if window not in cache:
+                cache[window] = (
+                    self.rolling_mean(window)[window - 1:] if self._cents is None
+                    else self.cent_sums(window)
+                )
+            return cache[window][first - (window - 1):]
+        
+        short_values, long_values = values(short_window), values(long_window)
+        if self._cents is None:
+            order[first:] = np.sign(short_values - long_values)
+            return order
+        if self._max_cents * short_window * long_window >= 2 ** 63:
+            # Products could overflow int64: use Python integers
+            short_values, long_values = short_values.astype(object), long_values.astype(object)
+        order[first:] = np.sign(short_values * long_window - long_values * short_window)
+        return order
+
+
+def rolling_mean(values, window: int) -> np.ndarray:
+    """Simple moving average of an array, NaN until the first full window"""
+    return PrefixSums(values, block=max(CUMSUM_BLOCK, window)).rolling_mean(window)
+
+
+def _crossover_signals(
+    order: np.ndarray,
+    start: int,
+    position: Optional[str]
+) -> Tuple[np.ndarray, np.ndarray, Optional[str]]:
+    """
+    Detect crossover signals with array operations.
+    
+    `order` is PrefixSums.ma_order. A bar i >= start is a BUY when the
+    short MA crosses above the long MA while flat, and a SELL when it
+    crosses below while long. Comparisons against NaN are False, so bars
+    without both averages never signal.
+    
+    Returns:
+        (bar indices, sides as +1 BUY / -1 SELL, position after the last bar)
+    """
+    prev, curr = order[start - 1:-1], order[start:]
+    
+    events = np.zeros(len(curr), dtype=np.int8)
+    events[(prev <= 0) & (curr > 0)] = 1
+    events[(prev >= 0) & (curr < 0)] = -1
+    
+    # A crossover only changes state when it differs from the previous one:
+    # repeated crosses in the same direction are ignored, and a SELL needs an
+    # open position, which is the same as starting "short" when flat.
+    event_rows = np.flatnonzero(events)
+    sides = events[event_rows]
+    previous = np.empty_like(sides)
+    if len(sides):
+        previous[0] = 1 if position == 'long' else -1
+        previous[1:] = sides[:-1]
+    keep = sides != previous
+    
+    rows = event_rows[keep] + start
+    sides = sides[keep]
+    if len(sides):
+        position = 'long' if sides[-1] > 0 else None
+    return rows, sides, position
+
+
+def crossover_scan(
+    closes: np.ndarray,
+    short_window: int,
+    long_window: int,
+    block: int,
+    start: int,
+    position: Optional[str]
+) -> Tuple:
+    """
+    Moving averages and crossover signals over a close series.
+    
+    Pure array work, so it can run in a worker process on a shared buffer.
+    
+    Returns:
+        (signal bar indices, sides, position after the last bar,
+         short MA and long MA at the signal bars)
+    """
+    sums = PrefixSums(closes, block)
+    rows, sides, position = _crossover_signals(sums.ma_order(short_window, long_window), start, position)
+    short_ma = sums.rolling_mean(short_window)
+    long_ma = sums.rolling_mean(long_window)
+    return rows, sides, position, short_ma[rows], long_ma[rows]
+
+
+def trade_metrics(prices: np.ndarray) -> Dict:
+    """
+    Performance metrics for alternating BUY/SELL signal prices.
+    
+    Same figures as MovingAverageCrossoverStrategy.calculate_performance for
+    crossover signals, which always start with a BUY and alternate.
+    """
+    trades = (prices[1::2] - prices[:len(prices) - 1:2]).tolist()
+    
+    total_trades = len(trades)
+    winning_trades = sum(1 for t in trades if t > 0)
+    losing_trades = sum(1 for t in trades if t < 0)
+    win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0.0
+    
+    return {
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+        'losing_trades': losing_trades,
+        'win_rate': round(win_rate, 2),
+        'total_return': round(sum(trades, 0.0), 2)
+    }
+
+
+def sweep_performance(closes, pairs: List[Tuple[int, int]]) -> List[Dict]:
+    """
+    Evaluate the crossover strategy for many window pairs in one pass.
+    
+    All moving averages come from a single PrefixSums over the series, and
+    each distinct window's sums are computed once and shared by every pair
+    using it. Averages are compared exactly (see PrefixSums.ma_order), so
+    signals match a per-pair run.
+    
+    Args:
+        closes: Close prices, oldest first
+        pairs: (short_window, long_window) pairs to evaluate
+        
+    Returns:
+        Performance metrics per pair, in the order of `pairs`
+    """
+    if not pairs:
+        return []
+    
+    closes = np.asarray(closes, dtype=float)
+    windows = {window for pair in pairs for window in pair}
+    sums = PrefixSums(closes, max(CUMSUM_BLOCK, *windows))
+    
+    # Short-window sums are shared by every pair; long ones are kept one at a
+    # time, to bound memory
+    shorts = {short for short, _ in pairs}
+    by_long = {}
+    for index, (short, long) in enumerate(pairs):
+        by_long.setdefault(long, []).append((index, short))
+    
+    cache = {}
+    results = [None] * len(pairs)
+    for long, group in by_long.items():
+        for index, short in group:
+            rows, _, _ = _crossover_signals(sums.ma_order(short, long, cache), long, None)
+            results[index] = {
+                'short_window': short,
+                'long_window': long,
+                **trade_metrics(closes[rows])
+            }
+        if long not in shorts:
+            cache.pop(long, None)
+    return results
+
+
+class StrategyState:
+    """
+    Resumable progress of a MovingAverageCrossoverStrategy evaluation.
+    
+    Holds just enough to continue from the last processed bar: the bar
+    count, the trailing closes both moving averages still need, the open
+    position and the signals emitted so far.
+    """
+    
+    def __init__(
+        self,
+        bars: int = 0,
+        closes: Optional[np.ndarray] = None,
+        position: Optional[str] = None,
+        signals: Optional[List[Dict]] = None,
+        last_datetime=None
+    ):
+        self.bars = bars
+        self.closes = closes if closes is not None else np.empty(0)
+        self.position = position
+        self.signals = signals if signals is not None else []
+        self.last_datetime = last_datetime
+
+
 class MovingAverageCrossoverStrategy:
     """
     Simple Moving Average Crossover Strategy
@@ -12,18 +302,16 @@ class MovingAverageCrossoverStrategy:
     def __init__(self, short_window: int = 10, long_window: int = 20):
         self.short_window = short_window
         self.long_window = long_window
+        # Prefix-sum blocks are aligned to absolute bar numbers, see advance()
+        self.block = max(CUMSUM_BLOCK, short_window, long_window)
     
     def calculate_moving_average(self, prices: List[float], window: int) -> List[float]:
         """Calculate simple moving average"""
         if len(prices) < window:
             return [None] * len(prices)
         
-        ma = []
-        for i in range(len(prices)):
-            if i < window - 1:
-                ma.append(None)
-            else:
-                ma.append(sum(prices[i-window+1:i+1]) / window)
+        ma = rolling_mean(prices, window).tolist()
+        ma[:window - 1] = [None] * (window - 1)
         return ma
     
     def generate_signals(self, data: List[Dict]) -> List[Dict]:
@@ -31,50 +319,101 @@ class MovingAverageCrossoverStrategy:
         if len(data) < self.long_window:
             return []
         
-        # Convert to pandas for easier calculation
-        df = pd.DataFrame(data)
-        df['close'] = df['close'].astype(float)
-        
-        # Calculate moving averages
-        df['short_ma'] = df['close'].rolling(window=self.short_window).mean()
-        df['long_ma'] = df['close'].rolling(window=self.long_window).mean()
-        
-        # Generate signals
-        signals = []
-        position = None  # None, 'long', or 'short'
-        
-        for i in range(self.long_window, len(df)):
-            prev_short = df['short_ma'].iloc[i-1]
-            prev_long = df['long_ma'].iloc[i-1]
-            curr_short = df['short_ma'].iloc[i]
-            curr_long = df['long_ma'].iloc[i]
-            
-            # Skip if any value is NaN
-            if pd.isna(prev_short) or pd.isna(prev_long) or pd.isna(curr_short) or pd.isna(curr_long):
-                continue
-            
-            signal = None
-            
-            # Buy signal: short MA crosses above long MA
-            if prev_short <= prev_long and curr_short > curr_long and position != 'long':
-                signal = 'BUY'
-                position = 'long'
-            
-            # Sell signal: short MA crosses below long MA
-            elif prev_short >= prev_long and curr_short < curr_long and position == 'long':
-                signal = 'SELL'
-                position = None
-            
-            if signal:
-                signals.append({
-                    'datetime': str(df['datetime'].iloc[i]),
-                    'signal': signal,
-                    'price': float(df['close'].iloc[i]),
-                    'short_ma': float(curr_short),
-                    'long_ma': float(curr_long)
-                })
-        
-        return signals
+        return self.advance(StrategyState(), data).signals
+    
+    def advance(self, state: 'StrategyState', data: List[Dict]) -> 'StrategyState':
+        """
+        Extend an evaluation with bars appended after those already seen.
+        
+        Only the new bars and the trailing closes kept in `state` are
+        processed. The input state is left untouched and a new one is
+        returned, so a full run is simply `advance(StrategyState(), data)`.
+        
+        The kept closes always start on a prefix-sum block boundary, so the
+        moving averages, and therefore the signals, are bit-identical to a
+        full recomputation no matter how the bars were split into updates.
+        
+        The work is split in three steps so the array part, crossover_scan,
+        can run elsewhere (see app.executor): extend_closes, the scan over
+        the closes with scan_args, then apply_scan.
+        
+        Raises:
+            ValueError: if the first new bar is older than the last one seen
+        """
+        if not data:
+            return state
+        closes = self.extend_closes(state, data)
+        scan = crossover_scan(closes, *self.scan_args(state))
+        return self.apply_scan(state, data, closes, scan)
+    
+    def extend_closes(self, state: 'StrategyState', data: List[Dict]) -> np.ndarray:
+        """
+        The kept closes of `state` followed by those of the new bars.
+        
+        Raises:
+            ValueError: if the first new bar is older than the last one seen
+        """
+        if state.last_datetime is not None and data[0]['datetime'] < state.last_datetime:
+            raise ValueError("New bars must not be older than the last processed bar")
+        
+        # Columnar bars (app.store.SeriesBars) carry their closes as an array
+        closes = getattr(data, 'closes', None)
+        if closes is None:
+            closes = np.array([row['close'] for row in data], dtype=float)
+        return np.concatenate([state.closes, closes])
+    
+    def scan_args(self, state: 'StrategyState') -> Tuple:
+        """Arguments for crossover_scan after the closes, resuming `state`"""
+        tail = len(state.closes)
+        origin = state.bars - tail  # absolute bar number of closes[0]
+        # Signals start at absolute bar long_window
+        start = max(tail, self.long_window - origin)
+        return (self.short_window, self.long_window, self.block, start, state.position)
+    
+    def apply_scan(
+        self,
+        state: 'StrategyState',
+        data: List[Dict],
+        closes: np.ndarray,
+        scan: Tuple
+    ) -> 'StrategyState':
+        """Build the next state from a crossover_scan over extend_closes()"""
+        rows, sides, position, short_at, long_at = scan
+        tail = len(state.closes)
+        origin = state.bars - tail
+        
+        # Only signal bars are materialized as records
+        datetimes = pd.Series([data[i - tail]['datetime'] for i in rows])
+        
+        signals = [
+            {
+                'datetime': str(dt),
+                'signal': 'BUY' if side > 0 else 'SELL',
+                'price': price,
+                'short_ma': s_ma,
+                'long_ma': l_ma
+            }
+            for dt, side, price, s_ma, l_ma in zip(
+                datetimes,
+                sides.tolist(),
+                closes[rows].tolist(),
+                short_at.tolist(),
+                long_at.tolist()
+            )
+        ]
+        
+        # Keep every close from the block holding the oldest one the next
+        # update needs: a full window ending at the current last bar
+        bars = state.bars + len(data)
+        oldest = max(bars - max(self.short_window, self.long_window), 0)
+        keep_from = oldest // self.block * self.block - origin
+        return StrategyState(
+            bars=bars,
+            closes=closes[keep_from:].copy(),
+            position=position,
+            signals=state.signals + signals,
+            last_datetime=data[-1]['datetime']
+        )
     
     def calculate_performance(self, signals: List[Dict]) -> Dict:
         """Calculate strategy performance metrics"""
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import secrets
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import WRITE_BATCH_SIZE, WRITE_FLUSH_MS, WRITE_QUEUE_SIZE
+from app.models import TickerDataCreate
+
+logger = logging.getLogger(__name__)
+
+# Attempts per batch before its rows are reported failed
+FLUSH_ATTEMPTS = 3
+# Failed sequence ranges and conflicting bars remembered for status lookups
+FAILURES_KEPT = 1000
+
+
+class WriteQueueFull(RuntimeError):
+    """Raised when the write-behind queue can not take another bar"""
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue of accepted bars, written in batches.
+
+    `submit` numbers each bar with a sequence number and returns at once
+    with a ticket for it; a background task takes up to `batch_size` bars, or whatever arrived
+    within `flush_interval` seconds of the first, and hands them to the
+    flush callback in one call. Bars are flushed in sequence order, so
+    "durable through N" covers every bar up to N except failed batches.
+
+    The flush callback may return the positions in the batch of bars it
+    did not write because their (symbol, datetime) was already stored;
+    those are reported as conflicts, like a 409 from a synchronous POST.
+    A batch whose flush raises is retried FLUSH_ATTEMPTS times before its
+    bars are reported failed. Bars still queued when the process dies are
+    lost: callers needing durability wait for their ticket.
+
+    Tickets are opaque strings naming the queue's `boot_id`, which is new
+    for every queue, so a ticket from another process or an earlier start
+    is unknown rather than mistaken for the bar that reused its number.
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.boot_id = secrets.token_hex(8)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._progress: Optional[asyncio.Condition] = None
+        self._flush: Optional[Callable[[List[TickerDataCreate]], Awaitable[Optional[Sequence[int]]]]] = None
+        self._failures: deque = deque(maxlen=FAILURES_KEPT)  # (first, last, error)
+        self._conflicts: OrderedDict = OrderedDict()  # sequence -> error
+        self._closing = False
+        self.last_sequence = 0
+        self.processed = 0  # highest sequence flushed or failed
+        self.flushed = 0
+        self.batches = 0
+        self.failed = 0
+        self.conflicts = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._closing
+
+    def start(self, flush: Callable[[List[TickerDataCreate]], Awaitable[Optional[Sequence[int]]]]) -> None:
+        """
+        Start the background flusher.
+
+        `flush` writes one batch of rows and returns the positions of rows
+        left unwritten because they conflict with stored bars, or None
+        """
+        if self.running or self.max_size <= 0:
+            return
+        self._flush = flush
+        self._closing = False
+        self._queue = asyncio.Queue(self.max_size)
+        self._progress = asyncio.Condition()
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, row: TickerDataCreate) -> str:
+        """
+        Queue one bar.
+
+        Returns:
+            Its ticket
+
+        Raises:
+            WriteQueueFull: if the queue is full or not running
+        """
+        if not self.running:
+            self.rejected += 1
+            raise WriteQueueFull("Write-behind queue is not running")
+        sequence = self.last_sequence + 1
+        try:
+            self._queue.put_nowait((sequence, row))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise WriteQueueFull(f"{self._queue.qsize()} bars already queued")
+        self.last_sequence = sequence
+        return self._ticket(sequence)
+
+    def _ticket(self, sequence: int) -> str:
+        return f"{self.boot_id}-{sequence}"
+
+    def _sequence(self, ticket: str) -> Optional[int]:
+        """The sequence number of a ticket of this queue, or None"""
+        boot_id, _, number = ticket.rpartition("-")
+        if boot_id != self.boot_id or not number.isdigit():
+            return None
+        sequence = int(number)
+        return sequence if 1 <= sequence <= self.last_sequence else None
+
+    async def _next_batch(self) -> List[Tuple[int, TickerDataCreate]]:
+        """Wait for a bar, then gather more until the batch is full or the interval ends"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[Tuple[int, TickerDataCreate]]) -> None:
+        rows = [row for _, row in batch]
+        error = None
+        conflicts = []
+        for attempt in range(1, FLUSH_ATTEMPTS + 1):
+            try:
+                conflicts = await self._flush(rows) or []
+                error = None
+                break
+            except Exception as e:
+                error = e
+                logger.warning(f"Write-behind flush of {len(rows)} bars failed (attempt {attempt}): {str(e)}")
+                if attempt < FLUSH_ATTEMPTS:
+                    await asyncio.sleep(0.1 * 2 ** attempt)
+
+        first, last = batch[0][0], batch[-1][0]
+        if error is None:
+            for position in conflicts:
+                sequence, row = batch[position]
+                self._conflicts[sequence] = f"{row.symbol} already has a bar at {row.datetime.isoformat()}"
+                if len(self._conflicts) > FAILURES_KEPT:
+                    self._conflicts.popitem(last=False)
+            self.flushed += len(rows) - len(conflicts)
+            self.conflicts += len(conflicts)
+        else:
+            logger.error(f"Dropping write-behind bars {first}..{last}: {str(error)}")
+            self._failures.append((first, last, str(error)))
+            self.failed += len(rows)
+        self.batches += 1
+        async with self._progress:
+            self.processed = last
+            self._progress.notify_all()
+
+    def status(self, ticket: str) -> Optional[Dict]:
+        """
+        What became of the bar `ticket` was issued for.
+
+        Returns:
+            `{"ticket", "status"}` with status pending, durable, conflict or
+            failed (plus `error`), or None for a ticket this queue did not
+            issue
+        """
+        sequence = self._sequence(ticket)
+        if sequence is None:
+            return None
+        if sequence > self.processed:
+            return {"ticket": ticket, "status": "pending"}
+        for first, last, error in self._failures:
+            if first <= sequence <= last:
+                return {"ticket": ticket, "status": "failed", "error": error}
+        if sequence in self._conflicts:
+            return {"ticket": ticket, "status": "conflict", "error": self._conflicts[sequence]}
+        return {"ticket": ticket, "status": "durable"}
+
+    async def wait(self, ticket: str, timeout: float) -> Optional[Dict]:
+        """`status` once the bar is written or failed, or after `timeout` seconds"""
+        sequence = self._sequence(ticket)
+        if self._progress is not None and sequence is not None:
+            async with self._progress:
+                try:
+                    await asyncio.wait_for(
+                        self._progress.wait_for(lambda: self.processed >= sequence), timeout
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        return self.status(ticket)
+
+    async def close(self) -> None:
+        """Write every queued bar, then stop the flusher, e.g. at shutdown"""
+        if not self.running:
+            return
+        self._closing = True  # new bars are refused from here on
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "last_sequence": self.last_sequence,
+            "processed_sequence": self.processed,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failed": self.failed,
+            "conflicts": self.conflicts,
+            "rejected": self.rejected
+        }
+
+
+write_queue = WriteBehindQueue(WRITE_QUEUE_SIZE, WRITE_BATCH_SIZE, WRITE_FLUSH_MS / 1000)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Response compression benchmark
+Compresses a full-history GET /data JSON body at several gzip levels and
+reports size, ratio and CPU time, then times a repeated hit on a cached
+EncodedBody, which reuses the compressed bytes.
+
+Usage: python benchmarks/bench_compression.py [rows]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import compression
+from app.compression import EncodedBody
+from app.responses import dumps, ticker_rows
+
+
+class Record:
+    """Stand-in for a Prisma TickerData model"""
+
+    def __init__(self, record_id, dt, close):
+        self.id = record_id
+        self.symbol = 'BENCH'
+        self.datetime = dt
+        self.open = self.high = self.low = self.close = close
+        self.volume = 1000 + record_id % 977
+
+
+def make_body(rows):
+    rng = np.random.default_rng(42)
+    closes = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.002, rows))), 2)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    records = [
+        Record(i + 1, start + timedelta(minutes=i), Decimal(f"{close:.2f}"))
+        for i, close in enumerate(closes)
+    ]
+    return dumps({"data": ticker_rows(records), "next_cursor": None})
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    body = make_body(rows)
+    print(f"body: {len(body) / 2**20:.1f} MiB ({rows} rows)")
+
+    for level in (1, 6, 9):
+        with mock.patch.object(compression, 'COMPRESS_LEVEL', level):
+            start = time.thread_time()
+            compressed = compression.compress(body, 'gzip')
+            cpu = time.thread_time() - start
+        print(f"gzip level {level}: {len(compressed) / 2**20:6.2f} MiB  "
+              f"ratio {len(body) / len(compressed):5.1f}  cpu {cpu * 1000:7.1f}ms")
+
+    cached = EncodedBody(body)
+    start = time.perf_counter()
+    cached.encode('gzip')
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    cached.encode('gzip')
+    hit = time.perf_counter() - start
+    print(f"cached entry: first request {first * 1000:.1f}ms, repeated hit {hit * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Backtest executor benchmark
+Measures event-loop stalls while a parameter sweep runs inline versus in
+the backtest process pool. The stall is the worst delay seen by a 10 ms
+ticker coroutine, standing in for other requests such as GET /data.
+
+Usage: python benchmarks/bench_executor.py [bars]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.executor import BacktestExecutor
+from app.strategy import sweep_performance
+
+TICK = 0.01
+PAIRS = [(s, l) for s in range(5, 31, 5) for l in range(20, 201, 20) if s < l]
+
+
+async def worst_stall(done: asyncio.Event) -> float:
+    """Largest extra delay of a periodic sleep until `done` is set"""
+    worst = 0.0
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - start - TICK)
+    return worst
+
+
+async def measure(executor, closes):
+    done = asyncio.Event()
+    ticker = asyncio.create_task(worst_stall(done))
+    await asyncio.sleep(TICK * 3)
+    start = time.perf_counter()
+    await executor.run(sweep_performance, closes, PAIRS)
+    elapsed = time.perf_counter() - start
+    done.set()
+    return elapsed, await ticker
+
+
+async def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    closes = np.round(100 + np.cumsum(rng.normal(0, 0.2, bars)), 2)
+
+    inline = BacktestExecutor(workers=0, queue_limit=1, offload_bars=0)
+    pooled = BacktestExecutor(workers=1, queue_limit=1, offload_bars=0)
+    try:
+        await pooled.run(sweep_performance, closes[:1000], PAIRS[:1])  # start the worker
+        for name, executor in (("inline", inline), ("pool", pooled)):
+            elapsed, stall = await measure(executor, closes)
+            print(f"{name:7s} sweep {elapsed:7.3f}s  worst loop stall {stall * 1000:8.1f} ms")
+    finally:
+        pooled.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
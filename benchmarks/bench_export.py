@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+GET /data format benchmark: JSON vs NDJSON vs Arrow vs Parquet
+Reports bytes on the wire, server-side encode time and client-side time to
+rebuild a pandas DataFrame.
+
+Usage: python benchmarks/bench_export.py [rows]
+       BASE_URL=http://localhost:8000 python benchmarks/bench_export.py
+
+With BASE_URL set, the formats are fetched from a running server instead
+and the timings are end to end (request to DataFrame).
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.export import ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, arrow_stream, parquet_stream
+from app.ingest import NDJSON_MEDIA_TYPE
+from app.models import TickerDataPage, TickerDataResponse
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BATCH_SIZE = 5000
+
+
+class Record:
+    """Stand-in for a Prisma TickerData row"""
+
+    def __init__(self, i):
+        price = Decimal(10000 + i % 997) / 100
+        self.id = i
+        self.symbol = 'BENCH'
+        self.datetime = datetime(2020, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i)
+        self.open = price
+        self.high = price + Decimal("0.50")
+        self.low = price - Decimal("0.25")
+        self.close = price + Decimal("0.25")
+        self.volume = 1000 + i % 100
+
+
+async def batches(records):
+    for start in range(0, len(records), BATCH_SIZE):
+        yield records[start:start + BATCH_SIZE]
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+def encode_json(records):
+    return TickerDataPage(data=records, next_cursor=None).model_dump_json().encode()
+
+
+def encode_ndjson(records):
+    return "".join(
+        TickerDataResponse.model_validate(r).model_dump_json() + "\n" for r in records
+    ).encode()
+
+
+def decode_json(body):
+    return pd.DataFrame(json.loads(body)['data'])
+
+
+def decode_ndjson(body):
+    return pd.read_json(io.BytesIO(body), lines=True)
+
+
+def decode_arrow(body):
+    return pa.ipc.open_stream(body).read_all().to_pandas()
+
+
+def decode_parquet(body):
+    return pq.read_table(io.BytesIO(body)).to_pandas()
+
+
+DECODERS = {
+    'application/json': decode_json,
+    NDJSON_MEDIA_TYPE: decode_ndjson,
+    ARROW_STREAM_MEDIA_TYPE: decode_arrow,
+    PARQUET_MEDIA_TYPE: decode_parquet
+}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def report(name, size, elapsed, rows, decode_time=None):
+    decode = f"{decode_time:>9.3f}s" if decode_time is not None else f"{'':>10}"
+    print(f"{name:<40} {size / 1e6:>9.2f} MB {elapsed:>9.3f}s {decode} {rows:>9}")
+
+
+def bench_local(rows):
+    records = [Record(i) for i in range(rows)]
+    encoders = {
+        'application/json': lambda: encode_json(records),
+        NDJSON_MEDIA_TYPE: lambda: encode_ndjson(records),
+        ARROW_STREAM_MEDIA_TYPE: lambda: asyncio.run(collect(arrow_stream(batches(records)))),
+        PARQUET_MEDIA_TYPE: lambda: asyncio.run(collect(parquet_stream(batches(records))))
+    }
+    print(f"{'format':<40} {'size':>12} {'encode':>10} {'decode':>10} {'rows':>9}")
+    for media_type, encode in encoders.items():
+        body, encode_time = timed(encode)
+        df, decode_time = timed(DECODERS[media_type], body)
+        report(media_type, len(body), encode_time, len(df), decode_time)
+
+
+def fetch_json_pages(client):
+    """Page through GET /data as JSON, returning total bytes and a DataFrame"""
+    size, frames, cursor = 0, [], None
+    while True:
+        params = {'limit': 10000, **({'cursor': cursor} if cursor else {})}
+        response = client.get("/data", params=params)
+        size += len(response.content)
+        frames.append(decode_json(response.content))
+        cursor = response.json()['next_cursor']
+        if cursor is None:
+            return size, pd.concat(frames, ignore_index=True)
+
+
+def bench_server(base_url):
+    import httpx
+
+    print(f"{'format':<40} {'size':>12} {'total':>10} {'':>10} {'rows':>9}")
+    with httpx.Client(base_url=base_url, timeout=None) as client:
+        (size, df), total_time = timed(fetch_json_pages, client)
+        report('application/json (paged)', size, total_time, len(df))
+        for media_type, decode in DECODERS.items():
+            if media_type == 'application/json':
+                continue
+            start = time.perf_counter()
+            response = client.get("/data", headers={"Accept": media_type})
+            df = decode(response.content)
+            report(media_type, len(response.content), time.perf_counter() - start, len(df))
+
+
+if __name__ == "__main__":
+    base_url = os.getenv("BASE_URL")
+    if base_url:
+        bench_server(base_url)
+    else:
+        bench_local(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Ingest throughput benchmark against a local PostgreSQL database
+Compares per-row Prisma creates, chunked create_many, COPY and the
+idempotent upsert path, including the cost of replaying a load.
+
+Usage: DATABASE_URL=postgresql://... python benchmarks/bench_ingest.py [rows]
+
+Rows are written under the BENCH symbol and removed afterwards, so existing
+data is left untouched.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prisma import Prisma
+
+from app.crud import create_many_records, upsert_records
+from app.pgcopy import copy_ticker_records, copy_available, use_copy
+
+BENCH_START = datetime(2100, 1, 1)
+BENCH_SYMBOL = 'BENCH'
+PER_ROW_LIMIT = 5000  # per-row inserts are slow, cap them to keep runs short
+
+
+def make_records(count):
+    """Generate synthetic minute bars"""
+    records = []
+    for i in range(count):
+        price = Decimal(100 + (i % 500)) / 4
+        records.append({
+            'symbol': BENCH_SYMBOL,
+            'datetime': BENCH_START + timedelta(minutes=i),
+            'open': price,
+            'high': price + Decimal("0.50"),
+            'low': price - Decimal("0.25"),
+            'close': price + Decimal("0.25"),
+            'volume': 1000 + i % 100
+        })
+    return records
+
+
+async def per_row(db, records):
+    for record in records:
+        await db.tickerdata.create(data=record)
+    return len(records)
+
+
+async def upsert(db, records):
+    written = await upsert_records(db, records)
+    return written[BENCH_SYMBOL]['inserted']
+
+
+async def upsert_twice(db, records):
+    """Load, then replay the same load; the replay should write nothing"""
+    count = await upsert(db, records)
+    start = time.perf_counter()
+    written = await upsert_records(db, records)
+    print(f"{'  replay of the same load':<24} {time.perf_counter() - start:>25.2f}s "
+          f"({written[BENCH_SYMBOL]['skipped']} skipped)")
+    return count
+
+
+async def cleanup(db):
+    await db.tickerdata.delete_many(where={'symbol': BENCH_SYMBOL})
+
+
+async def run(db, name, loader, records):
+    await cleanup(db)
+    start = time.perf_counter()
+    count = await loader(records)
+    elapsed = time.perf_counter() - start
+    await cleanup(db)
+    print(f"{name:<24} {count:>10} rows {elapsed:>9.2f}s {count / elapsed:>12,.0f} rows/sec")
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    records = make_records(rows)
+
+    db = Prisma()
+    await db.connect()
+    try:
+        print(f"{'method':<24} {'rows':>15} {'time':>10} {'throughput':>21}")
+        await run(db, "per-row create", lambda r: per_row(db, r), records[:PER_ROW_LIMIT])
+        await run(db, "create_many (chunked)", lambda r: create_many_records(db, r), records)
+        if copy_available():
+            await run(db, "COPY (asyncpg)", copy_ticker_records, records)
+        else:
+            print("COPY (asyncpg)           skipped: asyncpg not installed or COPY_THRESHOLD=0")
+        path = "COPY + staging" if use_copy(len(records)) else "batched"
+        await run(db, f"upsert ({path})", lambda r: upsert(db, r), records)
+        await run(db, "upsert + replay", lambda r: upsert_twice(db, r), records)
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
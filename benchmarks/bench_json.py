@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+JSON response benchmark
+Compares FastAPI's default path for a large response (response_model
+validation, serialization to JSON-compatible values, json.dumps) with
+FastJSONResponse, which encodes trusted rows directly, for a GET /data
+page, its NDJSON stream and a /strategy/performance result.
+
+Usage: python benchmarks/bench_json.py [rows]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models import StrategyPerformance, TickerDataPage, TickerDataResponse
+from app.responses import FastJSONResponse, ndjson_lines, orjson, ticker_rows
+
+
+class Record:
+    """Stand-in for a Prisma TickerData model"""
+
+    def __init__(self, record_id, dt, close):
+        self.id = record_id
+        self.symbol = 'BENCH'
+        self.datetime = dt
+        self.open = self.high = self.low = self.close = close
+        self.volume = 1000
+
+
+def make_records(rows):
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [
+        Record(i + 1, start + timedelta(minutes=i), Decimal(f"{100 + (i % 500) / 100:.2f}"))
+        for i in range(rows)
+    ]
+
+
+def make_performance(signals):
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return {
+        'total_trades': signals // 2, 'winning_trades': signals // 4, 'losing_trades': signals // 4,
+        'win_rate': 50.0, 'total_return': 12.5,
+        'signals': [
+            {
+                'datetime': str(start + timedelta(minutes=i)),
+                'signal': 'BUY' if i % 2 == 0 else 'SELL',
+                'price': 100.25 + i % 7,
+                'short_ma': 100.123456 + i % 5,
+                'long_ma': 100.654321 + i % 3
+            }
+            for i in range(signals)
+        ]
+    }
+
+
+def default_response(model, content) -> bytes:
+    """What FastAPI does with a dict returned from an endpoint with response_model"""
+    field = create_response_field(name="response", type_=model)
+    value = asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=True))
+    return JSONResponse(value).body
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def compare(name, rows, slow, fast):
+    slow_body, slow_time = slow
+    fast_body, fast_time = fast
+    print(f"{name:<22} default {slow_time * 1000:8.1f}ms  fast {fast_time * 1000:8.1f}ms  "
+          f"({slow_time / fast_time:.1f}x, {fast_time / rows * 1e9:.0f} ns/row)")
+    return slow_body, fast_body
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    records = make_records(rows)
+
+    slow, fast = compare(
+        f"page of {rows}", rows,
+        timed(default_response, TickerDataPage, {"data": records, "next_cursor": None}),
+        timed(lambda: FastJSONResponse({"data": ticker_rows(records), "next_cursor": None}).body)
+    )
+    assert slow == fast
+
+    slow, fast = compare(
+        f"ndjson of {rows}", rows,
+        timed(lambda: "".join(
+            TickerDataResponse.model_validate(r).model_dump_json() + "\n" for r in records
+        ).encode()),
+        timed(lambda: ndjson_lines(ticker_rows(records)))
+    )
+    assert slow == fast
+
+    performance = make_performance(rows)
+    compare(
+        f"{rows} signals", rows,
+        timed(default_response, StrategyPerformance, performance),
+        timed(lambda: FastJSONResponse(performance).body)
+    )
+
+
+if __name__ == "__main__":
+    main()
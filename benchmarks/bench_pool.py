@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Connection pool load test against a local PostgreSQL database
+Runs concurrent GET /data style page reads and POST /data/bulk style
+upserts for a fixed time at several pool sizes (connection_limit), and
+reports throughput, latency percentiles and the engine's pool gauges.
+
+Usage: DATABASE_URL=postgresql://... python benchmarks/bench_pool.py [clients] [seconds] [pool sizes...]
+
+Rows are written under the BENCH symbol and removed afterwards, so existing
+data is left untouched.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.crud import find_ticker_page, upsert_records
+from app.database import create_client, pool_stats
+
+BENCH_START = datetime(2100, 1, 1)
+BENCH_SYMBOL = 'BENCH'
+BULK_ROWS = 100  # rows per bulk request
+PAGE_ROWS = 100  # rows per page read
+SEED_ROWS = 10_000
+WRITE_SHARE = 4  # one client in this many sends bulk writes
+
+
+def make_records(first, count):
+    """Generate synthetic minute bars starting `first` minutes after BENCH_START"""
+    records = []
+    for i in range(first, first + count):
+        price = Decimal(100 + (i % 500)) / 4
+        records.append({
+            'symbol': BENCH_SYMBOL,
+            'datetime': BENCH_START + timedelta(minutes=i),
+            'open': price,
+            'high': price + Decimal("0.50"),
+            'low': price - Decimal("0.25"),
+            'close': price + Decimal("0.25"),
+            'volume': 1000 + i % 100
+        })
+    return records
+
+
+async def reader(db, deadline, latencies):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await find_ticker_page(db, limit=PAGE_ROWS, symbol=BENCH_SYMBOL)
+        latencies.append(time.perf_counter() - start)
+
+
+async def writer(db, client_id, deadline, latencies):
+    batch = 0
+    while time.perf_counter() < deadline:
+        # Each writer upserts its own range past the seeded rows
+        first = SEED_ROWS + (client_id * 1000 + batch % 1000) * BULK_ROWS
+        records = make_records(first, BULK_ROWS)
+        start = time.perf_counter()
+        await upsert_records(db, records)
+        latencies.append(time.perf_counter() - start)
+        batch += 1
+
+
+def summary(name, latencies, seconds):
+    if not latencies:
+        return f"{name:<6} no requests completed"
+    p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+    return f"{name:<6} {len(latencies) / seconds:>8,.0f} req/s  p50 {p50:>7.1f}ms  p95 {p95:>7.1f}ms"
+
+
+async def run(pool_size, clients, seconds):
+    db = create_client(pool_size)
+    await db.connect()
+    try:
+        reads, writes = [], []
+        deadline = time.perf_counter() + seconds
+        tasks = [
+            writer(db, i, deadline, writes) if i % WRITE_SHARE == 0 else reader(db, deadline, reads)
+            for i in range(clients)
+        ]
+        await asyncio.gather(*tasks)
+        stats = await pool_stats(db)
+        print(f"pool size {pool_size}")
+        print("  " + summary("reads", reads, seconds))
+        print("  " + summary("bulk", writes, seconds))
+        if 'pool_connections_open' in stats:
+            print(f"  connections open {stats['pool_connections_open']}, "
+                  f"queries waited {stats.get('client_queries_wait', 0)}")
+    finally:
+        await db.tickerdata.delete_many(where={
+            'symbol': BENCH_SYMBOL,
+            'datetime': {'gte': BENCH_START + timedelta(minutes=SEED_ROWS)}
+        })
+        await db.disconnect()
+
+
+async def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    pool_sizes = [int(size) for size in sys.argv[3:]] or [2, 5, 10, 20, 40]
+
+    db = create_client()
+    await db.connect()
+    try:
+        await db.tickerdata.delete_many(where={'symbol': BENCH_SYMBOL})
+        await upsert_records(db, make_records(0, SEED_ROWS))
+        writers = len(range(0, clients, WRITE_SHARE))
+        print(f"{clients} clients ({writers} sending {BULK_ROWS}-row bulk writes), {seconds:g}s per pool size")
+        for pool_size in pool_sizes:
+            await run(pool_size, clients, seconds)
+    finally:
+        await db.tickerdata.delete_many(where={'symbol': BENCH_SYMBOL})
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
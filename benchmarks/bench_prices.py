@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Price representation benchmark
+Compares the per-row cost of the series store's former float64 price
+columns with integer cents: converting the Decimal prices of Prisma
+records into columns, and turning GET /data pages back into Decimal
+prices. Also checks that every price survives the cents round trip
+exactly and that the strategy sees the same floats.
+
+Usage: python benchmarks/bench_prices.py [bars]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.prices import cents_array, decimal_lists
+from app.store import PRICE_COLUMNS, Series
+
+PAGE_SIZE = 1000
+
+
+class Record:
+    """Stand-in for a Prisma TickerData model"""
+
+    def __init__(self, record_id, dt, open_, high, low, close):
+        self.id = record_id
+        self.symbol = 'BENCH'
+        self.datetime = dt
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = 1000
+
+
+def make_records(bars):
+    """Random-walk minute bars with Decimal(10, 2) prices"""
+    rng = np.random.default_rng(42)
+    closes = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars))), 2)
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    spread = np.round(np.abs(rng.normal(0, 0.1, (2, bars))), 2)
+    highs = np.maximum(opens, closes) + spread[0]
+    lows = np.maximum(np.minimum(opens, closes) - spread[1], 0.01)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [
+        Record(i + 1, start + timedelta(minutes=i), *(Decimal(f"{p:.2f}") for p in prices))
+        for i, prices in enumerate(zip(opens, highs, lows, closes))
+    ]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def per_row(seconds, rows):
+    return f"{seconds / rows * 1e9:7.0f} ns/row"
+
+
+def float_columns(records):
+    """The former conversion: one float() per price into float64 columns"""
+    return {
+        name: np.array([float(getattr(r, name)) for r in records], dtype=np.float64)
+        for name in PRICE_COLUMNS
+    }
+
+
+def float_pages(columns, bars):
+    """The former response path: format every float price back into a Decimal"""
+    for lo in range(0, bars, PAGE_SIZE):
+        for name in PRICE_COLUMNS:
+            [Decimal(f"{value:.2f}") for value in columns[name][lo:lo + PAGE_SIZE].tolist()]
+
+
+def cents_pages(columns, bars):
+    for lo in range(0, bars, PAGE_SIZE):
+        decimal_lists({name: columns[name][lo:lo + PAGE_SIZE].tolist() for name in PRICE_COLUMNS})
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    records = make_records(bars)
+
+    floats, float_in = timed(float_columns, records)
+    cents, cents_in = timed(lambda: {name: cents_array([getattr(r, name) for r in records]) for name in PRICE_COLUMNS})
+    print(f"load prices, float64: {per_row(float_in, bars)}")
+    print(f"load prices, cents:   {per_row(cents_in, bars)}")
+
+    _, float_out = timed(float_pages, floats, bars)
+    _, cents_out = timed(cents_pages, cents, bars)
+    print(f"page prices, float64: {per_row(float_out, bars)}")
+    print(f"page prices, cents:   {per_row(cents_out, bars)}  ({float_out / cents_out:.1f}x)")
+
+    series = Series('BENCH', 0, 0)
+    series.append(records)
+
+    for name in PRICE_COLUMNS:
+        assert (series.prices(name) == floats[name]).all()
+    page = series.rows(bars // 2, bars // 2 + PAGE_SIZE)
+    expected = records[bars // 2:bars // 2 + PAGE_SIZE]
+    assert [str(r.high) for r in page] == [str(r.high) for r in expected]
+
+
+if __name__ == "__main__":
+    main()
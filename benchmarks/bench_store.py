@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Series store benchmark
+Compares reading a symbol's history as Prisma-like records (what each
+request did before) with reading it from an in-memory Series, for the
+strategy input and for one GET /data page, and times a warm start from a
+snapshot file against building the series from records.
+
+Usage: python benchmarks/bench_store.py [bars]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backtest import ticker_bars
+from app.snapshot import read_snapshot, write_snapshot
+from app.store import COLUMNS, Series, find_series_page
+from app.strategy import MovingAverageCrossoverStrategy, StrategyState
+
+PAGE_SIZE = 1000
+
+
+class Record:
+    """Stand-in for a Prisma TickerData model"""
+
+    def __init__(self, record_id, dt, close):
+        self.id = record_id
+        self.symbol = 'BENCH'
+        self.datetime = dt
+        self.open = self.high = self.low = self.close = close
+        self.volume = 1000
+
+
+def make_records(bars):
+    """Random-walk minute bars with Decimal prices"""
+    rng = np.random.default_rng(42)
+    closes = np.round(100 + np.cumsum(rng.normal(0, 0.2, bars)), 2)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [
+        Record(i + 1, start + timedelta(minutes=i), Decimal(f"{close:.2f}"))
+        for i, close in enumerate(closes)
+    ]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    records = make_records(bars)
+    strategy = MovingAverageCrossoverStrategy(10, 50)
+
+    series = Series('BENCH', 0, 0)
+    _, load_time = timed(series.append, records)
+    series.compact()
+    print(f"load:          {load_time:8.3f}s  ({bars} bars, {series.nbytes / 2**20:.1f} MiB)")
+
+    # Excludes the database fetch itself, which the store also saves
+    from_records, records_time = timed(lambda: strategy.advance(StrategyState(), ticker_bars(records)))
+    from_store, store_time = timed(lambda: strategy.advance(StrategyState(), series.bars()))
+    print(f"strategy, records: {records_time:8.3f}s")
+    print(f"strategy, store:   {store_time:8.3f}s  ({records_time / store_time:.1f}x)")
+    assert from_records.signals == from_store.signals
+
+    middle = records[bars // 2].datetime
+    page, page_time = timed(find_series_page, series, middle, None, None, PAGE_SIZE)
+    print(f"page of {PAGE_SIZE}:  {page_time * 1000:8.2f}ms")
+    assert [r.id for r in page[0]] == [r.id for r in records[bars // 2:bars // 2 + PAGE_SIZE]]
+
+    directory = tempfile.mkdtemp()
+    try:
+        columns = {name: series.column(name) for name in COLUMNS}
+        _, write_time = timed(write_snapshot, directory, 'BENCH', columns)
+
+        def warm_start():
+            snapshot = read_snapshot(directory, 'BENCH', COLUMNS)
+            mapped = Series.from_snapshot(snapshot, 0, 0)
+            mapped.column('close').sum()  # touch every close page
+            return mapped
+
+        mapped, map_time = timed(warm_start)
+        print(f"snapshot write: {write_time:8.3f}s")
+        print(f"snapshot map:   {map_time:8.3f}s  ({load_time / map_time:.0f}x faster than building from records)")
+        assert (mapped.column('close') == series.column('close')).all()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
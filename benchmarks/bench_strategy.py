@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Strategy signal generation benchmark
+Compares the vectorized generate_signals against the original per-bar loop.
+
+generate_signals compares the moving averages as exact integer-cent window
+sums, while the loop compares pandas' rounded rolling means, so where the
+two averages are exactly equal the loop resolves the tie by rounding noise.
+The script checks that every disagreement sits on such an exact tie.
+
+Usage: python benchmarks/bench_strategy.py [bars]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.strategy import MovingAverageCrossoverStrategy
+
+
+def loop_generate_signals(strategy, data):
+    """Original implementation: one iloc lookup per MA per bar"""
+    if len(data) < strategy.long_window:
+        return []
+
+    df = pd.DataFrame(data)
+    df['close'] = df['close'].astype(float)
+    df['short_ma'] = df['close'].rolling(window=strategy.short_window).mean()
+    df['long_ma'] = df['close'].rolling(window=strategy.long_window).mean()
+
+    signals = []
+    position = None
+    for i in range(strategy.long_window, len(df)):
+        prev_short = df['short_ma'].iloc[i-1]
+        prev_long = df['long_ma'].iloc[i-1]
+        curr_short = df['short_ma'].iloc[i]
+        curr_long = df['long_ma'].iloc[i]
+
+        if pd.isna(prev_short) or pd.isna(prev_long) or pd.isna(curr_short) or pd.isna(curr_long):
+            continue
+
+        signal = None
+        if prev_short <= prev_long and curr_short > curr_long and position != 'long':
+            signal = 'BUY'
+            position = 'long'
+        elif prev_short >= prev_long and curr_short < curr_long and position == 'long':
+            signal = 'SELL'
+            position = None
+
+        if signal:
+            signals.append({
+                'datetime': str(df['datetime'].iloc[i]),
+                'signal': signal,
+                'price': float(df['close'].iloc[i]),
+                'short_ma': float(curr_short),
+                'long_ma': float(curr_long)
+            })
+    return signals
+
+
+def make_data(bars):
+    """Random-walk minute bars"""
+    rng = np.random.default_rng(42)
+    closes = np.round(100 + np.cumsum(rng.normal(0, 0.2, bars)), 2)
+    start = datetime(2020, 1, 1)
+    return [
+        {'datetime': start + timedelta(minutes=i), 'close': float(close)}
+        for i, close in enumerate(closes)
+    ]
+
+
+def exact_ties(data, strategy):
+    """Bars where short MA == long MA exactly, computed in integer cents"""
+    cents = np.array([round(row['close'] * 100) for row in data], dtype=np.int64)
+    sums = np.concatenate([[0], np.cumsum(cents)])
+    bars = np.arange(strategy.long_window, len(data) + 1)
+    short_sum = sums[bars] - sums[bars - strategy.short_window]
+    long_sum = sums[bars] - sums[bars - strategy.long_window]
+    tied = short_sum * strategy.long_window == long_sum * strategy.short_window
+    return set((bars[tied] - 1).tolist())
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    data = make_data(bars)
+    strategy = MovingAverageCrossoverStrategy(short_window=10, long_window=20)
+
+    vectorized, vectorized_time = timed(strategy.generate_signals, data)
+    print(f"vectorized: {vectorized_time:8.3f}s  ({len(vectorized)} signals)")
+
+    looped, loop_time = timed(loop_generate_signals, strategy, data)
+    print(f"loop:       {loop_time:8.3f}s  ({len(looped)} signals)")
+
+    print(f"speedup:    {loop_time / vectorized_time:8.1f}x")
+
+    bar_of = {str(row['datetime']): i for i, row in enumerate(data)}
+    differing = {(s['datetime'], s['signal']) for s in vectorized} ^ {(s['datetime'], s['signal']) for s in looped}
+    ties = exact_ties(data, strategy)
+    on_ties = sum(1 for dt, _ in differing if bar_of[dt] in ties or bar_of[dt] - 1 in ties)
+    print(f"differing:  {len(differing):8d} signals, {on_ties} of them at exact MA ties")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Strategy parameter sweep benchmark
+Compares sweep_performance against evaluating every window pair separately,
+as repeated /strategy/performance calls would.
+
+Usage: python benchmarks/bench_sweep.py [bars]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.strategy import MovingAverageCrossoverStrategy, sweep_performance
+
+SHORT_WINDOWS = range(5, 31, 5)
+LONG_WINDOWS = range(20, 201, 20)
+
+
+def make_data(bars):
+    """Random-walk minute bars"""
+    rng = np.random.default_rng(42)
+    closes = np.round(100 + np.cumsum(rng.normal(0, 0.2, bars)), 2)
+    start = datetime(2020, 1, 1)
+    return [
+        {'datetime': start + timedelta(minutes=i), 'close': float(close)}
+        for i, close in enumerate(closes)
+    ]
+
+
+def per_pair(data, pairs):
+    """One full strategy evaluation per window pair"""
+    results = []
+    for short, long in pairs:
+        strategy = MovingAverageCrossoverStrategy(short, long)
+        results.append(strategy.calculate_performance(strategy.generate_signals(data)))
+    return results
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    data = make_data(bars)
+    closes = np.array([row['close'] for row in data])
+    pairs = [(s, l) for s in SHORT_WINDOWS for l in LONG_WINDOWS if s < l]
+
+    swept, sweep_time = timed(sweep_performance, closes, pairs)
+    print(f"sweep:    {sweep_time:8.3f}s  ({len(pairs)} pairs, {bars} bars)")
+
+    single, single_time = timed(per_pair, data, pairs)
+    print(f"per pair: {single_time:8.3f}s")
+
+    print(f"speedup:  {single_time / sweep_time:8.1f}x")
+
+    mismatches = sum(
+        1 for a, b in zip(swept, single)
+        if any(a[metric] != value for metric, value in b.items())
+    )
+    print(f"mismatched pairs: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
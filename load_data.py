@@ -1,16 +1,71 @@
 #!/usr/bin/env python3
 """
 Script to load data from Google Sheets into the database
-Usage: python load_data.py
+Usage: python load_data.py [symbol]
+
+Rows take their symbol from a `symbol` column when the sheet has one,
+otherwise from the argument (default: DEFAULT_SYMBOL).
 """
 
 import asyncio
+import sys
 import pandas as pd
 from datetime import datetime
 from prisma import Prisma
 import httpx
+from decimal import ROUND_HALF_UP, Decimal
+from typing import List, Tuple
+from pydantic import ValidationError
+
+from app.config import DEFAULT_SYMBOL
+from app.crud import upsert_ticker_data
+from app.ingest import format_validation_error
+from app.models import TickerDataCreate
+from app.pgcopy import use_copy
+
+CENT = Decimal("0.01")
+
+def sheet_price(value) -> Decimal:
+    """
+    A sheet price rounded to cents, as the Decimal(10, 2) columns round
+    it, so float noise such as 150.25000000001 does not reject the row
+    """
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+def sheet_rows(df: pd.DataFrame, symbol: str = DEFAULT_SYMBOL) -> Tuple[List[TickerDataCreate], List[Tuple[int, str]]]:
+    """
+    Validate sheet rows with the same rules as POST /data.
 
-async def load_data_from_csv():
+    A missing or malformed symbol (e.g. an empty cell, which pandas reads
+    as NaN) is rejected rather than stored as text. Prices are rounded to
+    cents first (see sheet_price).
+
+    Returns:
+        (valid rows, (index, error) for each rejected row)
+    """
+    rows, errors = [], []
+    for idx, row in df.iterrows():
+        try:
+            # Parse datetime - adjust column name based on actual CSV
+            # Common column names: 'datetime', 'timestamp', 'date', 'time'
+            dt = pd.to_datetime(row['datetime']).to_pydatetime()  # Adjust column name if needed
+
+            rows.append(TickerDataCreate(
+                symbol=row['symbol'] if 'symbol' in df.columns else symbol,
+                datetime=dt,
+                open=sheet_price(row['open']),
+                high=sheet_price(row['high']),
+                low=sheet_price(row['low']),
+                close=sheet_price(row['close']),
+                volume=row['volume']
+            ))
+        except ValidationError as e:
+            errors.append((idx, format_validation_error(e)))
+        except Exception as e:
+            errors.append((idx, str(e)))
+    return rows, errors
+
+async def load_data_from_csv(symbol: str = DEFAULT_SYMBOL):
     """Load data from Google Sheets CSV export"""
     
     # Initialize Prisma client
@@ -38,34 +93,24 @@ async def load_data_from_csv():
         print("\nFirst few rows:")
         print(df.head())
         
-        # Convert and insert data
-        print("\nInserting data into database...")
-        for idx, row in df.iterrows():
-            try:
-                # Parse datetime - adjust column name based on actual CSV
-                # Common column names: 'datetime', 'timestamp', 'date', 'time'
-                dt = pd.to_datetime(row['datetime'])  # Adjust column name if needed
-                
-                await db.tickerdata.create(
-                    data={
-                        'datetime': dt,
-                        'open': float(row['open']),
-                        'high': float(row['high']),
-                        'low': float(row['low']),
-                        'close': float(row['close']),
-                        'volume': int(row['volume'])
-                    }
-                )
-                
-                if (idx + 1) % 100 == 0:
-                    print(f"Inserted {idx + 1} records...")
-                    
-            except Exception as e:
-                print(f"Error inserting row {idx}: {e}")
-                print(f"Row data: {row}")
-                continue
+        # Validate rows; rejected ones are reported and left out
+        records, errors = sheet_rows(df, symbol)
+        for idx, error in errors:
+            print(f"Skipping row {idx}: {error}")
+        if errors:
+            print(f"\n{len(errors)} of {len(df)} rows rejected")
+        
+        # Upsert data: COPY + staging table for large loads, batched upserts
+        # otherwise. Bars already stored are skipped, so reruns are harmless.
+        method = "COPY" if use_copy(len(records)) else "batched upsert"
+        print(f"\nUpserting {len(records)} records into database via {method}...")
+        written = await upsert_ticker_data(db, records)
         
-        print(f"\nSuccessfully loaded {len(df)} records into database")
+        for symbol, counts in written.items():
+            print(
+                f"\n{symbol}: {counts['inserted']} inserted, "
+                f"{counts['updated']} updated, {counts['skipped']} skipped"
+            )
         
         # Verify data
         count = await db.tickerdata.count()
@@ -78,4 +123,4 @@ async def load_data_from_csv():
         await db.disconnect()
 
 if __name__ == "__main__":
-    asyncio.run(load_data_from_csv())
\ No newline at end of file
+    asyncio.run(load_data_from_csv(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SYMBOL))
\ No newline at end of file
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the precomputed rollup bars from stored ticker data
+Usage: python rebuild_rollups.py [symbol ...]
+
+Rebuilds every symbol when none is given. Run it once after adding the
+ticker_rollup table or changing ROLLUP_INTERVALS; ingest keeps rollups up
+to date from then on.
+"""
+
+import asyncio
+import sys
+from prisma import Prisma
+
+from app.crud import stored_symbols
+from app.resample import ROLLUPS
+from app.rollup import rebuild_rollups
+
+async def rebuild(symbols):
+    """Rebuild the rollups of `symbols`, or of every stored symbol"""
+    
+    db = Prisma()
+    await db.connect()
+    
+    try:
+        if not symbols:
+            symbols = await stored_symbols(db)
+        
+        sizes = ", ".join(f"{size}s" for size in ROLLUPS) or "none (ROLLUP_INTERVALS is empty)"
+        print(f"Rebuilding rollups of {len(symbols)} symbols; bucket sizes: {sizes}")
+        
+        for symbol in symbols:
+            windows = await rebuild_rollups(db, symbol)
+            count = await db.tickerrollup.count(where={'symbol': symbol})
+            print(f"{symbol}: {count} rollup bars from {windows} windows")
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        raise
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(rebuild(sys.argv[1:]))
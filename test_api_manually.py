@@ -67,8 +67,9 @@ def test_get_all_data():
     print_response(response, "TEST: Get All Data")
     
     if response.status_code == 200:
-        data = response.json()
-        print(f"\nTotal records: {len(data)}")
+        page = response.json()
+        print(f"\nRecords in page: {len(page['data'])}")
+        print(f"Next cursor: {page['next_cursor']}")
 
 def test_strategy_performance():
     """Test strategy performance endpoint"""
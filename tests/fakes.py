@@ -0,0 +1,149 @@
+"""In-memory stand-ins for the Prisma client, shared by the tests"""
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.crud import PROBE_SQL, SYMBOLS_SQL, VERSION_SQL
+
+
+def _comparable(value):
+    # Rows and filters mix naive (UTC) and aware datetimes
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+OPERATORS = {
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b
+}
+
+
+def matches(record, where) -> bool:
+    """Evaluate a Prisma `where` filter, as built by crud.ticker_where, on one record"""
+    for key, condition in (where or {}).items():
+        if key == 'AND':
+            if not all(matches(record, c) for c in condition):
+                return False
+        elif key == 'OR':
+            if not any(matches(record, c) for c in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = _comparable(getattr(record, key))
+            if not all(OPERATORS[op](value, _comparable(bound)) for op, bound in condition.items()):
+                return False
+        elif _comparable(getattr(record, key)) != _comparable(condition):
+            return False
+    return True
+
+
+class FakeRecord:
+    """A ticker_data row; open, high and low default to the close"""
+
+    def __init__(self, record_id, dt, close=100, symbol='AAPL', open=None, high=None, low=None, volume=100):
+        self.id = record_id
+        self.symbol = symbol
+        self.datetime = dt
+        self.close = Decimal(str(close))
+        self.open = self.close if open is None else Decimal(str(open))
+        self.high = self.close if high is None else Decimal(str(high))
+        self.low = self.close if low is None else Decimal(str(low))
+        self.volume = volume
+
+
+class FakeTickerActions:
+    """`client.tickerdata` over in-memory records, in (datetime, id) order"""
+
+    def __init__(self, records=None):
+        self.records = list(records or [])
+        self.batches = []   # create_many payloads
+        self.queries = []   # find_many arguments
+        self.fetched = []   # rows returned by each find_many
+
+    def select(self, where=None):
+        rows = sorted(self.records, key=lambda r: (_comparable(r.datetime), r.id))
+        return [r for r in rows if matches(r, where)]
+
+    async def find_many(self, where=None, order=None, take=None, distinct=None):
+        self.queries.append({'where': where, 'order': order, 'take': take})
+        rows = self.select(where)
+        if distinct:
+            rows = list({tuple(getattr(r, f) for f in distinct): r for r in rows}.values())
+        rows = rows[:take] if take is not None else rows
+        self.fetched.append(len(rows))
+        return rows
+
+    async def find_first(self, where=None, order=None):
+        rows = self.select(where)
+        if order and order.get('datetime') == 'desc':
+            rows.reverse()
+        return rows[0] if rows else None
+
+    async def find_unique(self, where):
+        return next((r for r in self.records if r.id == where['id']), None)
+
+    async def count(self, where=None):
+        return len(self.select(where))
+
+    async def create_many(self, data):
+        self.batches.append(data)
+        return len(data)
+
+
+class FakeTransaction:
+    def __init__(self, client):
+        self.client = client
+
+    async def __aenter__(self):
+        self.client.transactions += 1
+        return self.client
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeClient:
+    """
+    A Prisma client whose transactions run on the client itself.
+
+    `query_raw` runs the change counter statements of app.crud against
+    `versions` and lists the stored symbols; subclasses handle any other
+    SQL.
+    """
+
+    def __init__(self, records=None):
+        self.tickerdata = FakeTickerActions(records)
+        self.transactions = 0
+        self.versions = {}  # symbol -> {'version', 'epoch', 'latest'}
+
+    def tx(self, **kwargs):
+        return FakeTransaction(self)
+
+    def latest(self, symbol):
+        """Newest stored datetime of `symbol`"""
+        rows = self.tickerdata.select({'symbol': symbol})
+        return rows[-1].datetime if rows else None
+
+    def bump_version(self, symbol, rewrote=False, first=None):
+        """Apply VERSION_SQL"""
+        latest = self.latest(symbol)
+        row = self.versions.get(symbol)
+        if row is None:
+            row = self.versions[symbol] = {'symbol': symbol, 'version': 1, 'epoch': 0, 'latest': latest}
+            return row
+        if isinstance(first, str):
+            first = datetime.fromisoformat(first)
+        backdated = first is not None and row['latest'] is not None and _comparable(first) < _comparable(row['latest'])
+        row.update(version=row['version'] + 1, epoch=row['epoch'] + (rewrote or backdated), latest=latest)
+        return row
+
+    async def query_raw(self, query, *params):
+        if query == VERSION_SQL:
+            return [dict(self.bump_version(*params))]
+        if query == PROBE_SQL:
+            row = self.versions.get(params[0], {})
+            return [{'version': row.get('version'), 'epoch': row.get('epoch'), 'latest': self.latest(params[0])}]
+        if query == SYMBOLS_SQL:
+            return [{'symbol': symbol} for symbol in sorted({r.symbol for r in self.tickerdata.records})]
+        raise NotImplementedError(query)
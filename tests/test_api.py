@@ -36,8 +36,22 @@ class TestAPIEndpoints(unittest.TestCase):
             "volume": 1000000
         }
         response = self.client.post("/data", json=test_data)
-        # May fail if database not connected, but validates structure
-        self.assertIn(response.status_code, [201, 500])
+        # May fail if database not connected, or conflict with an earlier run
+        self.assertIn(response.status_code, [201, 409, 500])
+    
+    def test_create_data_invalid_symbol(self):
+        """Test creating data with a malformed symbol"""
+        test_data = {
+            "symbol": "NOT A SYMBOL",
+            "datetime": "2024-01-01T09:30:00",
+            "open": 150.25,
+            "high": 152.50,
+            "low": 149.75,
+            "close": 151.00,
+            "volume": 1000000
+        }
+        response = self.client.post("/data", json=test_data)
+        self.assertEqual(response.status_code, 422)
     
     def test_create_data_invalid_price(self):
         """Test creating data with negative price"""
@@ -104,11 +118,90 @@ class TestAPIEndpoints(unittest.TestCase):
         response = self.client.post("/data", json=test_data)
         self.assertEqual(response.status_code, 422)
     
+    def test_create_data_async(self):
+        """Test queueing a record for a background write"""
+        test_data = {
+            "datetime": "2024-01-01T09:31:00",
+            "open": 150.25,
+            "high": 152.50,
+            "low": 149.75,
+            "close": 151.00,
+            "volume": 1000000
+        }
+        response = self.client.post("/data?write=async", json=test_data)
+        # 503 when the write-behind queue is not running or full
+        self.assertIn(response.status_code, [202, 503])
+        if response.status_code == 202:
+            self.assertEqual(response.headers["location"], response.json()["status_url"])
+        else:
+            self.assertEqual(response.headers["retry-after"], "1")
+    
+    def test_create_data_invalid_write_mode(self):
+        """Test creating data rejects unknown write modes"""
+        response = self.client.post("/data?write=later", json={})
+        self.assertEqual(response.status_code, 422)
+    
+    def test_write_status_unknown_ticket(self):
+        """Test status of tickets never handed out by this process"""
+        for ticket in ["999999999", "0123456789abcdef-1"]:
+            response = self.client.get(f"/data/writes/{ticket}")
+            self.assertEqual(response.status_code, 404)
+    
     def test_get_all_data(self):
         """Test fetching all data"""
         response = self.client.get("/data")
         # May fail if database not connected
         self.assertIn(response.status_code, [200, 500])
+        if response.status_code == 200:
+            self.assertIn("data", response.json())
+            self.assertIn("next_cursor", response.json())
+    
+    def test_get_data_with_range_and_limit(self):
+        """Test fetching a time range page"""
+        response = self.client.get(
+            "/data",
+            params={"start": "2024-01-01T00:00:00", "end": "2024-02-01T00:00:00", "limit": 10}
+        )
+        self.assertIn(response.status_code, [200, 500])
+    
+    def test_get_data_for_symbol(self):
+        """Test fetching one symbol's data"""
+        response = self.client.get("/data", params={"symbol": "AAPL"})
+        self.assertIn(response.status_code, [200, 500])
+    
+    def test_get_data_invalid_symbol(self):
+        """Test fetching data with a malformed symbol"""
+        response = self.client.get("/data", params={"symbol": "A" * 17})
+        self.assertEqual(response.status_code, 422)
+    
+    def test_resample(self):
+        """Test resampling to hourly bars"""
+        response = self.client.get("/data/resample", params={"interval": "1h"})
+        self.assertIn(response.status_code, [200, 500])
+        if response.status_code == 200:
+            self.assertEqual(response.json()["interval"], "1h")
+    
+    def test_resample_invalid_interval(self):
+        """Test resampling rejects unsupported intervals"""
+        response = self.client.get("/data/resample", params={"interval": "2m"})
+        self.assertEqual(response.status_code, 422)
+    
+    def test_get_data_stream(self):
+        """Test NDJSON streaming mode"""
+        response = self.client.get("/data", headers={"Accept": "application/x-ndjson"})
+        self.assertIn(response.status_code, [200, 500])
+        if response.status_code == 200:
+            self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+    
+    def test_get_data_invalid_cursor(self):
+        """Test malformed cursors are rejected"""
+        response = self.client.get("/data", params={"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_get_data_limit_too_large(self):
+        """Test page size is bounded"""
+        response = self.client.get("/data", params={"limit": 10**9})
+        self.assertEqual(response.status_code, 422)
     
     def test_bulk_create_valid(self):
         """Test bulk creation with valid data"""
@@ -134,6 +227,100 @@ class TestAPIEndpoints(unittest.TestCase):
         }
         response = self.client.post("/data/bulk", json=test_data)
         self.assertIn(response.status_code, [201, 500])
+    
+    def test_bulk_create_replay_is_skipped(self):
+        """Test re-sending a bulk payload writes nothing"""
+        test_data = {
+            "data": [
+                {
+                    "symbol": "REPLAY",
+                    "datetime": "2024-01-01T09:30:00",
+                    "open": 150.25,
+                    "high": 152.50,
+                    "low": 149.75,
+                    "close": 151.00,
+                    "volume": 1000000
+                }
+            ]
+        }
+        self.client.post("/data/bulk", json=test_data)
+        response = self.client.post("/data/bulk", json=test_data)
+        self.assertIn(response.status_code, [201, 500])
+        if response.status_code == 201:
+            self.assertEqual(response.json()["count"], 0)
+            self.assertEqual(response.json()["skipped"], 1)
+    
+    def test_bulk_create_invalid_on_conflict(self):
+        """Test bulk creation rejects unknown conflict modes"""
+        response = self.client.post("/data/bulk?on_conflict=replace", json={"data": []})
+        self.assertEqual(response.status_code, 422)
+    
+    def test_stream_create_valid(self):
+        """Test NDJSON streaming ingest with valid and invalid lines"""
+        body = "\n".join([
+            '{"datetime": "2024-01-01T09:30:00", "open": 150.25, "high": 152.50, '
+            '"low": 149.75, "close": 151.00, "volume": 1000000}',
+            '{"datetime": "2024-01-01T10:30:00", "open": -1, "high": 153.00, '
+            '"low": 150.50, "close": 152.50, "volume": 1100000}'
+        ])
+        response = self.client.post(
+            "/data/stream",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        self.assertIn(response.status_code, [201, 500])
+        if response.status_code == 201:
+            self.assertEqual(response.json()["error_count"], 1)
+    
+    def test_stream_create_wrong_content_type(self):
+        """Test NDJSON streaming ingest rejects other media types"""
+        response = self.client.post("/data/stream", json={"data": []})
+        self.assertEqual(response.status_code, 415)
+    
+    def test_strategy_performance_window_out_of_range(self):
+        """Test performance rejects windows outside 1..STRATEGY_MAX_WINDOW"""
+        response = self.client.get("/strategy/performance", params={"short_window": 0})
+        self.assertEqual(response.status_code, 422)
+        response = self.client.get("/strategy/performance", params={"long_window": 10 ** 9})
+        self.assertEqual(response.status_code, 422)
+    
+    def test_strategy_performance_insufficient_data(self):
+        """Test performance needs at least long_window bars"""
+        response = self.client.get("/strategy/performance", params={"symbol": "NODATA", "long_window": 50})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_sweep_no_valid_pairs(self):
+        """Test sweep rejects ranges without short < long pairs"""
+        response = self.client.post("/strategy/sweep", json={
+            "short_window": {"start": 20, "stop": 30},
+            "long_window": {"start": 5, "stop": 10}
+        })
+        self.assertEqual(response.status_code, 422)
+    
+    def test_sweep_invalid_range(self):
+        """Test sweep rejects a range whose stop is before its start"""
+        response = self.client.post("/strategy/sweep", json={
+            "short_window": {"start": 10, "stop": 5},
+            "long_window": {"start": 20, "stop": 30}
+        })
+        self.assertEqual(response.status_code, 422)
+    
+    def test_sweep_too_many_pairs(self):
+        """Test sweep rejects ranges with more than SWEEP_MAX_PAIRS pairs"""
+        response = self.client.post("/strategy/sweep", json={
+            "short_window": {"start": 1, "stop": 100000},
+            "long_window": {"start": 1, "stop": 100000}
+        })
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("4999950000 window pairs", response.json()["detail"])
+    
+    def test_metrics(self):
+        """Test cache statistics endpoint"""
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("symbols", response.json()["data_versions"])
+        self.assertIn("hits", response.json()["strategy_cache"])
+        self.assertIn("rejected", response.json()["write_queue"])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import backtest
+from app.backtest import evaluate_strategy
+from app.cache import data_versions
+from app.store import SeriesStore
+from app.strategy import MovingAverageCrossoverStrategy
+from tests import fakes
+from tests.fakes import FakeRecord
+
+
+class FakeClient(fakes.FakeClient):
+    def append(self, prices, start, symbol='TEST'):
+        base_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        new = [
+            FakeRecord(len(self.tickerdata.records) + i + 1, base_date + timedelta(minutes=start + i), price, symbol)
+            for i, price in enumerate(prices)
+        ]
+        self.tickerdata.records.extend(new)
+        data_versions[symbol].bump(r.datetime for r in new)
+
+
+PRICES = [10, 9, 8, 7, 6, 5, 6, 7, 8, 9, 10, 11, 10, 9, 8, 7, 6, 5, 6, 7, 8, 9]
+
+
+class TestIncrementalEvaluation(unittest.IsolatedAsyncioTestCase):
+    """Test resumable strategy evaluation against the database"""
+
+    def setUp(self):
+        backtest.checkpoints.clear()
+        self.client = FakeClient()
+
+    def expected_signals(self, symbol='TEST'):
+        records = [r for r in self.client.tickerdata.records if r.symbol == symbol]
+        data = backtest.ticker_bars(sorted(records, key=lambda r: (r.datetime, r.id)))
+        return MovingAverageCrossoverStrategy(3, 5).generate_signals(data)
+
+    async def test_appended_bars_are_processed_incrementally(self):
+        self.client.append(PRICES[:12], start=0)
+        await evaluate_strategy(self.client, 'TEST', 3, 5, store=None)
+        self.client.append(PRICES[12:], start=12)
+
+        state = await evaluate_strategy(self.client, 'TEST', 3, 5, store=None)
+
+        self.assertEqual(self.client.tickerdata.fetched, [12, 10])
+        self.assertEqual(state.bars, len(PRICES))
+        self.assertEqual(state.signals, self.expected_signals())
+
+    async def test_historical_insert_forces_full_recompute(self):
+        self.client.append(PRICES[:12], start=100)
+        await evaluate_strategy(self.client, 'TEST', 3, 5, store=None)
+        self.client.append(PRICES[12:], start=0)
+
+        state = await evaluate_strategy(self.client, 'TEST', 3, 5, store=None)
+
+        self.assertEqual(self.client.tickerdata.fetched, [12, 22])
+        self.assertEqual(state.signals, self.expected_signals())
+
+    async def test_unchanged_data_fetches_nothing_new(self):
+        self.client.append(PRICES, start=0)
+        first = await evaluate_strategy(self.client, 'TEST', 3, 5, store=None)
+        second = await evaluate_strategy(self.client, 'TEST', 3, 5, store=None)
+
+        self.assertEqual(self.client.tickerdata.fetched, [22, 0])
+        self.assertEqual(first.signals, second.signals)
+
+    async def test_symbols_are_evaluated_separately(self):
+        self.client.append(PRICES, start=0)
+        await evaluate_strategy(self.client, 'TEST', 3, 5, store=None)
+        # A historical insert for another symbol leaves this checkpoint valid
+        self.client.append(PRICES[::-1], start=-100, symbol='OTHER')
+
+        other = await evaluate_strategy(self.client, 'OTHER', 3, 5, store=None)
+        state = await evaluate_strategy(self.client, 'TEST', 3, 5, store=None)
+
+        self.assertEqual(self.client.tickerdata.fetched, [22, 22, 0])
+        self.assertEqual(other.signals, self.expected_signals('OTHER'))
+        self.assertEqual(state.signals, self.expected_signals())
+
+
+    async def test_series_store_matches_database(self):
+        store = SeriesStore(1024 * 1024)
+        self.client.append(PRICES[:12], start=0, symbol='STORED')
+        await evaluate_strategy(self.client, 'STORED', 3, 5, store=store)
+        self.client.append(PRICES[12:], start=12, symbol='STORED')
+        self.client.tickerdata.fetched.clear()
+
+        state = await evaluate_strategy(self.client, 'STORED', 3, 5, store=store)
+
+        # Only the appended bars are read from the database, by the store
+        self.assertEqual(self.client.tickerdata.fetched, [10])
+        self.assertEqual(state.bars, len(PRICES))
+        self.assertEqual(state.signals, self.expected_signals('STORED'))
+
+    async def test_bars_are_counted_per_symbol(self):
+        self.client.append(PRICES[:12], start=0)
+        self.client.append(PRICES[:4], start=0, symbol='OTHER')
+
+        self.assertEqual(await backtest.count_bars(self.client, 'TEST', store=None), 12)
+        self.assertEqual(await backtest.count_bars(self.client, 'OTHER', store=SeriesStore(1024 * 1024)), 4)
+        self.assertEqual(await backtest.count_bars(self.client, 'NONE', store=None), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
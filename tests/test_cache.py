@@ -0,0 +1,182 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache import DataVersion, DataVersions, LRUCache, SingleFlight
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test the bounded LRU cache"""
+
+    def test_get_and_put(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_zero_size_disables_cache(self):
+        cache = LRUCache(maxsize=0)
+        cache.put('a', 1)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_stats(self):
+        cache = LRUCache(maxsize=4)
+        cache.put('a', 1)
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+
+        stats = cache.stats()
+
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.6667)
+
+
+class TestDataVersion(unittest.TestCase):
+    """Test the data version counter"""
+
+    def test_bump_invalidates_versioned_keys(self):
+        version = DataVersion()
+        cache = LRUCache(maxsize=4)
+        cache.put((10, 20, version.value), 'result')
+
+        version.bump()
+
+        self.assertIsNone(cache.get((10, 20, version.value)))
+
+    def test_appends_keep_epoch(self):
+        version = DataVersion()
+        version.observe(datetime(2024, 1, 1, 10, 0))
+        epoch = version.epoch
+
+        version.bump([datetime(2024, 1, 1, 10, 0), datetime(2024, 1, 1, 10, 1)])
+
+        self.assertEqual(version.epoch, epoch)
+        self.assertEqual(version.latest, datetime(2024, 1, 1, 10, 1, tzinfo=timezone.utc))
+
+    def test_historical_insert_bumps_epoch(self):
+        version = DataVersion()
+        version.observe(datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc))
+        epoch = version.epoch
+
+        version.bump([datetime(2024, 1, 1, 9, 0)])
+
+        self.assertEqual(version.epoch, epoch + 1)
+
+    def test_delete_bumps_epoch_and_forgets_latest(self):
+        version = DataVersion()
+        version.observe(datetime(2024, 1, 1))
+        epoch = version.epoch
+
+        version.bump()
+
+        self.assertEqual(version.epoch, epoch + 1)
+        self.assertIsNone(version.latest)
+
+    def test_unknown_history_bumps_epoch(self):
+        version = DataVersion()
+        version.bump([datetime(2024, 1, 1)])
+
+        self.assertEqual(version.epoch, 1)
+
+
+
+class TestDataVersions(unittest.TestCase):
+    """Test per-symbol data versions"""
+
+    def test_symbols_are_independent(self):
+        versions = DataVersions()
+        versions['AAPL'].bump([datetime(2024, 1, 1)])
+
+        self.assertEqual(versions['AAPL'].value, 1)
+        self.assertEqual(versions['MSFT'].value, 0)
+
+    def test_bump_all(self):
+        versions = DataVersions()
+        versions['AAPL'].bump([datetime(2024, 1, 1)])
+        epoch = versions['MSFT'].epoch
+
+        versions.bump_all()
+
+        self.assertEqual(versions['AAPL'].value, 2)
+        self.assertEqual(versions['MSFT'].epoch, epoch + 1)
+        self.assertEqual(versions.stats(), {'symbols': 2, 'writes': 3})
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Test request coalescing"""
+
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.started = 0
+
+    async def compute(self, result='result'):
+        self.started += 1
+        await asyncio.sleep(0.01)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def test_concurrent_calls_share_one_run(self):
+        results = await asyncio.gather(*(self.flights.run('key', self.compute) for _ in range(50)))
+
+        self.assertEqual(results, ['result'] * 50)
+        self.assertEqual(self.started, 1)
+        self.assertEqual(self.flights.stats(), {'in_flight': 0, 'calls': 1, 'coalesced': 49})
+
+    async def test_different_keys_run_separately(self):
+        await asyncio.gather(self.flights.run('a', self.compute), self.flights.run('b', self.compute))
+        self.assertEqual(self.started, 2)
+
+    async def test_later_calls_run_again(self):
+        await self.flights.run('key', self.compute)
+        await self.flights.run('key', self.compute)
+        self.assertEqual(self.started, 2)
+
+    async def test_exception_is_shared(self):
+        error = ValueError("no data")
+        results = await asyncio.gather(
+            *(self.flights.run('key', lambda: self.compute(error)) for _ in range(3)),
+            return_exceptions=True
+        )
+
+        self.assertEqual(results, [error] * 3)
+        self.assertEqual(self.started, 1)
+
+    async def test_cancelled_caller_leaves_call_running(self):
+        first = asyncio.ensure_future(self.flights.run('key', self.compute))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(self.flights.run('key', self.compute))
+        await asyncio.sleep(0)
+
+        first.cancel()
+
+        self.assertEqual(await second, 'result')
+        self.assertEqual(self.started, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import gzip
+import unittest
+from unittest import mock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import compression
+from app.compression import CompressionStats, EncodedBody, compress_stream, negotiate
+
+BODY = b'{"close":"151.00","volume":1000},' * 100
+
+
+class TestNegotiate(unittest.TestCase):
+    """Test Accept-Encoding handling"""
+
+    def test_gzip_accepted(self):
+        self.assertEqual(negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(negotiate("*"), "gzip")
+
+    def test_not_accepted(self):
+        self.assertIsNone(negotiate(""))
+        self.assertIsNone(negotiate("identity"))
+        self.assertIsNone(negotiate("gzip;q=0, deflate"))
+        self.assertIsNone(negotiate("*;q=0"))
+
+    def test_quality_values(self):
+        self.assertEqual(negotiate("deflate, gzip; q=0.5"), "gzip")
+
+    def test_disabled(self):
+        with mock.patch.object(compression, 'COMPRESS_LEVEL', 0):
+            self.assertIsNone(negotiate("gzip"))
+
+
+class TestEncodedBody(unittest.TestCase):
+    """Test compressing and keeping response bodies"""
+
+    def setUp(self):
+        self.stats = CompressionStats()
+        patcher = mock.patch.object(compression, 'compression_stats', self.stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_compressed_once(self):
+        body = EncodedBody(BODY)
+
+        first, encoding = body.encode("gzip")
+        again, _ = body.encode("gzip")
+
+        self.assertEqual(encoding, "gzip")
+        self.assertEqual(gzip.decompress(first), BODY)
+        self.assertIs(again, first)
+        self.assertEqual(self.stats.responses, 1)
+        self.assertEqual(self.stats.precompressed_hits, 1)
+        self.assertEqual(self.stats.bytes_in, len(BODY))
+        self.assertGreater(self.stats.stats()['ratio'], 10)
+
+    def test_small_body_is_sent_as_is(self):
+        self.assertEqual(EncodedBody(b'{}').encode("gzip"), (b'{}', None))
+        self.assertEqual(self.stats.responses, 0)
+
+    def test_no_encoding(self):
+        self.assertEqual(EncodedBody(BODY).encode(None), (BODY, None))
+
+
+class TestCompressStream(unittest.IsolatedAsyncioTestCase):
+    """Test chunked compression"""
+
+    async def chunks(self, count):
+        for _ in range(count):
+            yield BODY
+
+    async def test_every_chunk_is_decodable(self):
+        decoder = compression.zlib.decompressobj(31)
+        received = []
+        async for chunk in compress_stream(self.chunks(3), "gzip"):
+            received.append(decoder.decompress(chunk))
+
+        self.assertEqual(received[:3], [BODY] * 3)
+        self.assertEqual(b"".join(received), BODY * 3)
+        self.assertTrue(decoder.eof)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import sys
+import os
+
+from starlette.requests import Request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import conditional
+from app.cache import data_versions
+from app.conditional import is_not_modified, validators
+
+
+def make_request(**headers):
+    return Request({
+        'type': 'http',
+        'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()]
+    })
+
+
+class TestValidators(unittest.TestCase):
+    """Test data-version validators"""
+
+    def test_etag_changes_on_write_only(self):
+        before = validators('COND', 'limit=10')
+
+        self.assertEqual(validators('COND', 'limit=10'), before)
+        data_versions['COND'].bump([datetime(2024, 1, 1)])
+        self.assertNotEqual(validators('COND', 'limit=10')['ETag'], before['ETag'])
+
+    def test_etag_changes_with_database_source(self):
+        version = data_versions['SHARED']
+        version.sync((10, 0))
+        before = validators('SHARED')['ETag']
+
+        version.sync((11, 0))  # written outside this process
+        self.assertNotEqual(validators('SHARED')['ETag'], before)
+
+    def test_etag_is_shared_across_processes(self):
+        version = data_versions['SHARED']
+        version.sync((7, 2))
+        before = validators('SHARED')['ETag']
+
+        # Another worker, or a restart: own counters and boot ID, same database
+        with mock.patch.object(conditional, 'BOOT_ID', 'restarted'):
+            version.bump()
+            version.sync((7, 2))
+            self.assertEqual(validators('SHARED')['ETag'], before)
+
+    def test_etag_without_known_source_is_per_process(self):
+        before = validators('COND')['ETag']
+        with mock.patch.object(conditional, 'BOOT_ID', 'restarted'):
+            self.assertNotEqual(validators('COND')['ETag'], before)
+
+    def test_etag_depends_on_variant_and_symbol(self):
+        tag = validators('COND', 'limit=10')['ETag']
+
+        self.assertNotEqual(validators('COND', 'limit=20')['ETag'], tag)
+        self.assertNotEqual(validators('OTHER', 'limit=10')['ETag'], tag)
+        self.assertTrue(tag.startswith('W/"'))
+
+    def test_last_modified_is_an_http_date(self):
+        headers = validators('COND')
+        self.assertTrue(headers['Last-Modified'].endswith(' GMT'))
+        self.assertEqual(headers['Cache-Control'], 'no-cache')
+
+
+class TestPreconditions(unittest.TestCase):
+    """Test If-None-Match and If-Modified-Since handling"""
+
+    def setUp(self):
+        self.headers = validators('PRE')
+
+    def test_matching_etag(self):
+        tag = self.headers['ETag']
+        self.assertTrue(is_not_modified(make_request(if_none_match=tag), self.headers))
+        self.assertTrue(is_not_modified(make_request(if_none_match=f'"x", {tag[2:]}'), self.headers))
+        self.assertTrue(is_not_modified(make_request(if_none_match='*'), self.headers))
+
+    def test_stale_etag(self):
+        self.assertFalse(is_not_modified(make_request(if_none_match='W/"stale"'), self.headers))
+        self.assertFalse(is_not_modified(make_request(), self.headers))
+
+    def test_if_none_match_takes_precedence(self):
+        request = make_request(if_none_match='W/"stale"', if_modified_since=self.headers['Last-Modified'])
+        self.assertFalse(is_not_modified(request, self.headers))
+
+    def test_if_modified_since(self):
+        later = format_datetime(datetime.now(timezone.utc) + timedelta(hours=1), usegmt=True)
+        earlier = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+
+        self.assertTrue(is_not_modified(make_request(if_modified_since=later), self.headers))
+        self.assertFalse(is_not_modified(make_request(if_modified_since=earlier), self.headers))
+        self.assertFalse(is_not_modified(make_request(if_modified_since='yesterday'), self.headers))
+
+
+if __name__ == '__main__':
+    unittest.main()
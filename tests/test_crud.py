@@ -0,0 +1,342 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.crud import (
+    chunked,
+    create_many_records,
+    decode_cursor,
+    dedupe_records,
+    encode_cursor,
+    find_ticker_page,
+    group_by_symbol,
+    insert_ticker_data,
+    iter_ticker_batches,
+    ticker_record,
+    ticker_where,
+    upsert_ticker_data,
+    upsert_values
+)
+from app.models import TickerDataCreate
+from app.pgcopy import asyncpg_dsn, copy_row, upsert_sql
+from tests import fakes
+from tests.fakes import FakeRecord
+
+
+class FakeClient(fakes.FakeClient):
+    def __init__(self, records=None):
+        super().__init__(records)
+        self.stored = {}
+        self.statements = []
+        self.refreshes = []
+        self.locked = []
+
+    def latest(self, symbol):
+        stored = [dt for key_symbol, dt in self.stored if key_symbol == symbol]
+        return datetime.fromisoformat(max(stored)) if stored else None
+
+    async def query_raw(self, query, *params):
+        """Apply an upsert_sql statement to `stored`, keyed by (symbol, datetime)"""
+        if 'ticker_version' in query:
+            return await super().query_raw(query, *params)
+        self.statements.append((query, params))
+        ignore = 'DO NOTHING' in query
+        keys = 'inserted_at' in query
+        results = {}
+        for start in range(0, len(params), 7):
+            dt, *values, symbol = params[start:start + 7]
+            key = (symbol, dt)
+            if key not in self.stored:
+                kind = 'inserted'
+            elif ignore or self.stored[key] == values:
+                continue
+            else:
+                kind = 'updated'
+            self.stored[key] = values
+            row = results.setdefault(symbol, {'symbol': symbol, 'inserted': 0, 'updated': 0, 'first': dt, 'last': dt})
+            row[kind] += 1
+            if keys and kind == 'inserted':
+                row.setdefault('inserted_at', []).append(dt)
+            row['first'], row['last'] = min(row['first'], dt), max(row['last'], dt)
+        return list(results.values())
+
+    async def execute_raw(self, query, *params):
+        """Record ingest locks and rollup refreshes"""
+        if 'pg_advisory_xact_lock' in query:
+            self.locked.append((params[0], len(self.statements)))
+        else:
+            self.refreshes.append(params)
+        return 0
+
+
+def make_rows(count, symbol='AAPL'):
+    base_date = datetime(2024, 1, 1, 9, 30)
+    return [
+        TickerDataCreate(
+            symbol=symbol,
+            datetime=base_date + timedelta(minutes=i),
+            open=Decimal("150.25"),
+            high=Decimal("152.50"),
+            low=Decimal("149.75"),
+            close=Decimal("151.00"),
+            volume=1000
+        )
+        for i in range(count)
+    ]
+
+
+class TestChunked(unittest.TestCase):
+    """Test chunking helper"""
+
+    def test_chunked_splits_evenly(self):
+        chunks = list(chunked([1, 2, 3, 4, 5], 2))
+        self.assertEqual(chunks, [[1, 2], [3, 4], [5]])
+
+    def test_chunked_rejects_non_positive_size(self):
+        with self.assertRaises(ValueError):
+            list(chunked([1, 2], 0))
+
+
+class TestBulkCreate(unittest.IsolatedAsyncioTestCase):
+    """Test batched bulk insert"""
+
+    async def test_rows_are_inserted_in_chunks(self):
+        client = FakeClient()
+        records = [ticker_record(row) for row in make_rows(25)]
+        count = await create_many_records(client, records, chunk_size=10)
+
+        self.assertEqual(count, 25)
+        self.assertEqual([len(b) for b in client.tickerdata.batches], [10, 10, 5])
+        self.assertEqual(client.transactions, 1)
+
+    async def test_rows_are_grouped_by_symbol(self):
+        client = FakeClient()
+        rows = [row for pair in zip(make_rows(3, 'AAPL'), make_rows(3, 'MSFT')) for row in pair]
+        await upsert_ticker_data(client, rows)
+
+        _, params = client.statements[0]
+        self.assertEqual(list(params[6::7]), ['AAPL'] * 3 + ['MSFT'] * 3)
+
+    def test_group_by_symbol_keeps_row_order(self):
+        rows = make_rows(2, 'MSFT') + make_rows(2, 'AAPL') + make_rows(1, 'MSFT')
+        groups = group_by_symbol(rows)
+
+        self.assertEqual(list(groups), ['MSFT', 'AAPL'])
+        self.assertEqual([r.datetime.minute for r in groups['MSFT']], [30, 31, 30])
+
+    async def test_empty_payload_skips_transaction(self):
+        client = FakeClient()
+        written = await upsert_ticker_data(client, [])
+
+        self.assertEqual(written, {})
+        self.assertEqual(client.transactions, 0)
+
+
+class TestUpsert(unittest.IsolatedAsyncioTestCase):
+    """Test idempotent bulk ingest"""
+
+    async def test_replay_is_skipped(self):
+        client = FakeClient()
+        rows = make_rows(5)
+        first = await upsert_ticker_data(client, rows)
+        replay = await upsert_ticker_data(client, rows)
+
+        self.assertEqual(first['AAPL']['inserted'], 5)
+        self.assertEqual(replay['AAPL'], {
+            'inserted': 0, 'updated': 0, 'skipped': 5, 'first': None, 'last': None
+        })
+
+    async def test_changed_bars_are_updated_or_ignored(self):
+        client = FakeClient()
+        await upsert_ticker_data(client, make_rows(3))
+        changed = make_rows(4)
+        changed[1] = changed[1].model_copy(update={'close': Decimal("151.50")})
+
+        ignored = await upsert_ticker_data(client, changed, on_conflict='ignore')
+        changed[2] = changed[2].model_copy(update={'close': Decimal("151.50")})
+        updated = await upsert_ticker_data(client, changed)
+
+        self.assertEqual((ignored['AAPL']['inserted'], ignored['AAPL']['skipped']), (1, 3))
+        self.assertEqual((updated['AAPL']['updated'], updated['AAPL']['skipped']), (2, 2))
+        self.assertIn('DO NOTHING', client.statements[1][0])
+
+    async def test_rollups_refresh_written_range_only(self):
+        client = FakeClient()
+        rows = make_rows(5)
+        await upsert_ticker_data(client, rows)
+        refreshed = len(client.refreshes)
+        await upsert_ticker_data(client, rows)
+
+        self.assertEqual(refreshed, 3)  # 5m, 1h and 1d buckets
+        self.assertEqual(client.refreshes[0], ('AAPL', '2024-01-01T09:30:00', '2024-01-01T09:35:00'))
+        self.assertEqual(len(client.refreshes), refreshed)
+
+    async def test_writes_bump_change_counters(self):
+        client = FakeClient()
+        rows = make_rows(6)
+
+        appended = [
+            (await upsert_ticker_data(client, rows[2:4]))['AAPL']['version'],
+            (await upsert_ticker_data(client, rows[4:]))['AAPL']['version']
+        ]
+        replay = await upsert_ticker_data(client, rows[4:])
+        backdated = await upsert_ticker_data(client, rows[:1])
+        changed = await upsert_ticker_data(client, [rows[5].model_copy(update={'close': Decimal("160.00")})])
+
+        self.assertEqual(appended, [(1, 0), (2, 0)])
+        self.assertNotIn('version', replay['AAPL'])
+        self.assertEqual(backdated['AAPL']['version'], (3, 1))
+        self.assertEqual(changed['AAPL']['version'], (4, 2))
+
+    async def test_symbols_are_locked_before_writing(self):
+        client = FakeClient()
+
+        await upsert_ticker_data(client, make_rows(2, 'MSFT') + make_rows(2, 'AAPL'))
+        await insert_ticker_data(client, make_rows(3, 'AAPL'))
+
+        # (symbol, upsert statements run before the lock), in sorted order
+        self.assertEqual(client.locked, [('AAPL', 0), ('MSFT', 0), ('AAPL', 1)])
+
+    async def test_duplicates_in_one_payload_keep_the_last(self):
+        client = FakeClient()
+        rows = make_rows(2)
+        later = rows[0].model_copy(update={'close': Decimal("151.50")})
+
+        written = await upsert_ticker_data(client, rows + [later])
+
+        self.assertEqual(written['AAPL']['inserted'], 2)
+        self.assertEqual(written['AAPL']['skipped'], 1)
+        self.assertEqual(len(client.statements[0][1]), 14)
+        self.assertEqual(client.statements[0][1][4], "151.50")
+
+    async def test_insert_reports_stored_and_repeated_bars_as_conflicts(self):
+        client = FakeClient()
+        stored = make_rows(2)
+        await upsert_ticker_data(client, stored)
+        changed = stored[1].model_copy(update={'close': Decimal("160.00")})
+        fresh = make_rows(4)[2:]
+        repeat = fresh[0].model_copy(update={'close': Decimal("155.00")})
+
+        written, conflicts = await insert_ticker_data(client, [changed, fresh[0], repeat, fresh[1]])
+
+        self.assertEqual(conflicts, [0, 2])
+        self.assertEqual(written['AAPL']['inserted'], 2)
+        self.assertEqual(client.stored[('AAPL', '2024-01-01T09:31:00')][3], "151.00")
+        self.assertEqual(client.stored[('AAPL', '2024-01-01T09:32:00')][3], "151.00")
+        self.assertIn('DO NOTHING', client.statements[-1][0])
+
+    def test_dedupe_matches_equal_instants(self):
+        record = ticker_record(make_rows(1)[0])
+        aware = dict(record, datetime=datetime(2024, 1, 1, 11, 30, tzinfo=timezone(timedelta(hours=2))))
+
+        self.assertEqual(dedupe_records([record, aware]), [aware])
+
+    def test_values_are_numbered_and_cast(self):
+        records = [ticker_record(row) for row in make_rows(2)]
+        source, params = upsert_values(records)
+
+        self.assertTrue(source.startswith("VALUES ($1::timestamp, $2::numeric"))
+        self.assertIn("$14::text)", source)
+        self.assertEqual(params[0], "2024-01-01T09:30:00")
+        self.assertEqual(len(params), 14)
+
+    def test_sql_rejects_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            upsert_sql("VALUES ($1)", on_conflict='replace')
+
+
+class TestKeysetPagination(unittest.IsolatedAsyncioTestCase):
+    """Test cursor encoding and page fetching"""
+
+    def test_cursor_round_trip(self):
+        dt = datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor(dt, 42)), (dt, 42))
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_where_combines_range_and_keyset(self):
+        start = datetime(2024, 1, 1)
+        end = datetime(2024, 2, 1)
+        where = ticker_where(start, end, (start, 7))
+
+        self.assertEqual(where['AND'][0], {'datetime': {'gte': start}})
+        self.assertEqual(where['AND'][1], {'datetime': {'lt': end}})
+        self.assertEqual(where['AND'][2]['OR'][1], {'datetime': start, 'id': {'gt': 7}})
+
+    def test_where_without_filters(self):
+        self.assertEqual(ticker_where(), {})
+
+    def test_where_scopes_symbol(self):
+        where = ticker_where(start=datetime(2024, 1, 1), symbol='AAPL')
+        self.assertEqual(where['AND'][0], {'symbol': 'AAPL'})
+
+    async def test_page_returns_cursor_when_more_rows_exist(self):
+        base_date = datetime(2024, 1, 1)
+        records = [FakeRecord(i, base_date + timedelta(minutes=i)) for i in range(5)]
+        client = FakeClient(records)
+
+        page, next_cursor = await find_ticker_page(client, limit=3)
+
+        self.assertEqual([r.id for r in page], [0, 1, 2])
+        self.assertEqual(client.tickerdata.queries[0]['take'], 4)
+        self.assertEqual(decode_cursor(next_cursor), (records[2].datetime, 2))
+
+    async def test_last_page_has_no_cursor(self):
+        records = [FakeRecord(1, datetime(2024, 1, 1))]
+        page, next_cursor = await find_ticker_page(FakeClient(records), limit=3)
+
+        self.assertEqual(len(page), 1)
+        self.assertIsNone(next_cursor)
+
+
+class TestBatchIteration(unittest.IsolatedAsyncioTestCase):
+    """Test streaming row batches"""
+
+    def make_client(self, count):
+        base_date = datetime(2024, 1, 1)
+        return FakeClient([FakeRecord(i, base_date + timedelta(minutes=i)) for i in range(count)])
+
+    async def collect(self, client, **kwargs):
+        return [[r.id for r in batch] async for batch in iter_ticker_batches(client, **kwargs)]
+
+    async def test_batches_cover_all_rows(self):
+        batches = await self.collect(self.make_client(7), batch_size=3)
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+
+    async def test_limit_stops_stream(self):
+        batches = await self.collect(self.make_client(7), batch_size=3, limit=4)
+        self.assertEqual(batches, [[0, 1, 2], [3]])
+
+    async def test_empty_range(self):
+        self.assertEqual(await self.collect(self.make_client(0), batch_size=3), [])
+
+
+class TestCopyHelpers(unittest.TestCase):
+    """Test COPY fast path helpers"""
+
+    def test_dsn_drops_prisma_only_params(self):
+        dsn, schema = asyncpg_dsn(
+            "postgresql://u:p@db:5432/trading_db?schema=public&sslmode=require&connection_limit=5"
+        )
+        self.assertEqual(dsn, "postgresql://u:p@db:5432/trading_db?sslmode=require")
+        self.assertEqual(schema, "public")
+
+    def test_copy_row_normalizes_aware_datetime_to_utc(self):
+        record = ticker_record(make_rows(1)[0])
+        record['datetime'] = datetime(2024, 1, 1, 9, 30, tzinfo=timezone(timedelta(hours=2)))
+
+        row = copy_row(record)
+
+        self.assertEqual(row[0], datetime(2024, 1, 1, 7, 30))
+        self.assertEqual(row[4], Decimal("151.00"))
+        self.assertEqual(row[6], 'AAPL')
+
+
+if __name__ == '__main__':
+    unittest.main()
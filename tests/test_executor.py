@@ -0,0 +1,66 @@
+import unittest
+import asyncio
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.executor import BacktestExecutor, ExecutorBusy
+from app.strategy import crossover_scan, sweep_performance
+
+
+class TestBacktestExecutor(unittest.IsolatedAsyncioTestCase):
+    """Test dispatching strategy work to the process pool"""
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.closes = np.round(100 + np.cumsum(rng.normal(size=2000)), 2)
+        self.executor = BacktestExecutor(workers=1, queue_limit=2, offload_bars=1000)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    async def test_offloaded_scan_matches_inline(self):
+        args = (5, 20, 4096, 20, None)
+        result = await self.executor.run(crossover_scan, self.closes, *args)
+        expected = crossover_scan(self.closes, *args)
+
+        for got, want in zip(result, expected):
+            np.testing.assert_array_equal(got, want)
+        self.assertEqual(self.executor.stats()['offloaded'], 1)
+        self.assertEqual(self.executor.stats()['pending'], 0)
+
+    async def test_offloaded_sweep_matches_inline(self):
+        pairs = [(5, 20), (10, 40)]
+        result = await self.executor.run(sweep_performance, self.closes, pairs)
+        self.assertEqual(result, sweep_performance(self.closes, pairs))
+
+    async def test_small_jobs_run_inline(self):
+        await self.executor.run(sweep_performance, self.closes[:100], [(5, 20)])
+        self.assertEqual(self.executor.stats()['inline'], 1)
+        self.assertEqual(self.executor.stats()['offloaded'], 0)
+
+    async def test_costly_jobs_on_short_series_are_offloaded(self):
+        pairs = [(5, 20), (10, 40), (15, 60), (20, 80)]
+        closes = self.closes[:400]
+        result = await self.executor.run(sweep_performance, closes, pairs, cost=len(closes) * len(pairs))
+
+        self.assertEqual(result, sweep_performance(closes, pairs))
+        self.assertEqual(self.executor.stats()['offloaded'], 1)
+        self.assertEqual(self.executor.stats()['inline'], 0)
+
+    async def test_full_queue_rejects(self):
+        jobs = [
+            asyncio.ensure_future(self.executor.run(sweep_performance, self.closes, [(5, 20)]))
+            for _ in range(3)
+        ]
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+
+        self.assertIsInstance(results[2], ExecutorBusy)
+        self.assertEqual(self.executor.stats()['rejected'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
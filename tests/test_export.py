@@ -0,0 +1,66 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+import io
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.export import arrow_stream, parquet_stream, export_available
+from tests.fakes import FakeRecord
+
+if export_available():
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+def record(record_id):
+    return FakeRecord(
+        record_id,
+        datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc) + timedelta(minutes=record_id),
+        "151.00", open="150.25", high="152.50", low="149.75", volume=1000 + record_id
+    )
+
+
+async def batches(*sizes):
+    next_id = 0
+    for size in sizes:
+        yield [record(next_id + i) for i in range(size)]
+        next_id += size
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+@unittest.skipUnless(export_available(), "pyarrow not installed")
+class TestColumnarExport(unittest.IsolatedAsyncioTestCase):
+    """Test Arrow and Parquet encoding of ticker rows"""
+
+    async def test_arrow_stream_round_trip(self):
+        body = await collect(arrow_stream(batches(3, 2)))
+        table = pa.ipc.open_stream(body).read_all()
+
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.column('id').to_pylist(), [0, 1, 2, 3, 4])
+        self.assertEqual(table.column('close').to_pylist(), [151.0] * 5)
+        self.assertEqual(table.column('datetime')[0].as_py(), record(0).datetime)
+
+    async def test_parquet_round_trip_with_prefetched_batch(self):
+        first = [record(100)]
+        body = await collect(parquet_stream(batches(2), first))
+        table = pq.read_table(io.BytesIO(body))
+
+        self.assertEqual(table.column('id').to_pylist(), [100, 0, 1])
+        self.assertEqual(table.column('volume').to_pylist(), [1100, 1000, 1001])
+
+    async def test_empty_result_is_valid(self):
+        arrow_body = await collect(arrow_stream(batches()))
+        parquet_body = await collect(parquet_stream(batches()))
+
+        self.assertEqual(pa.ipc.open_stream(arrow_body).read_all().num_rows, 0)
+        self.assertEqual(pq.read_table(io.BytesIO(parquet_body)).num_rows, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
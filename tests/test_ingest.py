@@ -0,0 +1,96 @@
+import unittest
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ingest import LineTooLong, iter_ndjson_lines, ingest_ndjson
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def row(**overrides):
+    data = {
+        "datetime": "2024-01-01T09:30:00",
+        "open": 150.25,
+        "high": 152.50,
+        "low": 149.75,
+        "close": 151.00,
+        "volume": 1000000
+    }
+    data.update(overrides)
+    return json.dumps(data).encode()
+
+
+class TestNDJSONLines(unittest.IsolatedAsyncioTestCase):
+    """Test incremental NDJSON line splitting"""
+
+    async def collect(self, *chunks, max_line_bytes=1024):
+        return [item async for item in iter_ndjson_lines(stream(*chunks), max_line_bytes)]
+
+    async def test_lines_split_across_chunks(self):
+        lines = await self.collect(b'{"a":', b' 1}\n{"b"', b': 2}\n')
+        self.assertEqual(lines, [(1, b'{"a": 1}'), (2, b'{"b": 2}')])
+
+    async def test_trailing_line_without_newline(self):
+        lines = await self.collect(b'{"a": 1}\n{"b": 2}')
+        self.assertEqual(lines, [(1, b'{"a": 1}'), (2, b'{"b": 2}')])
+
+    async def test_blank_lines_are_skipped(self):
+        lines = await self.collect(b'\n{"a": 1}\r\n\n')
+        self.assertEqual(lines, [(2, b'{"a": 1}')])
+
+    async def test_oversized_line_is_reported_and_dropped(self):
+        lines = await self.collect(b'x' * 10, b'x' * 10, b'\n{"a": 1}\n', max_line_bytes=8)
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0][0], 1)
+        self.assertIsInstance(lines[0][1], LineTooLong)
+        self.assertEqual(lines[1], (2, b'{"a": 1}'))
+
+
+class TestNDJSONIngest(unittest.IsolatedAsyncioTestCase):
+    """Test validation and batched flushing of NDJSON rows"""
+
+    async def test_rows_flushed_in_batches(self):
+        batches = []
+
+        async def flush(batch):
+            batches.append(len(batch))
+            return len(batch)
+
+        body = b"\n".join(row(volume=i + 1) for i in range(5))
+        result = await ingest_ndjson(stream(body), flush, batch_size=2)
+
+        self.assertEqual(batches, [2, 2, 1])
+        self.assertEqual(result["count"], 5)
+        self.assertEqual(result["error_count"], 0)
+
+    async def test_invalid_lines_are_reported(self):
+        async def flush(batch):
+            return len(batch)
+
+        body = b"\n".join([row(), row(open=-1), b"not json", row(high=100.0, low=120.0)])
+        result = await ingest_ndjson(stream(body), flush, batch_size=10)
+
+        self.assertEqual(result["count"], 1)
+        self.assertEqual(result["error_count"], 3)
+        self.assertEqual([e["line"] for e in result["errors"]], [2, 3, 4])
+
+    async def test_reported_errors_are_capped(self):
+        async def flush(batch):
+            return len(batch)
+
+        body = b"\n".join(row(volume=0) for _ in range(5))
+        result = await ingest_ndjson(stream(body), flush, max_errors=2)
+
+        self.assertEqual(result["error_count"], 5)
+        self.assertEqual(len(result["errors"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import io
+import unittest
+from decimal import Decimal
+import sys
+import os
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from load_data import sheet_rows
+
+HEADER = "symbol,datetime,open,high,low,close,volume\n"
+
+
+def sheet(*lines, header=HEADER):
+    return pd.read_csv(io.StringIO(header + "\n".join(lines) + "\n"))
+
+
+class TestSheetRows(unittest.TestCase):
+    """Test validation of Google Sheets rows before loading"""
+
+    def test_valid_rows(self):
+        rows, errors = sheet_rows(sheet("AAPL,2024-01-01 09:30,150.25,152.50,149.75,151.00,1000"))
+
+        self.assertEqual(errors, [])
+        self.assertEqual(rows[0].symbol, "AAPL")
+        self.assertEqual(rows[0].close, Decimal("151.00"))
+
+    def test_bad_symbols_are_rejected(self):
+        rows, errors = sheet_rows(sheet(
+            "MSFT,2024-01-01 09:30,150.25,152.50,149.75,151.00,1000",
+            ",2024-01-01 09:31,150.25,152.50,149.75,151.00,1000",
+            "ABCDEFGHIJKLMNOPQ,2024-01-01 09:32,150.25,152.50,149.75,151.00,1000",
+            "BRK B,2024-01-01 09:33,150.25,152.50,149.75,151.00,1000"
+        ))
+
+        self.assertEqual([row.symbol for row in rows], ["MSFT"])
+        self.assertEqual([idx for idx, _ in errors], [1, 2, 3])
+        self.assertTrue(all(error.startswith("symbol:") for _, error in errors))
+
+    def test_other_invalid_values_are_rejected(self):
+        rows, errors = sheet_rows(sheet(
+            "AAPL,2024-01-01 09:30,150.25,149.00,149.75,151.00,1000",
+            "AAPL,not a date,150.25,152.50,149.75,151.00,1000",
+            "AAPL,2024-01-01 09:32,150.25,152.50,149.75,151.00,"
+        ))
+
+        self.assertEqual(rows, [])
+        self.assertEqual(len(errors), 3)
+
+    def test_prices_are_rounded_to_cents(self):
+        rows, errors = sheet_rows(sheet("AAPL,2024-01-01 09:30,150.255,152.5000000001,149.7499999999,151.1,1000"))
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            (rows[0].open, rows[0].high, rows[0].low, rows[0].close),
+            (Decimal("150.26"), Decimal("152.50"), Decimal("149.75"), Decimal("151.10"))
+        )
+
+    def test_argument_symbol_without_column(self):
+        header = "datetime,open,high,low,close,volume\n"
+        rows, _ = sheet_rows(sheet("2024-01-01 09:30,150.25,152.50,149.75,151.00,1000", header=header), "TSLA")
+        _, errors = sheet_rows(sheet("2024-01-01 09:30,150.25,152.50,149.75,151.00,1000", header=header), "nan?")
+
+        self.assertEqual(rows[0].symbol, "TSLA")
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from decimal import Decimal
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.prices import cents_array, cents_to_float, decimal_lists, from_cents, to_cents
+
+
+class TestCents(unittest.TestCase):
+    """Test exact conversion between prices and integer cents"""
+
+    def test_round_trip(self):
+        for text in ["0.01", "1.10", "151.00", "99999999.99"]:
+            self.assertEqual(str(from_cents(to_cents(Decimal(text)))), text)
+
+    def test_sub_cent_price_is_rejected(self):
+        with self.assertRaises(ValueError):
+            to_cents(Decimal("1.005"))
+
+    def test_array_matches_exact_conversion(self):
+        prices = [Decimal(f"{i}.{j:02d}") for i in (0, 1, 12345, 99999999) for j in range(100)]
+        cents = cents_array(prices)
+
+        self.assertEqual(cents.dtype, np.int64)
+        self.assertEqual(cents.tolist(), [to_cents(p) for p in prices])
+
+    def test_floats_match_decimal_floats(self):
+        prices = [Decimal(f"{i}.{j:02d}") for i in (0, 7, 151, 4321987) for j in range(100)]
+        floats = cents_to_float(cents_array(prices))
+
+        self.assertEqual(floats.tolist(), [float(p) for p in prices])
+
+    def test_decimal_lists_share_equal_prices(self):
+        columns = decimal_lists({'open': [15100, 15125], 'close': [15125, 99]})
+
+        self.assertEqual([str(d) for d in columns['close']], ["151.25", "0.99"])
+        self.assertIs(columns['open'][1], columns['close'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
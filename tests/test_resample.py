@@ -0,0 +1,155 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.resample import bucket_start, iter_resampled, parse_rollups, rollup_source
+from tests import fakes
+from tests.fakes import FakeRecord
+
+
+class FakeClient(fakes.FakeClient):
+    """Evaluates RESAMPLE_SQL in Python over in-memory rows"""
+
+    def __init__(self, records):
+        super().__init__(records)
+        self.windows = []
+        self.queries = []
+
+    async def query_raw(self, query, symbol, seconds, lower, upper):
+        lower, upper = datetime.fromisoformat(lower), datetime.fromisoformat(upper)
+        self.windows.append((lower, upper))
+        self.queries.append(query)
+        buckets = {}
+        for r in self.tickerdata.select({'symbol': symbol}):
+            if lower <= r.datetime < upper:
+                buckets.setdefault(bucket_start(r.datetime, seconds), []).append(r)
+        return [
+            {
+                'datetime': key,
+                'open': rows[0].open,
+                'high': max(r.high for r in rows),
+                'low': min(r.low for r in rows),
+                'close': rows[-1].close,
+                'volume': sum(r.volume for r in rows),
+                'bars': len(rows)
+            }
+            for key, rows in sorted(buckets.items())
+        ]
+
+
+def minute_bars(start, count, symbol='AAPL'):
+    return [
+        FakeRecord(
+            i, start + timedelta(minutes=i), 100 + i, symbol,
+            open=Decimal(100 + i) - Decimal("0.10"),
+            high=Decimal(100 + i) + Decimal("0.50"),
+            low=Decimal(100 + i) - Decimal("0.50")
+        )
+        for i in range(count)
+    ]
+
+
+async def collect(client, *args, **kwargs):
+    return [bar async for batch in iter_resampled(client, *args, **kwargs) for bar in batch]
+
+
+class TestBucketStart(unittest.TestCase):
+    """Test epoch-aligned bucketing"""
+
+    def test_floors_to_interval(self):
+        self.assertEqual(bucket_start(datetime(2024, 1, 1, 9, 47, 30), 300), datetime(2024, 1, 1, 9, 45))
+        self.assertEqual(bucket_start(datetime(2024, 1, 1, 23, 59), 86400), datetime(2024, 1, 1))
+
+    def test_aware_datetimes_are_converted_to_utc(self):
+        dt = datetime(2024, 1, 1, 1, 30, tzinfo=timezone(timedelta(hours=2)))
+        self.assertEqual(bucket_start(dt, 3600), datetime(2023, 12, 31, 23, 0))
+
+
+class TestRollupSource(unittest.TestCase):
+    """Test choosing precomputed rollups"""
+
+    def test_parse_rollups(self):
+        self.assertEqual(parse_rollups("1d, 5m,1h"), [300, 3600, 86400])
+        self.assertEqual(parse_rollups(""), [])
+
+    def test_parse_rollups_rejects_bad_intervals(self):
+        with self.assertRaises(ValueError):
+            parse_rollups("5m,2m")
+        with self.assertRaises(ValueError):
+            parse_rollups("1h,1w")
+
+    def test_coarsest_dividing_rollup(self):
+        rollups = [300, 3600, 86400]
+        self.assertEqual(rollup_source(300, rollups=rollups), 300)
+        self.assertEqual(rollup_source(1800, rollups=rollups), 300)
+        self.assertEqual(rollup_source(4 * 3600, rollups=rollups), 3600)
+        self.assertEqual(rollup_source(86400, rollups=rollups), 86400)
+        self.assertIsNone(rollup_source(60, rollups=rollups))
+
+    def test_unaligned_bounds_fall_back(self):
+        rollups = [300, 3600]
+        start = datetime(2024, 1, 1, 9, 15)
+        self.assertEqual(rollup_source(3600, start=start, rollups=rollups), 300)
+        self.assertIsNone(rollup_source(3600, end=datetime(2024, 1, 1, 9, 17), rollups=rollups))
+
+
+class TestIterResampled(unittest.IsolatedAsyncioTestCase):
+    """Test batched, gap-skipping resampling"""
+
+    async def test_ohlcv_per_bucket(self):
+        client = FakeClient(minute_bars(datetime(2024, 1, 1, 9, 30), 90))
+
+        bars = await collect(client, 'AAPL', '1h')
+
+        self.assertEqual([b['datetime'].hour for b in bars], [9, 10])
+        self.assertEqual([b['bars'] for b in bars], [30, 60])
+        self.assertEqual(bars[0]['open'], Decimal("99.90"))
+        self.assertEqual(bars[0]['close'], Decimal(129))
+        self.assertEqual(bars[1]['high'], Decimal("189.50"))
+        self.assertEqual(bars[1]['volume'], 6000)
+
+    async def test_batches_skip_gaps(self):
+        records = minute_bars(datetime(2024, 1, 1), 10) + minute_bars(datetime(2024, 3, 1), 10)
+        client = FakeClient(records)
+
+        bars = await collect(client, 'AAPL', '5m', batch_buckets=2)
+
+        self.assertEqual(len(bars), 4)
+        self.assertEqual(sum(b['bars'] for b in bars), 20)
+        # One window per run of data plus an empty probe after it, not one per day in between
+        self.assertEqual(len(client.windows), 4)
+
+    async def test_range_excludes_rows_outside(self):
+        records = minute_bars(datetime(2024, 1, 1, 9, 0), 120) + minute_bars(datetime(2024, 1, 1, 9, 0), 120, 'MSFT')
+        client = FakeClient(records)
+
+        bars = await collect(
+            client, 'AAPL', '1h',
+            start=datetime(2024, 1, 1, 9, 15), end=datetime(2024, 1, 1, 10, 30)
+        )
+
+        self.assertEqual([b['bars'] for b in bars], [45, 30])
+        self.assertEqual(bars[0]['open'], Decimal("114.90"))
+
+    async def test_reads_rollups_when_possible(self):
+        client = FakeClient(minute_bars(datetime(2024, 1, 1, 9, 0), 120))
+
+        bars = await collect(client, 'AAPL', '4h', rollups=[300, 3600])
+        await collect(client, 'AAPL', '4h', rollups=[])
+
+        self.assertEqual([b['bars'] for b in bars], [120])
+        self.assertIn('"ticker_rollup"', client.queries[0])
+        self.assertIn('"interval" = 3600', client.queries[0])
+        self.assertIn('"ticker_data"', client.queries[-1])
+
+    async def test_unknown_interval(self):
+        with self.assertRaises(ValueError):
+            await collect(FakeClient([]), 'AAPL', '2m')
+
+
+if __name__ == '__main__':
+    unittest.main()
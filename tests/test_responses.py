@@ -0,0 +1,59 @@
+import json
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import responses
+from app.models import TickerDataPage, TickerDataResponse
+from app.responses import dumps, ndjson_lines, ticker_rows
+from tests.fakes import FakeRecord
+
+
+def record(record_id, dt):
+    return FakeRecord(record_id, dt, "151.00", open="150.25", high="152.50", low="149.75", volume=1000000)
+
+
+RECORDS = [
+    record(1, datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc)),
+    record(2, datetime(2024, 1, 1, 9, 31, 0, 250000, tzinfo=timezone.utc)),
+    record(3, datetime(2024, 1, 1, 9, 32))
+]
+
+
+class TestFastJSON(unittest.TestCase):
+    """Test that the fast encoder matches the response models"""
+
+    def expected_page(self):
+        page = TickerDataPage(data=[TickerDataResponse.model_validate(r) for r in RECORDS], next_cursor="abc")
+        return page.model_dump_json().encode()
+
+    def test_page_matches_model(self):
+        content = {"data": ticker_rows(RECORDS), "next_cursor": "abc"}
+        self.assertEqual(dumps(content), self.expected_page())
+
+    def test_page_matches_model_without_orjson(self):
+        content = {"data": ticker_rows(RECORDS), "next_cursor": "abc"}
+        with mock.patch.object(responses, 'orjson', None):
+            self.assertEqual(dumps(content), self.expected_page())
+
+    def test_ndjson_lines(self):
+        lines = ndjson_lines(ticker_rows(RECORDS[:2])).decode().splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])['datetime'], "2024-01-01T09:31:00.250000Z")
+
+    def test_numpy_values(self):
+        content = {"bars": np.int64(3), "return": np.float64(1.5)}
+        self.assertEqual(json.loads(dumps(content)), {"bars": 3, "return": 1.5})
+        with mock.patch.object(responses, 'orjson', None):
+            self.assertEqual(json.loads(dumps(content)), {"bars": 3, "return": 1.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+import asyncio
+import re
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import crud
+from app.crud import upsert_ticker_data
+from app.models import TickerDataCreate
+from app.resample import bucket_start
+from app.rollup import LOCK_SQL, rebuild_rollups, refresh_rollups, refresh_statements
+from tests import fakes
+from tests.fakes import FakeRecord
+
+
+class FakeClient(fakes.FakeClient):
+    """Records rollup statements instead of running them"""
+
+    def __init__(self, datetimes=()):
+        super().__init__(FakeRecord(i, dt) for i, dt in enumerate(datetimes))
+        self.tickerrollup = self
+        self.deleted = []
+        self.executed = []
+        self.locked = []
+
+    async def delete_many(self, where=None):
+        self.deleted.append(where)
+        return 0
+
+    async def execute_raw(self, query, *params):
+        if query == LOCK_SQL:
+            self.locked.append(params[0])
+        else:
+            self.executed.append((query, params))
+        return 0
+
+
+class ReadCommittedTransaction:
+    """
+    One transaction of ReadCommittedClient.
+
+    Its writes stay invisible to other transactions until commit. Every
+    statement yields to the event loop, and a rollup refresh yields between
+    reading its aggregate and writing the bucket, as a refresh does while
+    it waits for another writer's row lock.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.rows = {}
+        self.buckets = {}
+        self.locks = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.client.rows.update(self.rows)
+            self.client.buckets.update(self.buckets)
+        for lock in self.locks:
+            lock.release()
+        return False
+
+    async def query_raw(self, query, *params):
+        """Insert the rows of an upsert_sql statement"""
+        if 'ticker_version' in query:
+            return [{'symbol': params[0], 'version': 1, 'epoch': 0}]
+        results = {}
+        for start in range(0, len(params), 7):
+            dt, *_, symbol = params[start:start + 7]
+            self.rows[(symbol, datetime.fromisoformat(dt))] = True
+            row = results.setdefault(symbol, {'symbol': symbol, 'inserted': 0, 'updated': 0, 'first': dt, 'last': dt})
+            row['inserted'] += 1
+            row['first'], row['last'] = min(row['first'], dt), max(row['last'], dt)
+        await asyncio.sleep(0)
+        return list(results.values())
+
+    async def execute_raw(self, query, *params):
+        if query == LOCK_SQL:
+            lock = self.client.locks.setdefault(params[0], asyncio.Lock())
+            await lock.acquire()
+            self.locks.append(lock)
+            return 1
+        # A refresh: count the rows this transaction sees in the buckets
+        symbol, lower, upper = params[0], datetime.fromisoformat(params[1]), datetime.fromisoformat(params[2])
+        size = int(re.search(r"\$1::text, (\d+)", query).group(1))
+        visible = {**self.client.rows, **self.rows}
+        counts = {}
+        for row_symbol, dt in visible:
+            if row_symbol == symbol and lower <= dt < upper:
+                bucket = (symbol, size, bucket_start(dt, size))
+                counts[bucket] = counts.get(bucket, 0) + 1
+        await asyncio.sleep(0)
+        self.buckets.update(counts)
+        return len(counts)
+
+
+class ReadCommittedClient:
+    """Ticker rows and rollup bar counts under READ COMMITTED, with advisory locks"""
+
+    def __init__(self):
+        self.rows = {}
+        self.buckets = {}  # (symbol, interval, bucket) -> bars
+        self.locks = {}
+
+    def tx(self, **kwargs):
+        return ReadCommittedTransaction(self)
+
+
+def bar(minute):
+    return TickerDataCreate(
+        symbol='AAPL', datetime=datetime(2024, 1, 1, 9, minute),
+        open=Decimal("150.25"), high=Decimal("152.50"), low=Decimal("149.75"),
+        close=Decimal("151.00"), volume=1000
+    )
+
+
+class TestConcurrentRefresh(unittest.IsolatedAsyncioTestCase):
+    """Test that concurrent ingests of one symbol keep every row in the rollups"""
+
+    async def ingest_concurrently(self):
+        client = ReadCommittedClient()
+        await asyncio.gather(
+            upsert_ticker_data(client, [bar(31)]),
+            upsert_ticker_data(client, [bar(32)])
+        )
+        return client
+
+    async def test_interleaved_refreshes_keep_both_rows(self):
+        client = await self.ingest_concurrently()
+
+        self.assertEqual(len(client.rows), 2)
+        self.assertEqual(client.buckets[('AAPL', 300, datetime(2024, 1, 1, 9, 30))], 2)
+        self.assertEqual(client.buckets[('AAPL', 86400, datetime(2024, 1, 1))], 2)
+
+    async def test_without_the_lock_a_row_is_lost(self):
+        with mock.patch.object(crud, 'lock_symbols', mock.AsyncMock()):
+            client = await self.ingest_concurrently()
+
+        self.assertEqual(len(client.rows), 2)
+        self.assertEqual(client.buckets[('AAPL', 300, datetime(2024, 1, 1, 9, 30))], 1)
+
+
+class TestRefreshStatements(unittest.TestCase):
+    """Test incremental rollup maintenance"""
+
+    def test_ranges_cover_whole_buckets(self):
+        written = {'AAPL': {'first': datetime(2024, 1, 1, 9, 32), 'last': datetime(2024, 1, 1, 10, 5)}}
+
+        statements = refresh_statements(written, [300, 3600, 86400])
+
+        self.assertEqual([params for _, params in statements], [
+            ['AAPL', datetime(2024, 1, 1, 9, 30), datetime(2024, 1, 1, 10, 10)],
+            ['AAPL', datetime(2024, 1, 1, 9, 0), datetime(2024, 1, 1, 11, 0)],
+            ['AAPL', datetime(2024, 1, 1), datetime(2024, 1, 2)]
+        ])
+
+    def test_coarser_rollups_read_finer_ones(self):
+        written = {'AAPL': {'first': datetime(2024, 1, 1), 'last': datetime(2024, 1, 1)}}
+
+        (base, _), (hourly, _) = refresh_statements(written, [300, 3600])
+
+        self.assertIn('FROM "ticker_data"', base)
+        self.assertIn('FROM "ticker_rollup" WHERE "symbol" = $1 AND "interval" = 300', hourly)
+        self.assertIn("'3600 seconds'::interval", hourly)
+
+    def test_symbols_without_writes_are_skipped(self):
+        written = {'AAPL': {'inserted': 0, 'updated': 0, 'skipped': 3, 'first': None, 'last': None}}
+        self.assertEqual(refresh_statements(written, [300]), [])
+
+    def test_no_rollups(self):
+        written = {'AAPL': {'first': datetime(2024, 1, 1), 'last': datetime(2024, 1, 1)}}
+        self.assertEqual(refresh_statements(written, []), [])
+
+
+class TestRollupQueries(unittest.IsolatedAsyncioTestCase):
+    """Test running refreshes and rebuilds"""
+
+    async def test_refresh_passes_isoformat_bounds(self):
+        client = FakeClient()
+        written = {'AAPL': {'first': datetime(2024, 1, 1, 9, 32), 'last': datetime(2024, 1, 1, 9, 33)}}
+
+        await refresh_rollups(client, written, [300])
+
+        self.assertEqual(client.executed[0][1], ('AAPL', '2024-01-01T09:30:00', '2024-01-01T09:35:00'))
+
+    async def test_rebuild_runs_aligned_windows(self):
+        start = datetime(2024, 1, 1, 9, 30)
+        client = FakeClient([start, start + timedelta(days=45)])
+
+        windows = await rebuild_rollups(client, 'AAPL', [300, 86400])
+
+        self.assertEqual(client.deleted, [{'symbol': 'AAPL'}])
+        self.assertEqual(windows, 2)
+        self.assertEqual(client.transactions, 2)
+        self.assertEqual(client.locked, ['AAPL', 'AAPL'])
+        bounds = [params[1:] for _, params in client.executed[::2]]
+        self.assertEqual(bounds, [
+            ('2024-01-01T00:00:00', '2024-01-31T00:00:00'),
+            ('2024-01-31T00:00:00', '2024-02-16T00:00:00')
+        ])
+
+    async def test_rebuild_of_unknown_symbol(self):
+        client = FakeClient()
+
+        self.assertEqual(await rebuild_rollups(client, 'AAPL', [300]), 0)
+        self.assertEqual(client.executed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.snapshot import HEADER_SIZE, read_snapshot, remove_snapshot, snapshot_path, write_snapshot
+
+DTYPES = {'id': np.int64, 'ts': np.int64, 'close': np.float64}
+
+
+def make_columns(rows):
+    return {
+        'id': np.arange(1, rows + 1, dtype=np.int64),
+        'ts': np.arange(rows, dtype=np.int64) * 60_000_000,
+        'close': np.linspace(100, 110, rows)
+    }
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test the snapshot file format"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        remove_snapshot(self.directory)
+        os.rmdir(self.directory)
+
+    def test_round_trip_is_mapped(self):
+        columns = make_columns(100)
+        path = write_snapshot(self.directory, 'AAPL', columns)
+
+        snapshot = read_snapshot(self.directory, 'AAPL', DTYPES)
+
+        self.assertEqual(os.path.getsize(path), HEADER_SIZE + 100 * 24)
+        self.assertEqual((snapshot.rows, snapshot.last_id, snapshot.last_ts), (100, 100, 99 * 60_000_000))
+        for name, column in columns.items():
+            self.assertIsInstance(snapshot.columns[name], np.memmap)
+            np.testing.assert_array_equal(snapshot.columns[name], column)
+        with self.assertRaises(ValueError):
+            snapshot.columns['close'][0] = 0  # read-only
+
+    def test_missing_snapshot(self):
+        self.assertIsNone(read_snapshot(self.directory, 'AAPL', DTYPES))
+
+    def test_incompatible_snapshots_are_ignored(self):
+        write_snapshot(self.directory, 'AAPL', make_columns(10))
+        os.rename(snapshot_path(self.directory, 'AAPL'), snapshot_path(self.directory, 'MSFT'))
+        self.assertIsNone(read_snapshot(self.directory, 'MSFT', DTYPES))
+
+        write_snapshot(self.directory, 'AAPL', make_columns(10))
+        self.assertIsNone(read_snapshot(self.directory, 'AAPL', {'id': np.int64, 'ts': np.int64}))
+
+        with open(snapshot_path(self.directory, 'AAPL'), 'ab') as f:
+            f.write(b"\0" * 8)  # truncated or extended files do not map
+        self.assertIsNone(read_snapshot(self.directory, 'AAPL', DTYPES))
+
+    def test_rewrite_keeps_old_mapping_valid(self):
+        write_snapshot(self.directory, 'AAPL', make_columns(10))
+        old = read_snapshot(self.directory, 'AAPL', DTYPES)
+
+        write_snapshot(self.directory, 'AAPL', make_columns(20))
+
+        self.assertEqual(len(old.columns['id']), 10)
+        self.assertEqual(old.columns['id'][-1], 10)
+        self.assertEqual(read_snapshot(self.directory, 'AAPL', DTYPES).rows, 20)
+
+    def test_empty_series_is_rejected(self):
+        with self.assertRaises(ValueError):
+            write_snapshot(self.directory, 'AAPL', make_columns(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
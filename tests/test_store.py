@@ -0,0 +1,404 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache import data_versions
+from app.crud import decode_cursor, find_ticker_page
+from app.freshness import refresh_version
+from app.snapshot import read_snapshot
+from app.store import COLUMNS, ROW_BYTES, Series, SeriesStore, find_series_page, iter_series_batches
+from tests import fakes
+from tests.fakes import FakeRecord
+
+BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def store_record(record_id, symbol, dt, close):
+    close = Decimal(str(close))
+    return FakeRecord(
+        record_id, dt, close, symbol,
+        open=close - Decimal("0.25"),
+        high=close + Decimal("1.50"),
+        low=close - Decimal("1.10"),
+        volume=1000 + record_id
+    )
+
+
+class FakeClient(fakes.FakeClient):
+    def append(self, count, start=0, symbol='STORE'):
+        """Add rows the way a write endpoint of this process does"""
+        new = self.write_outside(count, start, symbol)
+        data_versions[symbol].bump(r.datetime for r in new)
+        data_versions[symbol].committed((self.versions[symbol]['version'], self.versions[symbol]['epoch']))
+        return new
+
+    def write_outside(self, count, start=0, symbol='STORE'):
+        """Add rows the way another process would, bumping only the database counters"""
+        records = self.tickerdata.records
+        new = [
+            store_record(len(records) + i + 1, symbol, BASE_DATE + timedelta(minutes=start + i), 100 + i * 0.37)
+            for i in range(count)
+        ]
+        records.extend(new)
+        self.bump_version(symbol, first=new[0].datetime)
+        return new
+
+
+def as_tuple(record):
+    return (
+        record.id, record.symbol, record.datetime, record.open,
+        record.high, record.low, record.close, record.volume
+    )
+
+
+class TestSeries(unittest.TestCase):
+    """Test the columnar series"""
+
+    def setUp(self):
+        self.records = FakeClient().append(10)
+        self.series = Series('STORE', 0, 0)
+        self.series.append(self.records[:4])
+        self.series.append(self.records[4:])
+
+    def test_rows_round_trip(self):
+        rows = self.series.rows(0, len(self.series))
+        self.assertEqual([as_tuple(r) for r in rows], [as_tuple(r) for r in self.records])
+
+    def test_append_rejects_older_rows(self):
+        with self.assertRaises(ValueError):
+            self.series.append(self.records[-1:])
+
+    def test_search(self):
+        start, end = self.records[2].datetime, self.records[7].datetime
+        self.assertEqual(self.series.search(start, end), (2, 7))
+        after = (self.records[4].datetime, self.records[4].id)
+        self.assertEqual(self.series.search(start, end, after), (5, 7))
+
+    def test_bars_expose_closes(self):
+        bars = self.series.bars(8)
+        self.assertEqual(len(bars), 2)
+        self.assertEqual(bars[-1]['datetime'], self.records[-1].datetime)
+        self.assertEqual(bars.closes.tolist(), [float(r.close) for r in self.records[8:]])
+
+    def test_prices_are_integer_cents(self):
+        self.assertEqual(self.series.column('close').dtype, np.int64)
+        self.assertEqual(self.series.column('close')[0], 10000)
+        self.assertEqual(str(self.series.rows(1, 2)[0].open), "100.12")
+
+    def test_compact(self):
+        self.series.compact()
+        self.assertEqual(self.series.nbytes, len(self.records) * ROW_BYTES)
+
+
+class TestSeriesReads(unittest.IsolatedAsyncioTestCase):
+    """Test that pages and batches match the database helpers"""
+
+    async def test_pages_match_database(self):
+        client = FakeClient()
+        client.append(25)
+        series = Series('STORE', 0, 0)
+        series.append(client.tickerdata.records)
+
+        after = None
+        while True:
+            expected, expected_cursor = await find_ticker_page(client, limit=10, after=after, symbol='STORE')
+            rows, cursor = find_series_page(series, limit=10, after=after)
+            self.assertEqual([as_tuple(r) for r in rows], [as_tuple(r) for r in expected])
+            self.assertEqual(cursor, expected_cursor)
+            if cursor is None:
+                break
+            after = decode_cursor(cursor)
+
+    async def test_batches(self):
+        client = FakeClient()
+        client.append(25)
+        series = Series('STORE', 0, 0)
+        series.append(client.tickerdata.records)
+
+        batches = [batch async for batch in iter_series_batches(series, limit=22, batch_size=10)]
+
+        self.assertEqual([len(b) for b in batches], [10, 10, 2])
+
+
+class TestSeriesStore(unittest.IsolatedAsyncioTestCase):
+    """Test loading, catching up and evicting series"""
+
+    def setUp(self):
+        self.client = FakeClient()
+        self.store = SeriesStore(1024 * 1024, batch_size=10)
+
+    async def test_appends_are_fetched_incrementally(self):
+        self.client.append(25)
+        series = await self.store.get(self.client, 'STORE')
+        self.client.append(5, start=25)
+        self.client.tickerdata.fetched.clear()
+
+        again = await self.store.get(self.client, 'STORE')
+
+        self.assertIs(again, series)
+        self.assertEqual(len(series), 30)
+        self.assertEqual(self.client.tickerdata.fetched, [5])
+        self.assertEqual(self.store.stats()['appends'], 1)
+
+    async def test_unchanged_version_is_a_hit(self):
+        self.client.append(5)
+        await self.store.get(self.client, 'STORE')
+        self.client.tickerdata.fetched.clear()
+
+        await self.store.get(self.client, 'STORE')
+
+        self.assertEqual(self.client.tickerdata.fetched, [])
+        self.assertEqual(self.store.hits, 1)
+
+    async def test_history_rewrite_reloads(self):
+        self.client.append(5, start=10)
+        await self.store.get(self.client, 'STORE')
+        self.client.append(5, start=0)
+
+        series = await self.store.get(self.client, 'STORE')
+
+        self.assertEqual(len(series), 10)
+        self.assertEqual(self.store.loads, 2)
+        self.assertTrue((series.column('ts')[1:] > series.column('ts')[:-1]).all())
+
+    async def test_oversized_symbol_falls_back(self):
+        self.client.append(30)
+        store = SeriesStore(20 * ROW_BYTES, batch_size=10)
+
+        self.assertIsNone(await store.get(self.client, 'STORE'))
+        self.client.tickerdata.fetched.clear()
+        self.assertIsNone(await store.get(self.client, 'STORE'))
+        # Not retried until the data changes
+        self.assertEqual(self.client.tickerdata.fetched, [])
+
+    async def test_least_recently_used_symbol_is_evicted(self):
+        self.client.append(10, symbol='A')
+        self.client.append(10, symbol='B')
+        store = SeriesStore(15 * ROW_BYTES)
+
+        await store.get(self.client, 'A')
+        await store.get(self.client, 'B')
+
+        self.assertNotIn('A', store)
+        self.assertIn('B', store)
+        self.assertEqual(store.evictions, 1)
+
+    async def test_load_all_and_drop(self):
+        self.client.append(3, symbol='A')
+        self.client.append(3, symbol='B')
+
+        self.assertEqual(await self.store.load_all(self.client), 2)
+        self.store.drop('A')
+        self.assertNotIn('A', self.store)
+        self.store.drop()
+        self.assertEqual(self.store.stats()['symbols'], 0)
+
+    async def test_disabled(self):
+        self.client.append(3)
+        store = SeriesStore(0)
+        self.assertIsNone(await store.get(self.client, 'STORE'))
+        self.assertEqual(await store.load_all(self.client), 0)
+
+
+class TestOutsideWrites(unittest.IsolatedAsyncioTestCase):
+    """Test picking up rows written by another process"""
+
+    def setUp(self):
+        self.client = FakeClient()
+        self.store = SeriesStore(1024 * 1024, batch_size=10)
+        self.symbol = self._testMethodName
+
+    async def read(self):
+        await refresh_version(self.client, self.symbol, probe_interval=0)
+        return await self.store.get(self.client, self.symbol)
+
+    async def test_outside_append_shows_up_on_next_get(self):
+        self.client.append(20, symbol=self.symbol)
+        series = await self.read()
+        epoch = data_versions[self.symbol].epoch
+        new = self.client.write_outside(3, start=20, symbol=self.symbol)
+        self.client.tickerdata.fetched.clear()
+
+        again = await self.read()
+
+        self.assertIs(again, series)
+        self.assertEqual(len(again), 23)
+        self.assertEqual(again.last_row, (new[-1].datetime, new[-1].id))
+        self.assertEqual(self.client.tickerdata.fetched, [3])
+        self.assertEqual(data_versions[self.symbol].epoch, epoch)
+
+    async def test_outside_backdated_insert_reloads(self):
+        self.client.append(10, start=10, symbol=self.symbol)
+        await self.read()
+        self.client.write_outside(2, start=0, symbol=self.symbol)
+        self.client.write_outside(1, start=30, symbol=self.symbol)
+
+        series = await self.read()
+
+        self.assertEqual(len(series), 13)
+        self.assertEqual(self.store.loads, 2)
+
+    async def test_outside_delete_reloads(self):
+        self.client.append(10, symbol=self.symbol)
+        await self.read()
+        del self.client.tickerdata.records[3]
+        self.client.bump_version(self.symbol, rewrote=True)
+
+        series = await self.read()
+
+        self.assertEqual(len(series), 9)
+        self.assertEqual(self.store.loads, 2)
+
+    async def test_outside_update_in_place_reloads(self):
+        self.client.append(10, symbol=self.symbol)
+        await self.read()
+        # Same rows, ids and count: only the counters tell the change
+        self.client.tickerdata.records[3].close = Decimal("250.00")
+        self.client.bump_version(self.symbol, rewrote=True)
+
+        series = await self.read()
+
+        self.assertEqual(series.prices('close')[3], 250.0)
+        self.assertEqual(self.store.loads, 2)
+
+    async def test_plain_sql_append_shows_up(self):
+        self.client.append(10, symbol=self.symbol)
+        await self.read()
+        self.client.write_outside(2, start=10, symbol=self.symbol)
+        self.client.versions[self.symbol]['version'] -= 1  # as if the counters were not bumped
+
+        series = await self.read()
+
+        self.assertEqual(len(series), 12)
+        self.assertEqual(self.store.loads, 1)
+
+    async def test_unchanged_database_keeps_version(self):
+        self.client.append(10, symbol=self.symbol)
+        await self.read()
+        value = data_versions[self.symbol].value
+
+        await self.read()
+
+        self.assertEqual(data_versions[self.symbol].value, value)
+        self.assertEqual(self.store.hits, 1)
+
+    async def test_probe_interval(self):
+        self.client.append(10, symbol=self.symbol)
+        await refresh_version(self.client, self.symbol, probe_interval=60)
+        await self.store.get(self.client, self.symbol)
+        self.client.write_outside(1, start=10, symbol=self.symbol)
+
+        await refresh_version(self.client, self.symbol, probe_interval=60)
+        self.assertEqual(len(await self.store.get(self.client, self.symbol)), 10)
+        await refresh_version(self.client, self.symbol, probe_interval=0)
+        self.assertEqual(len(await self.store.get(self.client, self.symbol)), 11)
+
+
+class TestSnapshots(unittest.IsolatedAsyncioTestCase):
+    """Test warm starts from snapshot files"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = FakeClient()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def new_store(self):
+        """A store as a restarted process would have it"""
+        return SeriesStore(1024 * 1024, batch_size=10, snapshot_dir=self.directory)
+
+    async def read(self, store):
+        """Probe, then read, as the endpoints do"""
+        await refresh_version(self.client, 'SNAP', probe_interval=0)
+        return await store.get(self.client, 'SNAP')
+
+    async def test_loaded_series_is_mapped(self):
+        self.client.append(25, symbol='SNAP')
+
+        series = await self.read(self.new_store())
+
+        self.assertTrue(series.mapped)
+        self.assertEqual(series.snapshot_rows, 25)
+
+    async def test_restart_maps_snapshot_and_fetches_newer_rows_only(self):
+        self.client.append(25, symbol='SNAP')
+        await self.read(self.new_store())
+        expected = self.client.append(5, start=25, symbol='SNAP')
+        self.client.tickerdata.fetched.clear()
+
+        store = self.new_store()
+        series = await self.read(store)
+
+        self.assertEqual(self.client.tickerdata.fetched, [5])
+        self.assertEqual(store.stats()['snapshot_loads'], 1)
+        self.assertEqual(len(series), 30)
+        self.assertEqual([r.id for r in series.rows(25, 30)], [r.id for r in expected])
+        # Topped-up rows were saved and the series mapped again
+        self.assertTrue(series.mapped)
+        self.assertEqual(series.snapshot_rows, 30)
+
+    async def test_stale_snapshot_is_reloaded(self):
+        self.client.append(20, start=10, symbol='SNAP')
+        await self.read(self.new_store())
+        self.client.append(5, start=0, symbol='SNAP')  # inserted before the snapshot's last row
+
+        store = self.new_store()
+        series = await self.read(store)
+
+        self.assertEqual(store.stats()['snapshot_loads'], 0)
+        self.assertEqual(len(series), 25)
+
+    async def test_snapshot_records_change_counters(self):
+        self.client.append(10, symbol='SNAP')
+        await self.read(self.new_store())
+
+        snapshot = read_snapshot(self.directory, 'SNAP', COLUMNS)
+
+        counters = self.client.versions['SNAP']
+        self.assertEqual(snapshot.source, (counters['version'], counters['epoch']))
+
+    async def test_snapshot_is_reloaded_after_update_in_place(self):
+        self.client.append(10, symbol='SNAP')
+        await self.read(self.new_store())
+        self.client.tickerdata.records[3].close = Decimal("1.23")
+        self.client.bump_version('SNAP', rewrote=True)  # as an upsert of a stored bar does
+
+        store = self.new_store()
+        series = await self.read(store)
+
+        self.assertEqual(store.stats()['snapshot_loads'], 0)
+        self.assertEqual(series.rows(3, 4)[0].close, Decimal("1.23"))
+
+    async def test_appends_are_saved_at_shutdown(self):
+        self.client.append(10, symbol='SNAP')
+        store = self.new_store()
+        await self.read(store)
+        self.client.append(3, start=10, symbol='SNAP')
+        series = await self.read(store)
+
+        self.assertFalse(series.mapped)
+        self.assertEqual(store.save_snapshots(), 1)
+        self.assertEqual(store.save_snapshots(), 0)
+        self.assertEqual(len(await self.read(self.new_store())), 13)
+
+    async def test_drop_removes_snapshots(self):
+        self.client.append(10, symbol='SNAP')
+        store = self.new_store()
+        await self.read(store)
+
+        store.drop()
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,42 @@
 import unittest
 from datetime import datetime, timedelta
+from fractions import Fraction
+import math
 import sys
 import os
 
+import numpy as np
+
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.strategy import MovingAverageCrossoverStrategy
+from app.strategy import (
+    MovingAverageCrossoverStrategy,
+    PrefixSums,
+    StrategyState,
+    rolling_mean,
+    sweep_performance
+)
+
+def reference_signals(closes, short_window, long_window):
+    """The original per-bar crossover loop, with exact moving averages"""
+    cents = [Fraction(round(price * 100)) for price in closes]
+    
+    def ma(i, window):
+        return sum(cents[i - window + 1:i + 1]) / window
+    
+    signals = []
+    position = None
+    for i in range(long_window, len(cents)):
+        prev_short, prev_long = ma(i - 1, short_window), ma(i - 1, long_window)
+        curr_short, curr_long = ma(i, short_window), ma(i, long_window)
+        if prev_short <= prev_long and curr_short > curr_long and position != 'long':
+            signals.append((i, 'BUY'))
+            position = 'long'
+        elif prev_short >= prev_long and curr_short < curr_long and position == 'long':
+            signals.append((i, 'SELL'))
+            position = None
+    return signals
+
 
 class TestMovingAverageStrategy(unittest.TestCase):
     """Test Moving Average Crossover Strategy"""
@@ -44,6 +75,35 @@ class TestMovingAverageStrategy(unittest.TestCase):
         
         self.assertAlmostEqual(ma[2], 20.0)
     
+    def test_rolling_mean_array(self):
+        """Test array variant returns NaN until the first full window"""
+        ma = rolling_mean(np.array([10.0, 20.0, 30.0, 40.0]), 3)
+        
+        self.assertTrue(np.isnan(ma[:2]).all())
+        np.testing.assert_allclose(ma[2:], [20.0, 30.0])
+    
+    def test_rolling_mean_across_block_boundaries(self):
+        """Test windows spanning cumsum blocks match direct sums"""
+        prices = np.random.default_rng(0).normal(100, 5, 1000)
+        ma = PrefixSums(prices, block=16).rolling_mean(16)
+        expected = np.convolve(prices, np.ones(16) / 16, mode='valid')
+        
+        np.testing.assert_allclose(ma[15:], expected, rtol=1e-12)
+    
+    def test_rolling_mean_long_series_precision(self):
+        """Test accuracy does not degrade on long series with a high price level"""
+        prices = 1e5 + np.cumsum(np.random.default_rng(1).normal(0, 1, 500000))
+        ma = rolling_mean(prices, 50)
+        
+        for i in (49, 250000, 499999):
+            expected = math.fsum(prices[i - 49:i + 1]) / 50
+            self.assertAlmostEqual(ma[i], expected, places=8)
+    
+    def test_rolling_mean_invalid_window(self):
+        """Test non-positive windows are rejected"""
+        with self.assertRaises(ValueError):
+            rolling_mean([1.0, 2.0], 0)
+    
     def test_generate_signals_uptrend(self):
         """Test signal generation in uptrend (should generate BUY)"""
         # Create data with clear uptrend
@@ -84,6 +144,120 @@ class TestMovingAverageStrategy(unittest.TestCase):
         # Signals should be generated
         self.assertGreaterEqual(len(signals), 0)
     
+    def test_generate_signals_round_trip(self):
+        """Test a dip and recovery produces one BUY then one SELL"""
+        base_date = datetime(2024, 1, 1)
+        prices = [10, 9, 8, 7, 6, 5, 6, 7, 8, 9, 10, 11, 10, 9, 8, 7, 6, 5]
+        data = [
+            {'datetime': base_date + timedelta(days=i), 'close': price}
+            for i, price in enumerate(prices)
+        ]
+        
+        signals = self.strategy.generate_signals(data)
+        
+        self.assertEqual([s['signal'] for s in signals], ['BUY', 'SELL'])
+        self.assertEqual(signals[0]['datetime'], '2024-01-09 00:00:00')
+        self.assertEqual(signals[0]['price'], 8.0)
+        self.assertAlmostEqual(signals[0]['short_ma'], 7.0)
+        self.assertAlmostEqual(signals[0]['long_ma'], 6.4)
+        self.assertEqual(signals[1]['datetime'], '2024-01-15 00:00:00')
+        self.assertAlmostEqual(signals[1]['long_ma'], 9.6)
+    
+    def test_generate_signals_ignores_repeated_crossings(self):
+        """Test a second upward cross while long does not emit another BUY"""
+        base_date = datetime(2024, 1, 1)
+        prices = [5, 5, 5, 5, 5, 6, 6, 6, 6, 6, 7, 7, 7, 7, 7]
+        data = [
+            {'datetime': base_date + timedelta(days=i), 'close': price}
+            for i, price in enumerate(prices)
+        ]
+        
+        signals = self.strategy.generate_signals(data)
+        
+        self.assertEqual([s['signal'] for s in signals], ['BUY'])
+    
+    def test_ties_are_decided_exactly(self):
+        """Test tie-heavy cent prices give the signals of the original loop"""
+        strategy = MovingAverageCrossoverStrategy(short_window=10, long_window=20)
+        rng = np.random.default_rng(11)
+        base_date = datetime(2024, 1, 1)
+        series = [
+            np.round(116.56 + np.cumsum(rng.choice([-0.01, 0.0, 0.01], 300)), 2)  # tick walk
+            for _ in range(20)
+        ] + [
+            rng.choice([116.55, 116.56, 116.57], 300)  # three price levels
+            for _ in range(20)
+        ]
+        
+        for closes in series:
+            data = [
+                {'datetime': base_date + timedelta(minutes=i), 'close': float(price)}
+                for i, price in enumerate(closes)
+            ]
+            index = {str(row['datetime']): i for i, row in enumerate(data)}
+            
+            signals = strategy.generate_signals(data)
+            
+            self.assertEqual(
+                [(index[s['datetime']], s['signal']) for s in signals],
+                reference_signals(closes, 10, 20)
+            )
+            swept, = sweep_performance(closes, [(10, 20)])
+            self.assertEqual(swept['total_trades'], strategy.calculate_performance(signals)['total_trades'])
+    
+    def test_equal_averages_are_a_tie(self):
+        """Test averages equal in cents compare equal despite float rounding"""
+        order = PrefixSums([116.55, 116.57] * 10).ma_order(2, 4)
+        
+        self.assertTrue((order[3:] == 0).all())
+        self.assertTrue(np.isnan(order[:3]).all())
+    
+    def test_advance_in_chunks_matches_full_run(self):
+        """Test incremental evaluation gives exactly the full-run signals"""
+        strategy = MovingAverageCrossoverStrategy(short_window=3, long_window=5)
+        strategy.block = 8  # exercise prefix-sum block boundaries
+        rng = np.random.default_rng(7)
+        prices = np.round(100 + np.cumsum(rng.normal(size=200)), 2)
+        base_date = datetime(2024, 1, 1)
+        data = [
+            {'datetime': base_date + timedelta(minutes=i), 'close': float(price)}
+            for i, price in enumerate(prices)
+        ]
+        
+        full = strategy.advance(StrategyState(), data)
+        state = StrategyState()
+        for start in range(0, len(data), 13):
+            state = strategy.advance(state, data[start:start + 13])
+        
+        self.assertEqual(state.signals, full.signals)
+        self.assertEqual(state.position, full.position)
+        self.assertEqual(state.bars, 200)
+        self.assertLessEqual(len(state.closes), strategy.block + 5)
+    
+    def test_advance_leaves_input_state_untouched(self):
+        """Test advance returns a new state"""
+        base_date = datetime(2024, 1, 1)
+        prices = [10, 9, 8, 7, 6, 5, 6, 7, 8, 9, 10]
+        data = [
+            {'datetime': base_date + timedelta(days=i), 'close': price}
+            for i, price in enumerate(prices)
+        ]
+        
+        first = self.strategy.advance(StrategyState(), data[:6])
+        second = self.strategy.advance(first, data[6:])
+        
+        self.assertEqual(first.bars, 6)
+        self.assertEqual(first.signals, [])
+        self.assertEqual([s['signal'] for s in second.signals], ['BUY'])
+    
+    def test_advance_rejects_older_bars(self):
+        """Test bars older than the last processed one are refused"""
+        data = [{'datetime': datetime(2024, 1, 2), 'close': 100}]
+        state = self.strategy.advance(StrategyState(), data)
+        
+        with self.assertRaises(ValueError):
+            self.strategy.advance(state, [{'datetime': datetime(2024, 1, 1), 'close': 101}])
+    
     def test_generate_signals_insufficient_data(self):
         """Test signal generation with insufficient data"""
         data = [
@@ -157,6 +331,31 @@ class TestMovingAverageStrategy(unittest.TestCase):
         self.assertEqual(performance['win_rate'], 66.67)
         self.assertEqual(performance['total_return'], 10.0)
     
+    def test_sweep_matches_single_evaluations(self):
+        """Test a sweep gives the same metrics as evaluating each pair alone"""
+        rng = np.random.default_rng(3)
+        closes = np.round(100 + np.cumsum(rng.normal(size=500)), 2)
+        base_date = datetime(2024, 1, 1)
+        data = [
+            {'datetime': base_date + timedelta(minutes=i), 'close': float(price)}
+            for i, price in enumerate(closes)
+        ]
+        pairs = [(short, long) for short in (2, 5, 8) for long in (10, 20, 30)]
+        
+        results = sweep_performance(closes, pairs)
+        
+        self.assertEqual([(r['short_window'], r['long_window']) for r in results], pairs)
+        for result in results:
+            strategy = MovingAverageCrossoverStrategy(result['short_window'], result['long_window'])
+            expected = strategy.calculate_performance(strategy.generate_signals(data))
+            for metric, value in expected.items():
+                self.assertEqual(result[metric], value)
+    
+    def test_sweep_window_longer_than_series(self):
+        """Test pairs needing more bars than available have no trades"""
+        results = sweep_performance([10, 11, 12], [(1, 5)])
+        self.assertEqual(results[0]['total_trades'], 0)
+    
     def test_strategy_windows(self):
         """Test strategy with different window sizes"""
         strategy_small = MovingAverageCrossoverStrategy(short_window=2, long_window=4)
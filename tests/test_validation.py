@@ -7,7 +7,8 @@ import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.models import TickerDataCreate
+from app.config import STRATEGY_MAX_WINDOW
+from app.models import StrategySweepRequest, TickerDataCreate
 
 class TestDataValidation(unittest.TestCase):
     """Test input validation for ticker data"""
@@ -204,5 +205,40 @@ class TestDataValidation(unittest.TestCase):
         )
         self.assertEqual(data.open, Decimal("0.01"))
 
+class TestSweepValidation(unittest.TestCase):
+    """Test window ranges of strategy sweeps"""
+    
+    def test_pair_count_matches_pairs(self):
+        """Test the arithmetic pair count against the expanded pairs"""
+        ranges = [
+            {"start": 1, "stop": 1},
+            {"start": 5, "stop": 20, "step": 5},
+            {"start": 3, "stop": 40, "step": 7},
+            {"start": 20, "stop": 100, "step": 10},
+            {"start": 12, "stop": 13}
+        ]
+        for short in ranges:
+            for long in ranges:
+                sweep = StrategySweepRequest(short_window=short, long_window=long)
+                expected = [
+                    (s, l) for s in sweep.short_window.windows() for l in sweep.long_window.windows() if s < l
+                ]
+                self.assertEqual(sweep.pairs(), expected)
+                self.assertEqual(sweep.pair_count(), len(expected))
+    
+    def test_huge_ranges_are_counted_without_expanding(self):
+        """Test the pair count of the widest allowed ranges"""
+        window = {"start": 1, "stop": STRATEGY_MAX_WINDOW}
+        sweep = StrategySweepRequest(short_window=window, long_window=window)
+        self.assertEqual(sweep.pair_count(), STRATEGY_MAX_WINDOW * (STRATEGY_MAX_WINDOW - 1) // 2)
+    
+    def test_stop_is_bounded(self):
+        """Test windows beyond STRATEGY_MAX_WINDOW are rejected"""
+        with self.assertRaises(ValidationError):
+            StrategySweepRequest(
+                short_window={"start": 1, "stop": 5},
+                long_window={"start": 10, "stop": STRATEGY_MAX_WINDOW + 1}
+            )
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
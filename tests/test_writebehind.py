@@ -0,0 +1,169 @@
+import asyncio
+import unittest
+from datetime import datetime
+from unittest import mock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import writebehind
+from app.writebehind import WriteBehindQueue, WriteQueueFull
+
+
+class TestWriteBehindQueue(unittest.IsolatedAsyncioTestCase):
+    """Test batching, tickets and backpressure"""
+
+    async def asyncSetUp(self):
+        self.batches = []
+        self.fail = 0
+        self.queue = WriteBehindQueue(max_size=10, batch_size=4, flush_interval=0.01)
+
+    async def asyncTearDown(self):
+        await self.queue.close()
+
+    async def flush(self, rows):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(rows))
+
+    async def test_batches_by_size(self):
+        self.queue.start(self.flush)
+        tickets = [self.queue.submit(f"bar{i}") for i in range(10)]
+
+        status = await self.queue.wait(tickets[-1], timeout=1)
+
+        self.assertEqual(len(set(tickets)), 10)
+        self.assertEqual(status, {"ticket": tickets[-1], "status": "durable"})
+        self.assertEqual([len(batch) for batch in self.batches], [4, 4, 2])
+        self.assertEqual(sum(self.batches, []), [f"bar{i}" for i in range(10)])
+
+    async def test_batches_by_time(self):
+        self.queue.start(self.flush)
+        self.queue.submit("first")
+        await asyncio.sleep(0.05)
+        second = self.queue.submit("second")
+
+        await self.queue.wait(second, timeout=1)
+
+        self.assertEqual(self.batches, [["first"], ["second"]])
+
+    async def test_status(self):
+        self.queue.start(self.flush)
+        ticket = self.queue.submit("bar")
+
+        self.assertEqual(self.queue.status(ticket)["status"], "pending")
+        self.assertIsNone(self.queue.status(f"{self.queue.boot_id}-2"))
+        self.assertIsNone(self.queue.status(f"{self.queue.boot_id}-0"))
+        self.assertIsNone(self.queue.status("1"))
+        await self.queue.wait(ticket, timeout=1)
+        self.assertEqual(self.queue.status(ticket)["status"], "durable")
+
+    async def test_tickets_of_another_start_are_unknown(self):
+        self.queue.start(self.flush)
+        ticket = self.queue.submit("bar")
+        await self.queue.wait(ticket, timeout=1)
+
+        restarted = WriteBehindQueue(max_size=10, batch_size=4, flush_interval=0.01)
+        restarted.start(self.flush)
+        try:
+            reused = restarted.submit("other bar")  # same sequence number
+            self.assertNotEqual(reused, ticket)
+            self.assertIsNone(restarted.status(ticket))
+            self.assertIsNone(await restarted.wait(ticket, timeout=0.01))
+        finally:
+            await restarted.close()
+
+    async def test_retried_then_failed(self):
+        self.queue.start(self.flush)
+        with mock.patch.object(writebehind, 'FLUSH_ATTEMPTS', 2), \
+                mock.patch.object(writebehind.asyncio, 'sleep', mock.AsyncMock()):
+            self.fail = 1
+            recovered = self.queue.submit("retried")
+            self.assertEqual((await self.queue.wait(recovered, timeout=1))["status"], "durable")
+
+            self.fail = 2
+            lost = self.queue.submit("lost")
+            status = await self.queue.wait(lost, timeout=1)
+
+        self.assertEqual(status["status"], "failed")
+        self.assertIn("database unavailable", status["error"])
+        self.assertEqual(self.queue.stats()["failed"], 1)
+        self.assertEqual(self.queue.stats()["flushed"], 1)
+
+    async def test_conflicts_are_reported(self):
+        async def flush(rows):
+            return [position for position, row in enumerate(rows) if row.symbol == 'DUP']
+
+        def bar(symbol):
+            return mock.Mock(symbol=symbol, datetime=datetime(2024, 1, 1, 9, 30))
+
+        self.queue.start(flush)
+        written = self.queue.submit(bar('AAPL'))
+        duplicate = self.queue.submit(bar('DUP'))
+        await self.queue.wait(duplicate, timeout=1)
+
+        self.assertEqual(self.queue.status(written)["status"], "durable")
+        self.assertEqual(self.queue.status(duplicate), {
+            "ticket": duplicate,
+            "status": "conflict",
+            "error": "DUP already has a bar at 2024-01-01T09:30:00"
+        })
+        self.assertEqual(self.queue.stats()["flushed"], 1)
+        self.assertEqual(self.queue.stats()["conflicts"], 1)
+
+    async def test_wait_times_out_while_pending(self):
+        release = asyncio.Event()
+
+        async def slow_flush(rows):
+            await release.wait()
+
+        self.queue.start(slow_flush)
+        ticket = self.queue.submit("bar")
+
+        self.assertEqual((await self.queue.wait(ticket, timeout=0.01))["status"], "pending")
+        release.set()
+
+    async def test_full_queue_rejects(self):
+        release = asyncio.Event()
+
+        async def blocked_flush(rows):
+            await release.wait()
+
+        self.queue.start(blocked_flush)
+        self.queue.submit("taken")  # picked up by the flusher
+        await asyncio.sleep(0)
+        for i in range(10):
+            self.queue.submit(i)
+
+        with self.assertRaises(WriteQueueFull):
+            self.queue.submit("overflow")
+        self.assertEqual(self.queue.stats()["rejected"], 1)
+        self.assertEqual(self.queue.last_sequence, 11)
+        release.set()
+
+    async def test_not_running_rejects(self):
+        with self.assertRaises(WriteQueueFull):
+            self.queue.submit("bar")
+
+    async def test_disabled(self):
+        queue = WriteBehindQueue(max_size=0, batch_size=4, flush_interval=0.01)
+        queue.start(self.flush)
+        self.assertFalse(queue.running)
+
+    async def test_close_drains(self):
+        self.queue.start(self.flush)
+        for i in range(6):
+            self.queue.submit(i)
+
+        await self.queue.close()
+
+        self.assertEqual(sum(self.batches, []), list(range(6)))
+        self.assertFalse(self.queue.running)
+        with self.assertRaises(WriteQueueFull):
+            self.queue.submit("late")
+
+
+if __name__ == '__main__':
+    unittest.main()